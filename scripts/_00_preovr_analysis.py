@@ -14,20 +14,29 @@ The script will output an Excel file with the following sheets:
 # IMPORT MODULS & LIBS
 import sys
 import argparse
+import logging
 
 import pandas as pd
 
 from scripts.utils.dataloaders import (
     load_clarity_data,
     load_aladdin_data,
-    load_crossreference,
     load_portfolios,
     load_overrides,
     save_excel,
+    save_excel_many,
+    WorkbookSession,
+    load_workbook_sheets,
 )
+from scripts.utils.parquet_cache import log_cache_stats
+from scripts.utils.xref_index import load_crossreference_index
+from scripts.utils.parallel_loader import load_in_parallel
+from scripts.utils.alignment import align_keys
+from scripts.utils.membership_index import MembershipIndex
+from scripts.utils.override_index import OverrideIndex
+from scripts.utils.state_table import StateTable
 
 from scripts.utils.clarity_data_quality_control_functions import (
-    prepare_dataframes,
     generate_delta,
     create_override_dict,
     add_portfolio_benchmark_info_to_df,
@@ -36,10 +45,12 @@ from scripts.utils.clarity_data_quality_control_functions import (
     filter_rows_with_common_elements,
     reorder_columns,
     clean_inclusion_list,
-    clean_portfolio_and_exclusion_list,
+    clean_portfolio_and_exclusion_lists,
     clean_exclusion_list_with_ovr,
     clean_empty_exclusion_rows,
     process_data_by_strategy,
+    render_affected_pairs,
+    render_strategy_lists,
     log_df_head_compact,
     log_dict_compact,
 )
@@ -48,29 +59,12 @@ from scripts.utils.clarity_data_quality_control_functions import (
 from scripts.utils.config import get_config
 
 # CONFIG SCRIPT
-# Get the common configuration for the Pre-OVR-Analysis script.
-config = get_config(
-    "pre-ovr-analysis", interactive=False, gen_output_dir=True, output_dir_dated=True
-)
-logger = config["logger"]
-DATE = config["DATE"]
-YEAR = config["YEAR"]
-DATE_PREV = config["DATE_PREV"]
-REPO_DIR = config["REPO_DIR"]
-DATAFEED_DIR = config["DATAFEED_DIR"]
-SRI_DATA_DIR = config["SRI_DATA_DIR"]
-paths = config["paths"]
-# Use the paths from config
-DF_PREV_PATH = paths["PRE_DF_WOVR_PATH"]
-DF_NEW_PATH = paths["CURRENT_DF_WOUTOVR_PATH"]
-CROSSREFERENCE_PATH = paths["CROSSREFERENCE_PATH"]
-BMK_PORTF_STR_PATH = paths["BMK_PORTF_STR_PATH"]
-OVR_PATH = paths["OVR_PATH"]
-OVR_BETA_PATH = SRI_DATA_DIR / "overrides" / "overrides_db_beta.xlsx"
-COMMITTEE_PATH = paths["COMMITTEE_PATH"]
-# Define the output directory and file based on the configuration.
-OUTPUT_DIR = config["OUTPUT_DIR"]
-OUTPUT_FILE = OUTPUT_DIR / f"{DATE}_pre_ovr_analysis.xlsx"
+# get_config (log file, output dir, paths) runs in main(), not at import: the
+# worker processes of the load / strategy / workbook pools re-import this
+# module (as __mp_main__ under the spawn start method) and must not set up
+# another log file and output dir.
+SCRIPT_NAME = "pre-ovr-analysis"
+logger = logging.getLogger(SCRIPT_NAME)
 
 
 # DEF CONSTANTS
@@ -104,6 +98,30 @@ delta_test_cols = [
     "scs_002_ec",
 ]
 columns_to_read = id_name_cols + clarity_test_col
+# columns parsed from the wide BRS export (cleaned names): the strategies, the
+# descriptors used in the deltas / zombie analysis and the perimeter ids
+brs_carteras_cols = [
+    "aladdin_id",
+    "issuer_name",
+    "security_description",
+    "portfolio_full_name",
+    "portfolio_id",
+    *delta_test_cols,
+    "str_004_asec_sust._bonds",
+]
+brs_benchmarks_cols = ["aladdin_id", "benchmark_id", *delta_test_cols]
+brs_columns = {
+    "portfolio_carteras": brs_carteras_cols,
+    "portfolio_benchmarks": brs_benchmarks_cols,
+}
+# descriptors parsed only if the export has them; keys and strategies are required
+brs_carteras_optional_cols = [
+    "issuer_name",
+    "security_description",
+    "portfolio_full_name",
+    "str_004_asec_sust._bonds",
+]
+brs_optional_columns = {"portfolio_carteras": brs_carteras_optional_cols}
 rename_dict = {
     "cs_001_sec": "scs_001_sec",
     "cs_002_ec": "scs_002_ec",
@@ -132,27 +150,128 @@ def parse_arguments():
 
     # add positional argument date to not work together with the get_date script
     parser.add_argument("--date", nargs="?", help="Date in YYYYMM format (positional)")
+    # read by get_config, declared here so parse_args accepts it
+    parser.add_argument(
+        "--read-engine",
+        choices=["c", "pyarrow"],
+        help="CSV read engine for the datafeed / crossreference loaders",
+    )
+    parser.add_argument(
+        "--sidecar",
+        choices=["parquet", "csv"],
+        help="Also write every Excel sheet as a Parquet / CSV file",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for the strategy-level analysis (--simple)",
+    )
 
     return parser
 
 
 # Define main function
-def main(simple: bool = False, zombie: bool = False):
+def main(
+    simple: bool = False,
+    zombie: bool = False,
+    sidecar: str = None,
+    workers: int = None,
+):
+    # Get the common configuration for the Pre-OVR-Analysis script.
+    config = get_config(
+        SCRIPT_NAME, interactive=False, gen_output_dir=True, output_dir_dated=True
+    )
+    DATE = config["DATE"]
+    paths = config["paths"]
+    DF_PREV_PATH = paths["PRE_DF_WOVR_PATH"]
+    DF_NEW_PATH = paths["CURRENT_DF_WOUTOVR_PATH"]
+    CROSSREFERENCE_PATH = paths["CROSSREFERENCE_PATH"]
+    BMK_PORTF_STR_PATH = paths["BMK_PORTF_STR_PATH"]
+    OVR_PATH = paths["OVR_PATH"]
+    COMMITTEE_PATH = paths["COMMITTEE_PATH"]
+    # Define the output directory based on the configuration.
+    OUTPUT_DIR = config["OUTPUT_DIR"]
+
     logger.info(f"Starting pre-ovr-analysis for {DATE}.")
     logger.info(f"IT WILL RUN STRATEGY LEVEL ANALYSIS: {simple}")
     logger.info(f"IT WILL RUN ZOMBIE ANALYSIS: {zombie}")
     # 1.    LOAD DATA
     logger.info("\n\n\n1. LOADING DATA\n\n\n")
+    # 1.0.  load every independent input concurrently: excel workbooks in worker
+    # processes (openpyxl holds the GIL), csv feeds in threads
+    load_specs = [
+        {
+            "name": "brs_sheets",
+            "loader": load_workbook_sheets,
+            "args": (
+                BMK_PORTF_STR_PATH,
+                ["portfolio_carteras", "portfolio_benchmarks"],
+            ),
+            "kwargs": {
+                "skiprows": 3,
+                "columns": brs_columns,
+                "optional_columns": brs_optional_columns,
+            },
+            "executor": "process",
+        },
+        {
+            "name": "committee_sheets",
+            "loader": load_workbook_sheets,
+            "args": (COMMITTEE_PATH, ["Portfolios", "Benchmarks"]),
+            "executor": "process",
+        },
+        {
+            "name": "overrides",
+            "loader": load_overrides,
+            "args": (OVR_PATH,),
+            "executor": "process",
+        },
+        {
+            "name": "crossreference",
+            "loader": load_crossreference_index,
+            "args": (CROSSREFERENCE_PATH,),
+            "executor": "thread",
+        },
+        {
+            "name": "old_clarity",
+            "loader": load_clarity_data,
+            "args": (DF_PREV_PATH, columns_to_read),
+            "executor": "thread",
+        },
+        {
+            "name": "new_clarity",
+            "loader": load_clarity_data,
+            "args": (DF_NEW_PATH, columns_to_read),
+            "executor": "thread",
+        },
+    ]
+    loaded = load_in_parallel(load_specs)
+
     # 1.1.  aladdin /brs data / perimeters
     logger.info("Loading BRS data")
-    brs_carteras = load_aladdin_data(BMK_PORTF_STR_PATH, "portfolio_carteras")
-    brs_benchmarks = load_aladdin_data(BMK_PORTF_STR_PATH, "portfolio_benchmarks")
-    crossreference = load_crossreference(CROSSREFERENCE_PATH)
-
-    # remove duplicate and nan permid in crossreference
-    logger.info("Removing duplicates and NaN values from crossreference")
-    crossreference.drop_duplicates(subset=["permid"], inplace=True)
-    crossreference.dropna(subset=["permid"], inplace=True)
+    # share the parsed sheets with every loader
+    brs_book = WorkbookSession.from_frames(
+        BMK_PORTF_STR_PATH,
+        loaded.pop("brs_sheets"),
+        skiprows=3,
+        columns=brs_columns,
+        optional_columns=brs_optional_columns,
+    )
+    committee_book = WorkbookSession.from_frames(
+        COMMITTEE_PATH, loaded.pop("committee_sheets")
+    )
+    brs_carteras = load_aladdin_data(
+        brs_book,
+        "portfolio_carteras",
+        columns=brs_carteras_cols,
+        optional_columns=brs_carteras_optional_cols,
+    )
+    brs_benchmarks = load_aladdin_data(
+        brs_book, "portfolio_benchmarks", columns=brs_benchmarks_cols
+    )
+    # persisted permid <-> aladdin_id index, first match per permid
+    crossreference = loaded.pop("crossreference")
 
     # get BRS data at issuer level for becnhmarks without empty aladdin_id
     brs_carteras_issuerlevel = get_issuer_level_df(brs_carteras, "aladdin_id")
@@ -163,20 +282,17 @@ def main(simple: bool = False, zombie: bool = False):
 
     # 1.2.  clarity data
     logger.info("Loading clarity data")
-    prep_old_clarity_df = load_clarity_data(DF_PREV_PATH, columns_to_read)
-    prep_new_clarity_df = load_clarity_data(DF_NEW_PATH, columns_to_read)
+    prep_old_clarity_df = loaded.pop("old_clarity")
+    prep_new_clarity_df = loaded.pop("new_clarity")
     # let's rename columns in df_1 and df_2 using the rename_dict
     prep_old_clarity_df.rename(columns=rename_dict, inplace=True)
     prep_new_clarity_df.rename(columns=rename_dict, inplace=True)
-    df_2_copy = prep_new_clarity_df.copy()
+    # add_aladdin_id returns new frames, so the loaded one is kept as is
+    df_2_copy = prep_new_clarity_df
     # add aladdin_id to df_1 and df_2
     logger.info("Adding aladdin_id to clarity dfs")
-    prep_old_clarity_df = prep_old_clarity_df.merge(
-        crossreference[["permid", "aladdin_id"]], on="permid", how="left"
-    )
-    prep_new_clarity_df = prep_new_clarity_df.merge(
-        crossreference[["permid", "aladdin_id"]], on="permid", how="left"
-    )
+    prep_old_clarity_df = crossreference.add_aladdin_id(prep_old_clarity_df)
+    prep_new_clarity_df = crossreference.add_aladdin_id(prep_new_clarity_df)
 
     logger.info(
         f"previous clarity df's  rows: {prep_old_clarity_df.shape[0]}, new clarity df's rows: {prep_new_clarity_df.shape[0]}"
@@ -192,9 +308,8 @@ def main(simple: bool = False, zombie: bool = False):
 
     # overrides = load_overrides(OVR_PATH)
     logger.info("Loading overrides data with beta version of the ovr db")
-    overrides = load_overrides(
-        OVR_PATH
-    )  # changed to the original one just in case for the time being
+    # changed to the original one (OVR_PATH) just in case for the time being
+    overrides = loaded.pop("overrides")
 
     # rename column brs_id to aladdin_id
     if "brs_id" in overrides.columns:
@@ -207,7 +322,9 @@ def main(simple: bool = False, zombie: bool = False):
             else rename_dict[x] if isinstance(x, str) and x in rename_dict else x
         )
     )
-    ovr_dict = create_override_dict(overrides)
+    # every override lookup below goes through one index (conflicts logged here)
+    override_index = OverrideIndex.from_frame(overrides)
+    ovr_dict = create_override_dict(override_index)
     # let's log first few key value pairs of the ovr_dict
     log_dict_compact(ovr_dict, dict_name="ovr_dict", n=2)
 
@@ -215,115 +332,91 @@ def main(simple: bool = False, zombie: bool = False):
     (
         portfolio_dict,
         benchmark_dict,
-    ) = load_portfolios(path_pb=BMK_PORTF_STR_PATH, path_committe=COMMITTEE_PATH)
+    ) = load_portfolios(path_pb=brs_book, path_committe=committee_book)
+    brs_book.close()
+    committee_book.close()
 
     log_dict_compact(portfolio_dict, dict_name="portfolio_dict", n=2)
     log_dict_compact(benchmark_dict, dict_name="benchmark_dict", n=2)
+    # issuer -> portfolio / benchmark memberships, built once for every delta
+    portfolio_index = MembershipIndex.from_dict(portfolio_dict)
+    benchmark_index = MembershipIndex.from_dict(benchmark_dict)
     # START PRE-OVR ANALYSIS
     logger.info("\n\n\nStarting pre-ovr-analysis\n\n\n")
     # 2.    PREP DATA FOR ANALYSIS
     logger.info("\n\n\n2. PREPPEING DATA FOR DELTA GENERATION\n\n\n")
-    # make sure that the values of of the columns delta_test_cols are strings and all uppercase and strip
-    for col in delta_test_cols:
-        prep_old_clarity_df[col] = prep_old_clarity_df[col].str.upper().str.strip()
-        prep_new_clarity_df[col] = prep_new_clarity_df[col].str.upper().str.strip()
-        brs_carteras_issuerlevel[col] = (
-            brs_carteras_issuerlevel[col].str.upper().str.strip()
-        )
-        brs_benchmarks_issuerlevel[col] = (
-            brs_benchmarks_issuerlevel[col].str.upper().str.strip()
-        )
+    # strategy columns are already normalised to the shared STRATEGY_DTYPE at load
 
     # 2.2.  PREPARE DATA CLARITY LEVEL
     logger.info("\nPreparing dataframes for clarity level\n")
-    (
-        prep_old_clarity_df,
-        prep_new_clarity_df,
-        new_issuers_clarity,
-        out_issuer_clarity,
-    ) = prepare_dataframes(prep_old_clarity_df, prep_new_clarity_df)
-    # reset index for new_issuers_clarity and out_issuer_clarity
-    new_issuers_clarity.reset_index(inplace=True)
-    out_issuer_clarity.reset_index(inplace=True)
-    # drop isin from out_issuer_clarity and new_issuers_clarity
-    out_issuer_clarity.drop(columns=["isin"], inplace=True)
-    new_issuers_clarity.drop(columns=["isin"], inplace=True)
+    # one keyed alignment per compared pair, shared by every delta in step 3
+    clarity_alignment = align_keys(prep_old_clarity_df, prep_new_clarity_df)
 
+    # NEW CROSSREFERENCE HAS MULTIPLE ISSUER ID FOR A SINGLE PERMID
+    if clarity_alignment.has_duplicates("base"):
+        logger.warning(f"\n\n=======CHECK THIS OUT==========\n\n")
+        logger.warning(
+            "Duplicated rows in df_1 (first row of each permid is compared):\n"
+            f"{clarity_alignment.duplicated_rows('base')[['issuer_name', 'aladdin_id']].to_string(index=True)}"
+        )
+    if clarity_alignment.has_duplicates("new"):
+        logger.warning("\nTHERE ARE THE DUPLICATED ISSUERS!!!!!!!\n")
+        logger.warning(
+            f"Duplicated rows in df_2:\n{clarity_alignment.duplicated_rows('new')[['issuer_name', 'aladdin_id']].to_string(index=True)}"
+        )
+        sys.exit()
+
+    # the old side is only read through the state table (2.5), never copied
+    prep_new_clarity_df = clarity_alignment.common_rows("new")
     # log size of new and missing issuers
+    logger.info(f"Number of new issuers in Clarity's df: {clarity_alignment.n_new}")
     logger.info(
-        f"Number of new issuers in Clarity's df: {new_issuers_clarity.shape[0]}"
-    )
-    logger.info(
-        f"Number of missing issuers in Clarity's df: {out_issuer_clarity.shape[0]}"
+        f"Number of missing issuers in Clarity's df: {clarity_alignment.n_missing}"
     )
 
     # 2.3.  PREPARE DATA BRS LEVEL FOR PORTFOLIOS
     logger.info("\nPreparing dataframes for BRS Portfolio level\n")
-    (
-        prep_brs_df_ptf,
-        prep_clarity_df_ptf,
-        in_clarity_but_not_in_brs,
-        in_brs_but_not_in_clarity,  # zombies?
-    ) = prepare_dataframes(
+    ptf_alignment = align_keys(
         brs_carteras_issuerlevel, prep_new_clarity_df, target_index="aladdin_id"
     )
 
     # log size of new and missing issuers
-    logger.info(
-        f"Number issuers in clarity but not Aladdin: {in_clarity_but_not_in_brs.shape[0]}"
-    )
-    logger.info(
-        f"Number issuers in Aladdin's Portfolios but not Clarity: {in_brs_but_not_in_clarity.shape[0]}"
+    logger.info(f"Number issuers in clarity but not Aladdin: {ptf_alignment.n_new}")
+    logger.info(  # zombies?
+        f"Number issuers in Aladdin's Portfolios but not Clarity: {ptf_alignment.n_missing}"
     )
 
     # 2.4.  PREPARE DATA BENCHMARK BRS LEVEL
     logger.info("\nPreparing dataframes for BRS benchmarks level\n")
-    (
-        prep_brs_df_bmk,
-        prep_clarity_df_bmk,
-        in_clarity_but_not_in_brs_benchmarks,
-        in_brs_benchmark_but_not_in_clarity,
-    ) = prepare_dataframes(
+    bmk_alignment = align_keys(
         brs_benchmarks_issuerlevel, prep_new_clarity_df, target_index="aladdin_id"
     )
 
     # log size of new and missing issuers
+    logger.info(f"Number issuers in clarity but not benchmarks: {bmk_alignment.n_new}")
     logger.info(
-        f"Number issuers in clarity but not benchmarks: {in_clarity_but_not_in_brs_benchmarks.shape[0]}"
-    )
-    logger.info(
-        f"Number issuers in Benchmarks but not Clarity: {in_brs_benchmark_but_not_in_clarity.shape[0]}"
+        f"Number issuers in Benchmarks but not Clarity: {bmk_alignment.n_missing}"
     )
 
-    # NEW CROSSREFERENCE HAS MULTIPLE ISSUER ID FOR A SINGLE PERMID
-    logger.info(
-        f"Checking index uniqueness: df1 index duplicates: {prep_old_clarity_df.index.duplicated().sum()}"
+    # 2.5.  CANONICAL STATE TABLE
+    logger.info("\nBuilding the strategy state table\n")
+    # every compared state is stored once, as one long categorical table; the
+    # deltas (3) and the strategy level analysis (6) are queries on it
+    state_table = StateTable.from_frames(
+        {
+            "old": clarity_alignment.base,
+            "new": prep_new_clarity_df,
+            "brs_ptf": brs_carteras_issuerlevel,
+            "brs_bmk": brs_benchmarks_issuerlevel,
+        },
+        delta_test_cols,
+        overrides=override_index,
     )
-    logger.info(
-        f"Checking index uniqueness: df_2 index duplicates: {prep_new_clarity_df.index.duplicated().sum()}"
+    states_per_source = state_table.counts().pivot_table(
+        index="strategy", columns="source", values="n", aggfunc="sum", observed=True
     )
-    duplicated_rows_df_1 = prep_old_clarity_df[
-        prep_old_clarity_df.index.duplicated(keep=False)
-    ]
-    if not duplicated_rows_df_1.empty:
-        logger.warning(f"\n\n=======CHECK THIS OUT==========\n\n")
-        logger.warning(f"Duplicated indexes found in df1:\n{duplicated_rows_df_1}")
-    duplicated_rows_df_2 = prep_new_clarity_df[
-        prep_new_clarity_df.index.duplicated(keep=False)
-    ]
-    if not duplicated_rows_df_2.empty:
-        logger.warning(f"Duplicated indexes found in df1:\n{duplicated_rows_df_2}")
-    # log index, issuer_name, and aladdin_id for the duplicated_rows_df1 and duplicated_rows_df_2
-    if not duplicated_rows_df_1.empty:
-        logger.warning("\nTHERE ARE THE DUPLICATED ISSUERS!!!!!!!\n")
-        logger.warning(
-            f"Duplicated rows in df_1:\n{duplicated_rows_df_1[['issuer_name','aladdin_id']].to_string(index=True)}"
-        )
-    if not duplicated_rows_df_2.empty:
-        logger.warning(
-            f"Duplicated rows in df_2:\n{duplicated_rows_df_2[['issuer_name', 'aladdin_id']].to_string(index=True)}"
-        )
-        sys.exit()
+    logger.info(f"States per strategy and source:\n{states_per_source}")
+    del prep_old_clarity_df
 
     # 3. GENERATE DELTAS
     logger.info("\n\n\n3. GENERATING DELTAS\n\n\n")
@@ -331,7 +424,8 @@ def main(simple: bool = False, zombie: bool = False):
     delta_process_config = [
         {
             "delta_name": "delta_clarity",
-            "compared_dfs": [prep_old_clarity_df, prep_new_clarity_df],
+            "alignment": clarity_alignment,
+            "states": ("old", "new"),
             "target_index": "permid",
             "excl_incl_dict": {
                 "excl_dict": {
@@ -352,7 +446,8 @@ def main(simple: bool = False, zombie: bool = False):
         },
         {
             "delta_name": "delta_brs_ptf",
-            "compared_dfs": [prep_brs_df_ptf, prep_clarity_df_ptf],
+            "alignment": ptf_alignment,
+            "states": ("brs_ptf", "new"),
             "target_index": "aladdin_id",
             "excl_incl_dict": {
                 "excl_dict": {
@@ -373,7 +468,8 @@ def main(simple: bool = False, zombie: bool = False):
         },
         {
             "delta_name": "delta_brs_bmks",
-            "compared_dfs": [prep_brs_df_bmk, prep_clarity_df_bmk],
+            "alignment": bmk_alignment,
+            "states": ("brs_bmk", "new"),
             "target_index": "aladdin_id",
             "excl_incl_dict": {
                 "excl_dict": {
@@ -395,12 +491,17 @@ def main(simple: bool = False, zombie: bool = False):
     ]
 
     deltas_df_dict = {}
+    transitions = {}
 
     for config in delta_process_config:
         delta_name = f"{config["delta_name"]}"
-        old_df, new_df = config["compared_dfs"]
+        new_df = config["alignment"].common_rows("new")
         target_idx = config["target_index"]
         logger.info(f"Initiating delta generation process for {delta_name}")
+        # compare the pair once; every delta below is a slice of the same codes
+        transitions[delta_name] = state_table.transitions(
+            *config["states"], target_idx, new_df.index
+        )
         excl_df_name = config["excl_incl_dict"]["excl_dict"]["df_name"]
         excl_delta_analysis_str = config["excl_incl_dict"]["excl_dict"][
             "delta_analysis_str"
@@ -410,7 +511,7 @@ def main(simple: bool = False, zombie: bool = False):
         excl_dropping_cols = config["excl_incl_dict"]["excl_dict"]["dropping_cols"]
         logger.info(f"Generating delta for {excl_df_name}")
         deltas_df_dict[excl_df_name] = generate_delta(
-            old_df,
+            None,  # old states come with the transitions
             new_df,
             delta_analysis_str=excl_delta_analysis_str,
             condition_list=excl_condition_list,
@@ -419,6 +520,8 @@ def main(simple: bool = False, zombie: bool = False):
             target_index=target_idx,
             filter_col=excl_filtering_col,
             drop_cols=excl_dropping_cols,
+            transitions=transitions[delta_name],
+            as_mask=True,
         )
         incl_df_name = config["excl_incl_dict"]["incl_dict"]["df_name"]
         incl_delta_analysis_str = config["excl_incl_dict"]["incl_dict"][
@@ -429,7 +532,7 @@ def main(simple: bool = False, zombie: bool = False):
         incl_dropping_cols = config["excl_incl_dict"]["incl_dict"]["dropping_cols"]
         logger.info(f"Generating delta for {excl_df_name}")
         deltas_df_dict[incl_df_name] = generate_delta(
-            old_df,
+            None,  # old states come with the transitions
             new_df,
             delta_analysis_str=incl_delta_analysis_str,
             condition_list=incl_condition_list,
@@ -438,12 +541,14 @@ def main(simple: bool = False, zombie: bool = False):
             target_index=target_idx,
             filter_col=incl_filtering_col,
             drop_cols=incl_dropping_cols,
+            transitions=transitions[delta_name],
+            as_mask=True,
         )
 
     # Generate One Off Delta for new Flags
     delta_flagged = generate_delta(
-        df1=prep_brs_df_ptf,
-        df2=prep_clarity_df_ptf,
+        df1=None,  # BRS states come with the transitions
+        df2=ptf_alignment.common_rows("new"),
         condition_list=["FLAG"],
         delta_analysis_str="flagged",
         get_inc_excl=True,
@@ -451,7 +556,10 @@ def main(simple: bool = False, zombie: bool = False):
         target_index="aladdin_id",
         filter_col="new_flagged",
         drop_cols=[],
+        transitions=transitions["delta_brs_ptf"],
+        as_mask=True,
     )
+    del transitions
 
     # check if brs_carteras_issuerlevel & if aladdin_id is in columns
     # check if aladdin_id is index of brs_carteras_issuerlevel
@@ -482,6 +590,7 @@ def main(simple: bool = False, zombie: bool = False):
     )
 
     logger.info(f"Delta Flagged df head:\n{delta_flagged.head()}")
+    delta_flagged = render_strategy_lists(delta_flagged)
     delta_flagged.to_csv(
         rf"C:\Users\n740789\Downloads\{DATE}_delta_flagged.csv", index=False
     )
@@ -489,12 +598,12 @@ def main(simple: bool = False, zombie: bool = False):
     # 3.1.  Unpack DELTAS
     # Unpacking filtered dataframes after filtering and dropping columns
 
-    delta_ex_clarity = deltas_df_dict["delta_ex_clarity"].copy()
-    delta_in_clarity = deltas_df_dict["delta_in_clarity"].copy()
-    delta_ex_ptf = deltas_df_dict["delta_ex_ptf"].copy()
-    delta_in_ptf = deltas_df_dict["delta_in_ptf"].copy()
-    delta_ex_bmk = deltas_df_dict["delta_ex_bmk"].copy()
-    delta_in_bmk = deltas_df_dict["delta_in_bmk"].copy()
+    delta_ex_clarity = deltas_df_dict["delta_ex_clarity"]
+    delta_in_clarity = deltas_df_dict["delta_in_clarity"]
+    delta_ex_ptf = deltas_df_dict["delta_ex_ptf"]
+    delta_in_ptf = deltas_df_dict["delta_in_ptf"]
+    delta_ex_bmk = deltas_df_dict["delta_ex_bmk"]
+    delta_in_bmk = deltas_df_dict["delta_in_bmk"]
 
     # Free space by delting the dicts and config list you are done with
     del deltas_df_dict, delta_process_config
@@ -643,11 +752,7 @@ def main(simple: bool = False, zombie: bool = False):
                     logger.info(
                         f"Merging to add permid to {config["prep_config_name"]}'s {df_name}"
                     )
-                    df = df.merge(
-                        crossreference[["aladdin_id", "permid"]],
-                        on="aladdin_id",
-                        how="left",
-                    )
+                    df = crossreference.add_permid(df)
                     config["dfs_dict"][df_name] = df
                 else:
                     logger.info(f"permid already in {df_name}, continue...")
@@ -661,14 +766,14 @@ def main(simple: bool = False, zombie: bool = False):
             logger.info(
                 f" Adding affect portfolio info to {config["prep_config_name"]}'s {df_name}"
             )
-            df = add_portfolio_benchmark_info_to_df(portfolio_dict, df)
+            df = add_portfolio_benchmark_info_to_df(portfolio_index, df, as_mask=True)
             # 4.3.2. Add affected Benchmark info to df )
             logger.info(
                 f" Adding affect benchmark info to {config["prep_config_name"]}'s {df_name}"
             )
             # 4.3.3. filter_non_empty_lists
             df = add_portfolio_benchmark_info_to_df(
-                benchmark_dict, df, "affected_benchmark_str"
+                benchmark_index, df, "affected_benchmark_str", as_mask=True
             )
             # safe updated df into the dict
             config["dfs_dict"][df_name] = df
@@ -736,7 +841,9 @@ def main(simple: bool = False, zombie: bool = False):
                         {df_name} had {df.shape[0]} rows BEFORE applying clean_exclusion_list_with_ovr() func.
                         """
                     )
-                    df = clean_exclusion_list_with_ovr(df)
+                    df = clean_exclusion_list_with_ovr(
+                        df, override_index=override_index
+                    )
                     config["dfs_dict"][df_name] = df
                     logger.info(
                         f"{df_name} has {config["dfs_dict"][df_name].shape[0]} rows AFTER applying clean_exclusion_list_with_ovr() func."
@@ -762,7 +869,7 @@ def main(simple: bool = False, zombie: bool = False):
                         {df_name} had {config["dfs_dict"][df_name].shape[0]} rows BEFORE applying clean_inclusion_list() func.
                         """
                     )
-                    df = clean_inclusion_list(df)
+                    df = clean_inclusion_list(df, override_index=override_index)
                     config["dfs_dict"][df_name] = df
                     logger.info(
                         f"{df_name} has {config["dfs_dict"][df_name].shape[0]} rows AFTER applying clean_inclusion_list() func.\n"
@@ -780,14 +887,14 @@ def main(simple: bool = False, zombie: bool = False):
                     # cleant portfolio and exclusion list
                     logger.info(
                         f"""
-                        {prep_config_name}'s {df_name} had {df.shape[0]} rows BEFORE applying clean_portfolio_and_exclusion_list() func.
+                        {prep_config_name}'s {df_name} had {df.shape[0]} rows BEFORE applying clean_portfolio_and_exclusion_lists() func.
                         """
                     )
-                    df = df.apply(clean_portfolio_and_exclusion_list, axis=1)
+                    df = clean_portfolio_and_exclusion_lists(df)
 
                     logger.info(
                         f"""
-                        {prep_config_name}'s {df_name} had {df.shape[0]} rows AFTER applying clean_portfolio_and_exclusion_list() func.
+                        {prep_config_name}'s {df_name} had {df.shape[0]} rows AFTER applying clean_portfolio_and_exclusion_lists() func.
                         """
                     )
                     config["dfs_dict"][df_name] = df
@@ -825,6 +932,9 @@ def main(simple: bool = False, zombie: bool = False):
             logger.info(
                 f"Reordering columns for {config["prep_config_name"]}'s {df_name}"
             )
+            # affected portfolios / benchmarks as (id, strategy) pairs from here on
+            df = render_affected_pairs(df, portfolio_index, "affected_portfolio_str")
+            df = render_affected_pairs(df, benchmark_index, "affected_benchmark_str")
             df = reorder_columns(
                 df=df, keep_first=id_name_issuers_cols, exclude=delta_test_cols
             )
@@ -837,12 +947,12 @@ def main(simple: bool = False, zombie: bool = False):
             final_dfs_dict[final_key] = df
 
     # Unpack cleaned DataFrames using original names
-    delta_ex_clarity = final_dfs_dict["clarity_deltas_exclusion_df"].copy()
-    delta_in_clarity = final_dfs_dict["clarity_deltas_inclusion_df"].copy()
-    delta_ex_ptf = final_dfs_dict["portfolio_deltas_exclusion_df"].copy()
-    delta_in_ptf = final_dfs_dict["portfolio_deltas_inclusion_df"].copy()
-    delta_ex_bmk = final_dfs_dict["benchmark_deltas_exclusion_df"].copy()
-    delta_in_bmk = final_dfs_dict["benchmark_deltas_inclusion_df"].copy()
+    delta_ex_clarity = final_dfs_dict["clarity_deltas_exclusion_df"]
+    delta_in_clarity = final_dfs_dict["clarity_deltas_inclusion_df"]
+    delta_ex_ptf = final_dfs_dict["portfolio_deltas_exclusion_df"]
+    delta_in_ptf = final_dfs_dict["portfolio_deltas_inclusion_df"]
+    delta_ex_bmk = final_dfs_dict["benchmark_deltas_exclusion_df"]
+    delta_in_bmk = final_dfs_dict["benchmark_deltas_inclusion_df"]
 
     # Free up memory: delete prep structure and final dict
     del prep_config, final_dfs_dict
@@ -859,7 +969,7 @@ def main(simple: bool = False, zombie: bool = False):
                 "input_df": delta_ex_ptf,
                 "exclusion_col": "exclusion_list",
                 "affected_col": "affected_portfolio_str",
-                "brs_source": prep_brs_df_ptf,
+                "brs_source": state_table.source("brs_ptf"),
             },
             {
                 "description": "Exclusion BRS Exclusion Analysis at the Benchmark level",
@@ -867,7 +977,7 @@ def main(simple: bool = False, zombie: bool = False):
                 "input_df": delta_ex_bmk,
                 "exclusion_col": "exclusion_list",
                 "affected_col": "affected_benchmark_str",
-                "brs_source": prep_brs_df_bmk,
+                "brs_source": state_table.source("brs_bmk"),
             },
             {
                 "description": "Exclusion BRS Exclusion Analysis at the Benchmark level",
@@ -875,7 +985,7 @@ def main(simple: bool = False, zombie: bool = False):
                 "input_df": delta_ex_clarity,
                 "exclusion_col": "exclusion_list",
                 "affected_col": "affected_benchmark_str",
-                "brs_source": prep_brs_df_bmk,
+                "brs_source": state_table.source("brs_bmk"),
             },
             {
                 "description": "Exclusion BRS Inclusion Analysis at the Portfolio level",
@@ -883,7 +993,7 @@ def main(simple: bool = False, zombie: bool = False):
                 "input_df": delta_in_ptf,
                 "exclusion_col": "inclusion_list",
                 "affected_col": "affected_portfolio_str",
-                "brs_source": prep_brs_df_ptf,
+                "brs_source": state_table.source("brs_ptf"),
             },
             {
                 "description": "Exclusion BRS Inclusion Analysis at the Benchmark level",
@@ -891,7 +1001,7 @@ def main(simple: bool = False, zombie: bool = False):
                 "input_df": delta_in_bmk,
                 "exclusion_col": "inclusion_list",
                 "affected_col": "affected_benchmark_str",
-                "brs_source": prep_brs_df_bmk,
+                "brs_source": state_table.source("brs_bmk"),
             },
             {
                 "description": "Exclusion BRS Inclusion Analysis at the Benchmark level",
@@ -899,7 +1009,7 @@ def main(simple: bool = False, zombie: bool = False):
                 "input_df": delta_in_clarity,
                 "exclusion_col": "inclusion_list",
                 "affected_col": "affected_benchmark_str",
-                "brs_source": prep_brs_df_bmk,
+                "brs_source": state_table.source("brs_bmk"),
             },
         ]
 
@@ -915,12 +1025,13 @@ def main(simple: bool = False, zombie: bool = False):
                 input_delta_df=config["input_df"],
                 strategies_list=delta_test_cols,
                 input_df_exclusion_col=config["exclusion_col"],
-                df1_lookup_source=prep_old_clarity_df,
-                df2_lookup_source=prep_new_clarity_df,
+                df1_lookup_source=state_table.source("old"),
+                df2_lookup_source=state_table.source("new"),
                 brs_lookup_source=config["brs_source"],
-                overrides_df=overrides,
+                overrides_df=state_table.source("ovr"),
                 affected_portfolio_col_name=config["affected_col"],
                 logger=logger,
+                max_workers=workers,
             )
     else:
         pass
@@ -942,14 +1053,14 @@ def main(simple: bool = False, zombie: bool = False):
     # 8. SAVE INTO EXCEL
     logger.info("\n\n\n7. SAVING DATA INTO EXCEL\n\n\n")
 
-    # create dict of df and df name
+    # create dict of df and df name; the strategy bitmasks are written as lists
     dfs_dict = {
-        "excl_carteras": delta_ex_ptf,
-        "excl_benchmarks": delta_ex_bmk,
-        "excl_clarity": delta_ex_clarity,
-        "incl_clarity": delta_in_clarity,
-        "incl_carteras": delta_in_ptf,
-        "incl_benchmarks": delta_in_bmk,
+        "excl_carteras": render_strategy_lists(delta_ex_ptf),
+        "excl_benchmarks": render_strategy_lists(delta_ex_bmk),
+        "excl_clarity": render_strategy_lists(delta_ex_clarity),
+        "incl_clarity": render_strategy_lists(delta_in_clarity),
+        "incl_carteras": render_strategy_lists(delta_in_ptf),
+        "incl_benchmarks": render_strategy_lists(delta_in_bmk),
     }
     if zombie:
         dfs_dict["zombie_analysis"] = zombie_df
@@ -976,26 +1087,30 @@ def main(simple: bool = False, zombie: bool = False):
                     logger.warning(
                         f"{df_name} is not a DataFrame: {type(maybe_df).__name__}"
                     )
-        for key, df in results_str_level_dfs.items():
-            save_excel(df, OUTPUT_DIR, file_name=f"{DATE}_{key}")
-            logger.info(
-                f"\nSaved {key} to {OUTPUT_DIR}/{DATE}_{key}_preovr_analysis.xlsx\n"
-            )
-        save_excel(dfs_dict, OUTPUT_DIR, file_name=f"{DATE}_preovr_analysis")
-        logger.info(f"\nSaved dfs_dict to {OUTPUT_DIR}/{DATE}_preovr_analysis.xlsx\n")
+        # the workbooks are independent: write them in parallel worker processes
+        workbooks = {f"{DATE}_{key}": df for key, df in results_str_level_dfs.items()}
+        workbooks[f"{DATE}_preovr_analysis"] = dfs_dict
+        saved = save_excel_many(workbooks, OUTPUT_DIR, sidecar=sidecar)
+        for file_name, output_file in saved.items():
+            logger.info(f"\nSaved {file_name} to {output_file}\n")
 
     else:
-        save_excel(dfs_dict, OUTPUT_DIR, file_name=f"{DATE}_preovr_analysis")
+        save_excel(
+            dfs_dict, OUTPUT_DIR, file_name=f"{DATE}_preovr_analysis", sidecar=sidecar
+        )
         logger.info(f"\nSaved dfs_dict to {OUTPUT_DIR}/{DATE}_preovr_analysis.xlsx\n")
 
+    # report cold vs warm loads of the clarity feeds
+    log_cache_stats()
+
 
 if __name__ == "__main__":
     # check if user wants also the simplified ovr analysis
     args = parse_arguments().parse_args()
     if args.simple:
         # generate simplify over analysis
-        main(simple=True)
+        main(simple=True, sidecar=args.sidecar, workers=args.workers)
         logger.info("\n\n\n FINISHED PRE-OVR ANALYSIS\n\n\n")
     else:
-        main()
+        main(sidecar=args.sidecar, workers=args.workers)
         logger.info("\n\n\n FINISHED PRE-OVR ANALYSIS\n\n\n")
@@ -5,10 +5,10 @@ import pandas as pd
 
 from scripts.utils.dataloaders import (
     load_overrides,
-    load_crossreference,
     load_clarity_data,
 )
 from scripts.utils.config import get_config
+from scripts.utils.xref_index import load_crossreference_index
 from scripts.utils.filter_log import main as filter_log
 
 # Ignore workbook warnings
@@ -29,21 +29,6 @@ OUT_DIR = SRI_DATA_DIR / "ovr_lists_sambau_infinity" / DATE
 OUT_DIR.mkdir(parents=True, exist_ok=True)
 
 
-# define aux function if empty values in colum clarityid load crossreference
-def id_to_str(s: pd.Series) -> pd.Series:
-    """
-    Normalise identifier columns to a pandas StringDtype:
-    * keep NaN/NA as NA
-    * convert floats/ints to integer-looking strings
-      (150236668.0 → "150236668")
-    * leave existing strings untouched
-    """
-    out = s.astype("string").str.replace(  # <- guarantees StringDtype, keeps NA
-        r"\.0$", "", regex=True
-    )  # drop trailing '.0' if any
-    return out
-
-
 # 1. CONSTANTS
 overrides_mapping = {
     "STR_001_SEC": "str_001_s",
@@ -71,14 +56,9 @@ target_cols_override = [
 ]
 
 # 2. LOAD OVERRIDES
+# loaders emit canonical ids: clarityid / permid as Int64, aladdin_id zero-padded
 overrides_df = load_overrides(OVR_PATH, target_cols=target_cols_override)
 
-
-for col in ("clarityid", "permid"):
-    # convert col to datatype string
-    overrides_df[col] = id_to_str(overrides_df[col])
-    overrides_df[col] = overrides_df[col].replace("", pd.NA)
-
 need_clarityid_only = overrides_df["clarityid"].isna() & overrides_df["permid"].notna()
 need_permid_and_clid = overrides_df["clarityid"].isna() & overrides_df["permid"].isna()
 # ── 2. optional look-ups ───────────────────────────────────────────────────────
@@ -88,29 +68,21 @@ if need_clarityid_only.any() or need_permid_and_clid.any():
         DF_PATH,
         target_cols=["clarityid", "permid"],
     )
-    clarity_df["permid"] = id_to_str(clarity_df["permid"])
-    clarity_df["clarityid"] = id_to_str(clarity_df["clarityid"])
 
     clr_map = (
         clarity_df.dropna(subset=["permid", "clarityid"])
         .drop_duplicates("permid")
         .set_index("permid")["clarityid"]
-    )  # dtype is already String, no floats!
+    )  # dtype is already Int64, no floats!
 
 if need_permid_and_clid.any():
-    xref_df = load_crossreference(CROSSREFERENCE_PATH)[["aladdin_id", "permid"]]
-    xref_df["permid"] = id_to_str(xref_df["permid"])
+    # aladdin_id → permid, first match in the crossreference
+    xref = load_crossreference_index(CROSSREFERENCE_PATH)
 
-    permid_map = (
-        xref_df.dropna(subset=["permid"])
-        .drop_duplicates("aladdin_id")
-        .set_index("aladdin_id")["permid"]
+    overrides_df.loc[need_permid_and_clid, "permid"] = xref.first_permid(
+        overrides_df.loc[need_permid_and_clid, "aladdin_id"]
     )
 
-    overrides_df.loc[need_permid_and_clid, "permid"] = overrides_df.loc[
-        need_permid_and_clid, "aladdin_id"
-    ].map(permid_map)
-
     # second pass: permid → clarityid
     still_missing_clid = (
         overrides_df["clarityid"].isna() & overrides_df["permid"].notna()
@@ -119,9 +91,7 @@ if need_permid_and_clid.any():
         still_missing_clid, "permid"
     ].map(clr_map)
 
-    # ── 3. final normalisation and logging ────────────────────────────────────────
-    overrides_df["clarityid"] = id_to_str(overrides_df["clarityid"])  # <-- safety net
-
+    # ── 3. final logging ──────────────────────────────────────────────────────────
     permids_assigned_to_clarityid = {}
     no_clarityid_no_permid = {}
     no_clarityid = {}
@@ -186,7 +156,8 @@ def main():
         # Create a new DataFrame with the desired columns
         df = pd.DataFrame(
             {
-                "clarityid": group["clarityid"],
+                # keep clarityid as text cells in the uploaded lists
+                "clarityid": group["clarityid"].astype("string"),
                 strategy_name: group["ovr_value"],
             }
         )
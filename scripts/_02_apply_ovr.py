@@ -3,15 +3,18 @@ import warnings
 import argparse
 import os
 from pathlib import Path
+from typing import Union
 
 import pandas as pd
 
 from scripts.utils.dataloaders import (
     load_overrides,
     load_clarity_data,
-    load_crossreference,
+    iter_clarity_chunks,
 )
 from scripts.utils.config import get_config
+from scripts.utils.override_index import OverrideIndex
+from scripts.utils.xref_index import CrossreferenceIndex, load_crossreference_index
 
 import sys
 
@@ -39,49 +42,45 @@ OUT_DIR = paths["DF_WOVR_PATH_DIR"]
 # 2. Define Functions
 def apply_ovr(
     df: pd.DataFrame,
-    overrides_df: pd.DataFrame,
+    overrides_df: Union[pd.DataFrame, OverrideIndex],
     output_suffix: str,
     log_matches: bool = False,
 ) -> Path:
-    grouped_ovr = overrides_df.groupby("ovr_target")
-
-    for ovr_target, group in grouped_ovr:
-        logger.info(f"Overriding values for column: {ovr_target}")
-        unmatched = []
-        permid_matched = []
-
-        for _, row in group.iterrows():
-            aladdin_id = row["aladdin_id"]
-            permid = row["permid"]
-            ovr_value = row["ovr_value"]
-
-            aladdin_id_match = df["aladdin_id"] == aladdin_id
-            permid_match = df["permid"] == permid
-
-            if aladdin_id_match.any():
-                df.loc[aladdin_id_match, ovr_target] = ovr_value
-            elif permid_match.any():
-                permid_matched.append(permid)
-                df.loc[permid_match, ovr_target] = ovr_value
-            else:
-                unmatched.append((aladdin_id, permid))
-
-        if log_matches:
+    """
+    Apply the overrides to df and save it as the "with ovr" datafeed.
+
+    Every override is matched on its aladdin_id if that aladdin_id is in df,
+    on its permid otherwise; the last override of a cell wins.
+    """
+    if isinstance(overrides_df, OverrideIndex):
+        override_index = overrides_df
+    else:
+        override_index = OverrideIndex.from_frame(overrides_df)
+
+    if log_matches:
+        overrides = override_index.overrides
+        levels = pd.Series(override_index.levels(df), index=overrides.index)
+        for ovr_target, group in overrides.groupby(override_index.target_col):
+            group_levels = levels.loc[group.index]
+            permid_matched = group.loc[group_levels == "permid", "permid"].tolist()
+            unmatched = group.loc[group_levels.isna(), ["aladdin_id", "permid"]]
             if permid_matched:
                 logger.info(
                     f"\n{len(permid_matched)} permids found for unmatched aladdin_id entries! for column '{ovr_target}'. Examples (first 5): "
                     + ", ".join(f"permid={pid}" for pid in permid_matched[:5])
                 )
 
-            if unmatched:
+            if not unmatched.empty:
                 logger.warning(
                     f"\n{len(unmatched)} unmatched entries for column '{ovr_target}'. Examples (first 5): "
                     + ", ".join(
                         f"(aladdin_id={aid}, permid={pid})"
-                        for aid, pid in unmatched[:5]
+                        for aid, pid in unmatched.head(5).itertuples(index=False)
                     )
                 )
 
+    override_index.apply(df)
+
     # Save the updated DataFrame
     output_file = OUT_DIR / f"{DATE}_df_{output_suffix}_level_with_ovr.csv"
     df.to_csv(output_file, index=False)
@@ -90,6 +89,57 @@ def apply_ovr(
     return output_file
 
 
+def apply_ovr_streaming(
+    df_path: Path,
+    overrides_df: Union[pd.DataFrame, OverrideIndex],
+    crossreference: CrossreferenceIndex,
+    output_suffix: str,
+    chunksize: int = 200_000,
+) -> Path:
+    """
+    Streaming version of apply_ovr for feeds too big to hold in memory.
+
+    A first pass reads only the permid column to find which override aladdin_ids
+    are present anywhere in the feed, so every override resolves exactly as in
+    apply_ovr (aladdin_id match first, permid match otherwise). The second pass
+    merges the crossreference, applies the overrides and appends each chunk to
+    the output CSV.
+    """
+    if isinstance(overrides_df, OverrideIndex):
+        override_index = overrides_df
+    else:
+        override_index = OverrideIndex.from_frame(overrides_df)
+
+    logger.info("First pass: collecting aladdin_ids present in the feed")
+    feed_aladdin_ids = set()
+    for chunk in iter_clarity_chunks(df_path, columns=["permid"], chunksize=chunksize):
+        feed_aladdin_ids.update(
+            crossreference.first_aladdin_id(chunk["permid"]).dropna()
+        )
+
+    # aladdin_id presence is decided over the whole feed, not per chunk
+    present = {"aladdin_id": pd.Index(list(feed_aladdin_ids))}
+    by_aladdin = override_index.overrides["aladdin_id"].isin(present["aladdin_id"])
+    logger.info(
+        f"{by_aladdin.sum()} overrides match on aladdin_id, "
+        f"{(~by_aladdin).sum()} will be matched on permid"
+    )
+
+    output_file = OUT_DIR / f"{DATE}_df_{output_suffix}_level_with_ovr.csv"
+    header = True
+    logger.info("Second pass: applying overrides chunk by chunk")
+    for chunk in iter_clarity_chunks(df_path, chunksize=chunksize, typed_ids=False):
+        chunk = crossreference.add_aladdin_id(chunk)
+        override_index.apply(chunk, present=present)
+        chunk.to_csv(
+            output_file, index=False, mode="w" if header else "a", header=header
+        )
+        header = False
+
+    logger.info(f"Updated DataFrame saved to {output_file}")
+    return output_file
+
+
 def parse_arguments():
     parser = argparse.ArgumentParser(
         description="Apply overrides to the datafeed at the issuer and/or security level"
@@ -101,6 +151,11 @@ def parse_arguments():
         default=["issuer"],
         help="Specify the datafeed level to apply override: issuer, security, or both",
     )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream the security level datafeed in chunks to keep memory bounded",
+    )
     parser.add_argument(
         "--rmsec",
         action="store_true",
@@ -114,6 +169,12 @@ def parse_arguments():
         nargs="?",
         help="Date in YYYYMM format (positional)",
     )
+    # read by get_config, declared here so parse_args accepts it
+    parser.add_argument(
+        "--read-engine",
+        choices=["c", "pyarrow"],
+        help="CSV read engine for the datafeed / crossreference loaders",
+    )
 
     return parser
 
@@ -148,24 +209,24 @@ def main():
     overrides_df = load_overrides(
         OVR_PATH,
         target_cols=["permid", "aladdin_id", "ovr_target", "ovr_value", "ovr_active"],
+        normalise_states=False,
     )
     if "brs_id" in overrides_df.columns:
         overrides_df.rename(columns={"brs_id": "aladdin_id"}, inplace=True)
-    crossreference = load_crossreference(CROSSREFERENCE_PATH)
-    # remove duplicate and nan permid in crossreference
-    logger.info("Removing duplicates and NaN values from crossreference")
-    crossreference.drop_duplicates(subset=["permid"], inplace=True)
-    crossreference.dropna(subset=["permid"], inplace=True)
+    # one index for both datafeed levels (conflicting overrides are logged here)
+    override_index = OverrideIndex.from_frame(overrides_df)
+    # persisted permid <-> aladdin_id index, first match per permid
+    crossreference = load_crossreference_index(CROSSREFERENCE_PATH)
 
     if "issuer" in args.dfl:
         try:
             logger.info("Applying overrides to issuer data...")
-            issuer_df = load_clarity_data(DF_PATH)
-            # Merge with crossreference to get the aladdin_id
-            issuer_df = issuer_df.merge(
-                crossreference[["permid", "aladdin_id"]], on="permid", how="left"
+            issuer_df = load_clarity_data(
+                DF_PATH, normalise_states=False, typed_ids=False
             )
-            apply_ovr(issuer_df, overrides_df, "issuer", log_matches=True)
+            # Merge with crossreference to get the aladdin_id
+            issuer_df = crossreference.add_aladdin_id(issuer_df)
+            apply_ovr(issuer_df, override_index, "issuer", log_matches=True)
             # We don't store the issuer path since we never need to reference it later
         except Exception as e:
             logger.error(f"Error applying overrides to issuer data: {e}")
@@ -174,12 +235,19 @@ def main():
     if "security" in args.dfl:
         try:
             logger.info("Applying overrides to security data...")
-            security_df = load_clarity_data(DF_SEC_PATH)
-            # Merge with crossreference to get the aladdin_id
-            security_df = security_df.merge(
-                crossreference[["permid", "aladdin_id"]], on="permid", how="left"
-            )
-            output_path_securities = apply_ovr(security_df, overrides_df, "security")
+            if args.stream:
+                output_path_securities = apply_ovr_streaming(
+                    DF_SEC_PATH, override_index, crossreference, "security"
+                )
+            else:
+                security_df = load_clarity_data(
+                    DF_SEC_PATH, normalise_states=False, typed_ids=False
+                )
+                # Merge with crossreference to get the aladdin_id
+                security_df = crossreference.add_aladdin_id(security_df)
+                output_path_securities = apply_ovr(
+                    security_df, override_index, "security"
+                )
             result = output_path_securities  # Only return security path when needed
         except Exception as e:
             logger.error(f"Error applying overrides to issuer data: {e}")
@@ -196,9 +264,9 @@ if __name__ == "__main__":
         from scripts.utils.split_df_by_region import main as split_datafeed
 
         logger.info("Splitting security datafeed by region")
-        split_datafeed(output_path_sec)
-        # if args "--rmdfecurity" true delete datefeed security level
         args = parse_arguments().parse_args()
+        split_datafeed(output_path_sec, stream=args.stream)
+        # if args "--rmdfecurity" true delete datefeed security level
         if (args.rmsec) and ("security" in args.dfl):
             if os.path.exists(output_path_sec):
                 logger.info(f"Removing security datafeed: {output_path_sec}")
@@ -5,24 +5,28 @@ import warnings
 from scripts.utils.dataloaders import (
     load_clarity_data,
     load_aladdin_data,
-    load_crossreference,
     load_portfolios,
     save_excel,
+    WorkbookSession,
 )
 
 # Import the centralized configuration
 from scripts.utils.config import get_config
+from scripts.utils.xref_index import load_crossreference_index
+from scripts.utils.alignment import align_keys
+from scripts.utils.membership_index import MembershipIndex
 
 # import relevant libraries from 00_preovr_analysis
 from scripts.utils.clarity_data_quality_control_functions import (
-    prepare_dataframes,
     generate_delta,
     add_portfolio_benchmark_info_to_df,
     get_issuer_level_df,
     filter_empty_lists,
     filter_rows_with_common_elements,
     reorder_columns,
-    clean_portfolio_and_exclusion_list,
+    clean_portfolio_and_exclusion_lists,
+    render_affected_pairs,
+    render_strategy_lists,
 )
 
 
@@ -103,12 +107,14 @@ def main():
     # 1.    LOAD DATA
 
     # 1.1.  aladdin /brs data / perimeters
-    brs_carteras = load_aladdin_data(BMK_PORTF_STR_PATH, "portfolio_carteras")
-    crossreference = load_crossreference(CROSSREFERENCE_PATH)
-    # remove duplicate and nan permid in crossreference
-    logger.info("Removing duplicates and NaN values from crossreference")
-    crossreference.drop_duplicates(subset=["permid"], inplace=True)
-    crossreference.dropna(subset=["permid"], inplace=True)
+    brs_book = WorkbookSession(
+        BMK_PORTF_STR_PATH,
+        ["portfolio_carteras", "portfolio_benchmarks"],
+        skiprows=3,
+    )
+    brs_carteras = load_aladdin_data(brs_book, "portfolio_carteras")
+    # persisted permid <-> aladdin_id index, first match per permid
+    crossreference = load_crossreference_index(CROSSREFERENCE_PATH)
     # get BRS data at issuer level for becnhmarks without empty aladdin_id
     brs_carteras_issuerlevel = get_issuer_level_df(brs_carteras, "aladdin_id")
 
@@ -118,37 +124,27 @@ def main():
     df.rename(columns=rename_dict, inplace=True)
     # add aladdin_id to df_1 and df
     logger.info("Adding aladdin_id to clarity dfs")
-    df = df.merge(crossreference[["permid", "aladdin_id"]], on="permid", how="left")
+    df = crossreference.add_aladdin_id(df)
 
     # Load portfolios & benchmarks dicts
     (
         portfolio_dict,
         benchmark_dict,
-    ) = load_portfolios(path_pb=BMK_PORTF_STR_PATH, path_committe=COMMITTEE_PATH)
+    ) = load_portfolios(path_pb=brs_book, path_committe=COMMITTEE_PATH)
+    brs_book.close()
+    portfolio_index = MembershipIndex.from_dict(portfolio_dict)
+    benchmark_index = MembershipIndex.from_dict(benchmark_dict)
 
     # 2.    PREP DATA FOR ANALYSIS
-    # make sure that the values of of the columns delta_test_cols are strings and all uppercase and strip
-    for col in delta_test_cols:
-        df[col] = df[col].str.upper().str.strip()
-        brs_carteras_issuerlevel[col] = (
-            brs_carteras_issuerlevel[col].str.upper().str.strip()
-        )
+    # strategy columns are already normalised to the shared STRATEGY_DTYPE at load
 
     # 2.3.  PREPARE DATA BRS LEVEL FOR PORTFOLIOS
-    (
-        brs_df,
-        clarity_df,
-        in_clarity_but_not_in_brs,
-        in_brs_but_not_in_clarity,
-    ) = prepare_dataframes(brs_carteras_issuerlevel, df, target_index="aladdin_id")
+    ptf_alignment = align_keys(brs_carteras_issuerlevel, df, target_index="aladdin_id")
+    brs_df, clarity_df = ptf_alignment.common()
 
     # log size of new and missing issuers
-    logger.info(
-        f"Number issuers in clarity but not Aladdin: {in_clarity_but_not_in_brs.shape[0]}"
-    )
-    logger.info(
-        f"Number issuers in Aladdin but not Clarity: {in_brs_but_not_in_clarity.shape[0]}"
-    )
+    logger.info(f"Number issuers in clarity but not Aladdin: {ptf_alignment.n_new}")
+    logger.info(f"Number issuers in Aladdin but not Clarity: {ptf_alignment.n_missing}")
 
     # START NONCOMPLIANCE ANALYSIS
     # COMPARE DATA
@@ -162,6 +158,7 @@ def main():
         delta_name_str="delta_brs_ptf",
         filter_col="new_exclusion",
         drop_cols=["new_inclusion", "inclusion_list"],
+        as_mask=True,
     )
 
     # 4.    PREP DELTAS BEFORE SAVING
@@ -171,11 +168,13 @@ def main():
     delta_brs.drop(columns=["isin"], inplace=True)
 
     # let's add portfolio info to the delta_df
-    delta_brs = add_portfolio_benchmark_info_to_df(portfolio_dict, delta_brs)
+    delta_brs = add_portfolio_benchmark_info_to_df(
+        portfolio_index, delta_brs, as_mask=True
+    )
 
     # let's add benchmark info to the delta_df
     delta_brs = add_portfolio_benchmark_info_to_df(
-        benchmark_dict, delta_brs, "affected_benchmark_str"
+        benchmark_index, delta_brs, "affected_benchmark_str", as_mask=True
     )
 
     # 5. FILTER & SORT DATA & GET RELEVANT DATA FOR THE ANALYSIS
@@ -208,7 +207,13 @@ def main():
     )
 
     # cleant portfolio and exclusion list
-    delta_brs = delta_brs.apply(clean_portfolio_and_exclusion_list, axis=1)
+    delta_brs = clean_portfolio_and_exclusion_lists(delta_brs)
+
+    # render the bitmasks as lists for the workbook
+    delta_brs = render_affected_pairs(
+        delta_brs, portfolio_index, "affected_portfolio_str"
+    )
+    delta_brs = render_strategy_lists(delta_brs)
 
     # create dict of df and df name
     dfs_dict = {
@@ -6,11 +6,10 @@ from pathlib import Path
 import pandas as pd
 
 
-from scripts.utils.dataloaders import (
-    load_clarity_data,
-    load_crossreference,
-)
+from scripts.utils.dataloaders import load_clarity_data
 from scripts.utils.config import get_config
+from scripts.utils.schema import to_aladdin_id
+from scripts.utils.xref_index import CrossreferenceIndex, load_crossreference_index
 
 
 # Ignore workbook warnings
@@ -82,7 +81,7 @@ def analysis(
     output_file: str,
     datafeed_col: list,
     datafeed: pd.DataFrame,
-    crossreference: pd.DataFrame,
+    crossreference: CrossreferenceIndex,
 ):
     logger.info(f"\n\nGenerating Impact Analysis for {input_file}")
     df = datafeed[datafeed_col].copy()
@@ -94,21 +93,17 @@ def analysis(
 
     portfolio.rename(columns={"Issuer ID": "aladdin_id"}, inplace=True)
     benchmark.rename(columns={"Issuer ID": "aladdin_id"}, inplace=True)
-    # convert aladdin_id to string
-    portfolio["aladdin_id"] = portfolio["aladdin_id"].astype(str)
-    benchmark["aladdin_id"] = benchmark["aladdin_id"].astype(str)
+    # canonical zero-padded aladdin_id, as emitted by load_crossreference
+    portfolio["aladdin_id"] = to_aladdin_id(portfolio["aladdin_id"])
+    benchmark["aladdin_id"] = to_aladdin_id(benchmark["aladdin_id"])
 
     logger.info("Aladdin Workbench file loaded")
 
     # PROCESS DATASETS
     # add permid to portfolio and benchmark from crossreference
     logger.info("adding permid to portfolios and benchmarks")
-    portfolio = pd.merge(
-        portfolio, crossreference[["aladdin_id", "permid"]], how="left", on="aladdin_id"
-    )
-    benchmark = pd.merge(
-        benchmark, crossreference[["aladdin_id", "permid"]], how="left", on="aladdin_id"
-    )
+    portfolio = crossreference.add_permid(portfolio, all_matches=True)
+    benchmark = crossreference.add_permid(benchmark, all_matches=True)
     logger.info("permid added successfully")
 
     # add datafeed columns to portfolio and benchmark with suffixes "_current" and "_new"
@@ -165,7 +160,7 @@ def process_directory(
     output_dir: str,
     datafeed_col: list,
     datafeed: pd.DataFrame,
-    crossreference_file: pd.DataFrame,
+    crossreference_file: CrossreferenceIndex,
 ):
     output_dir = Path(output_dir)
     # Ensure output directory exists
@@ -242,20 +237,12 @@ def main():
     output_base = os.path.join(base_dir, "analysis_output")
 
     logger.info("Loading crossreference")
-    crossreference = load_crossreference(CROSSREFERENCE_PATH)
-    # remove duplicate and nan permid in crossreference
-    logger.info("Removing duplicates and NaN values from crossreference")
-    crossreference.drop_duplicates(subset=["permid"], inplace=True)
-    crossreference.dropna(subset=["permid"], inplace=True)
-    # convert permid and aladdin to string
-    crossreference["permid"] = crossreference["permid"].astype(str)
-    crossreference["aladdin_id"] = crossreference["aladdin_id"].astype(str)
+    # persisted permid <-> aladdin_id index
+    crossreference = load_crossreference_index(CROSSREFERENCE_PATH)
     # LOAD DATASETS & MODIFY COLUMN NAMES
     datafeed = load_clarity_data(datafeed_path, target_cols=datafeed_columns)
     # add aladdin_id to datafeed from crossreference
-    datafeed = datafeed.merge(
-        crossreference[["permid", "aladdin_id"]], on="permid", how="left"
-    )
+    datafeed = crossreference.add_aladdin_id(datafeed)
 
     # Ensure output directories exist
     for dir_name in [
@@ -4,12 +4,14 @@ run_pre_ovr_pipeline.py — Windows / Git-Bash friendly replacement for run_pre_
 
 Usage
 -----
-    python run_pre_ovr_pipeline.py 202411 [simple] [zombie] [only_preovr | no_dups]
+    python run_pre_ovr_pipeline.py 202411 [simple] [zombie] [stream] [no_prefetch] [only_preovr | no_dups]
 
 Flags (optional, case-sensitive)
 --------------------------------
     simple        Produce a simplified override analysis
     zombie        Produce a zombie analysis
+    stream        Deduplicate the security level feed in chunks (bounded memory)
+    no_prefetch   Do not warm the next stage's inputs while a stage runs
     only_preovr   Run ONLY _00_preovr_analysis.py
     no_dups       Skip utils/remove_duplicates.py
 
@@ -21,6 +23,9 @@ Notes
 * If you run this inside an activated virtual-env, `sys.executable`
   automatically points at the right interpreter—no explicit “activate” step
   is necessary.
+* While a stage runs, the inputs of the next stage are warmed on a background
+  thread (OS page cache, Parquet / crossreference / overrides caches, see
+  scripts.utils.prefetch).
 """
 
 import re
@@ -28,11 +33,73 @@ import subprocess
 import sys
 import time
 from pathlib import Path
-from typing import List, Tuple
-
-
-def parse_args(argv: List[str]) -> Tuple[str, List[str], str, str]:
-    """Validate CLI args and return (date, scripts, simple_flag, zombie_flag)."""
+from typing import Dict, List, Tuple
+
+# Make the `scripts` package importable when run as a plain script
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from scripts.utils.config import get_config
+from scripts.utils.prefetch import Prefetcher, prefetch_specs
+
+
+def stage_io(config: dict) -> Dict[str, dict]:
+    """
+    Return the inputs (prefetch specs) and outputs of every stage, keyed by
+    module path, as resolved from get_config() for the run date.
+    """
+    paths = config["paths"]
+    brs_issuer_dir = config["BRS_ISSUER_DATA_DIR_PATH"]
+    brs_issuer_csv = brs_issuer_dir / f"{config['DATE']}_brs_issuer_data.csv"
+    crossreference = {"path": paths["CROSSREFERENCE_PATH"], "kind": "crossreference"}
+    overrides = {"path": paths["OVR_PATH"], "kind": "overrides"}
+    current_df = {"path": paths["CURRENT_DF_WOUTOVR_PATH"], "kind": "clarity"}
+    return {
+        "scripts.utils.remove_duplicates": {
+            "reads": [
+                {"path": paths["CURRENT_DF_WOUTOVR_SEC_PATH"], "kind": "page_cache"}
+            ],
+            "writes": [paths["CURRENT_DF_WOUTOVR_PATH"]],
+        },
+        "scripts.utils.brs_issuer_data_to_csv": {
+            "reads": [
+                {
+                    "path": brs_issuer_dir
+                    / f"{config['DATE']}_snt_world_sntcor_corp_shares.xlsx",
+                    "kind": "page_cache",
+                }
+            ],
+            "writes": [brs_issuer_csv],
+        },
+        "scripts.utils.update_ovr_db_active_col": {
+            "reads": [
+                {"path": brs_issuer_csv, "kind": "page_cache"},
+                current_df,
+                overrides,
+                crossreference,
+            ],
+            "writes": [],
+        },
+        "scripts._00_preovr_analysis": {
+            "reads": [
+                {"path": paths["PRE_DF_WOVR_PATH"], "kind": "clarity"},
+                current_df,
+                crossreference,
+                overrides,
+                {"path": paths["BMK_PORTF_STR_PATH"], "kind": "page_cache"},
+                {"path": paths["COMMITTEE_PATH"], "kind": "page_cache"},
+            ],
+            "writes": [],
+        },
+    }
+
+
+def parse_args(argv: List[str]) -> Tuple[str, List[str], str, str, str, bool]:
+    """
+    Validate CLI args and return
+    (date, scripts, simple_flag, zombie_flag, stream_flag, prefetch).
+    """
     if not argv:
         sys.exit("Please provide a date parameter (format: yyyymm)")
 
@@ -49,16 +116,17 @@ def parse_args(argv: List[str]) -> Tuple[str, List[str], str, str]:
     ]
     simple_flag = ""
     zombie_flag = ""
+    stream_flag = ""
 
     remaining = argv[1:]
-    valid_opts = {"simple", "zombie", "only_preovr", "no_dups"}
+    valid_opts = {"simple", "zombie", "stream", "no_prefetch", "only_preovr", "no_dups"}
 
     for opt in remaining:
         if opt not in valid_opts:
             sys.exit(
                 f"Unknown argument: {opt}\n"
-                "Valid options after the date are: 'simple', 'zombie', "
-                "'only_preovr' or 'no_dups' – but not only_preovr and no_dups "
+                "Valid options after the date are: 'simple', 'zombie', 'stream', "
+                "'no_prefetch', 'only_preovr' or 'no_dups' – but not only_preovr and no_dups "
                 "at the same time"
             )
 
@@ -75,6 +143,14 @@ def parse_args(argv: List[str]) -> Tuple[str, List[str], str, str]:
         print("Zombie parameter provided! Zombie analysis will be generated")
         zombie_flag = "--zombie"
 
+    if "stream" in remaining:
+        print("Stream parameter provided! Raw feed will be deduplicated in chunks")
+        stream_flag = "--stream"
+
+    prefetch = "no_prefetch" not in remaining
+    if not prefetch:
+        print("No prefetch parameter provided! Stage inputs will be read cold")
+
     if "only_preovr" in remaining:
         print("Only pre-override analysis will be generated")
         scripts = ["_00_preovr_analysis.py"]
@@ -86,21 +162,40 @@ def parse_args(argv: List[str]) -> Tuple[str, List[str], str, str]:
             "_00_preovr_analysis.py",
         ]
 
-    return date_arg, scripts, simple_flag, zombie_flag
+    return date_arg, scripts, simple_flag, zombie_flag, stream_flag, prefetch
 
 
 def main() -> None:
     start_time = time.time()
 
-    date_arg, scripts, simple_flag, zombie_flag = parse_args(sys.argv[1:])
+    date_arg, scripts, simple_flag, zombie_flag, stream_flag, prefetch = parse_args(
+        sys.argv[1:]
+    )
 
-    base_dir = Path(__file__).resolve().parent.parent
+    base_dir = BASE_DIR
     print(f"Base directory: {base_dir}")
 
-    for script in scripts:
-        module_path = (
-            f"scripts.{Path(script).with_suffix('').as_posix().replace('/', '.')}"
-        )
+    module_paths = [
+        f"scripts.{Path(script).with_suffix('').as_posix().replace('/', '.')}"
+        for script in scripts
+    ]
+    io = stage_io(get_config("pre_ovr_pipeline", auto_date=False, fixed_date=date_arg))
+    prefetcher = None
+
+    for i, module_path in enumerate(module_paths):
+        if prefetcher is not None:
+            # this stage's inputs were warmed while the previous one ran
+            prefetcher.wait()
+            prefetcher = None
+        if prefetch and i + 1 < len(module_paths):
+            next_module = module_paths[i + 1]
+            prefetcher = Prefetcher(next_module).start(
+                prefetch_specs(
+                    io[next_module]["reads"],
+                    io[module_path]["reads"],
+                    io[module_path]["writes"],
+                )
+            )
         print(f"Running {module_path}")
 
         cmd = [sys.executable, "-m", module_path]
@@ -111,6 +206,9 @@ def main() -> None:
             if zombie_flag:
                 cmd.append(zombie_flag)
 
+        if module_path.endswith("remove_duplicates") and stream_flag:
+            cmd.append(stream_flag)
+
         cmd.extend(["--date", date_arg])
 
         print("Command:", " ".join(cmd))
@@ -0,0 +1,223 @@
+# affectation.py
+"""
+Long issuer -> portfolio -> strategy table of the portfolios hit by a delta.
+
+clean_portfolio_and_exclusion_list used to work row by row (df.apply): re-pair
+the flattened affected_portfolio_str list, keep the pairs whose strategy is in
+the exclusion_list and rebuild both lists. The same information is one
+normalised table, built with vectorised joins:
+
+    row           position of the delta row
+    aladdin_id    issuer
+    portfolio_id  portfolio (or benchmark) holding it
+    strategy      strategy of that portfolio, in the issuer's transition list
+    transition    name of the list (e.g. "exclusion")
+
+The per-row columns are aggregations of the table, and so is the
+portfolio-level view:
+
+>>> table = affectation_table(delta, portfolio_index, STRATEGY_MASK)
+>>> pair_lists(table, len(delta))                       # affected_portfolio_str
+>>> strategy_masks(table, len(delta), STRATEGY_MASK)    # exclusion_list
+>>> portfolios_hit(table)                               # issuers hit per portfolio
+
+Delta columns that already hold lists are expanded the same way
+(pairs_table, strategies_table) and filtered with semi_join.
+"""
+
+import logging
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from .membership_index import MembershipIndex
+from .strategy_mask import MASK_DTYPE, StrategyBitmask, is_mask
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------- #
+# Constants
+# --------------------------------------------------------------------------- #
+
+AFFECTATION_COLUMNS = ["row", "aladdin_id", "portfolio_id", "strategy", "transition"]
+
+
+# --------------------------------------------------------------------------- #
+# Helpers
+# --------------------------------------------------------------------------- #
+
+
+def _as_pairs(value) -> list:
+    """One affected_* cell as (portfolio_id, strategy) pairs (see pair_elements)."""
+    if not isinstance(value, list):
+        raise TypeError("Expected a list as input.")
+    if all(isinstance(item, tuple) for item in value):
+        return value
+    if len(value) % 2 != 0:
+        raise ValueError("The list must have an even number of elements.")
+    return list(zip(value[::2], value[1::2]))
+
+
+def _regroup(values: list, rows: np.ndarray, n_rows: int) -> list:
+    """Per-row lists of *values*, *rows* being sorted positions in [0, n_rows)."""
+    ends = np.cumsum(np.bincount(rows, minlength=n_rows)).tolist()
+    return [values[start:end] for start, end in zip([0] + ends[:-1], ends)]
+
+
+# --------------------------------------------------------------------------- #
+# Public API
+# --------------------------------------------------------------------------- #
+
+
+def affectation_table(
+    delta: pd.DataFrame,
+    index: MembershipIndex,
+    codec: StrategyBitmask,
+    list_col: str = "exclusion_list",
+    transition: str = "exclusion",
+) -> pd.DataFrame:
+    """
+    Join the delta's issuers with their memberships in *index*, keeping the
+    memberships whose strategy is in the row's *list_col* (bitmask or list).
+
+    Returns:
+        pd.DataFrame: AFFECTATION_COLUMNS, ordered by row, then by the
+        membership order of the index.
+    """
+    masks = delta[list_col].to_numpy()
+    if not is_mask(delta[list_col]):
+        masks = codec.encode(delta[list_col])
+    rows, entries = index.expand(delta["aladdin_id"])
+    keep = (index.entry_bits(codec)[entries] & masks[rows]) != 0
+    rows, entries = rows[keep], entries[keep]
+    return pd.DataFrame(
+        {
+            "row": rows,
+            "aladdin_id": delta["aladdin_id"].to_numpy(dtype=object)[rows],
+            "portfolio_id": index.portfolios[index.portfolio_codes[entries]],
+            "strategy": index.strategies[index.strategy_codes[entries]],
+            "transition": transition,
+        },
+        columns=AFFECTATION_COLUMNS,
+    )
+
+
+def pairs_table(affected: pd.Series) -> pd.DataFrame:
+    """
+    (row, portfolio_id, strategy) rows of an affected_* column holding pair
+    lists (or flattened [id, strategy, id, strategy, ...] lists).
+
+    Raises:
+        TypeError: If a cell is not a list.
+        ValueError: If a flattened list has an odd number of elements.
+    """
+    values = affected.tolist()
+    if not set(map(type, values)) <= {list}:
+        values = [_as_pairs(value) for value in values]  # raises the TypeError
+    flat = list(chain.from_iterable(values))
+    item_types = set(map(type, flat))
+    if item_types == {tuple} and set(map(len, flat)) == {2}:
+        n_pairs = np.fromiter(map(len, values), dtype=np.intp, count=len(values))
+        flat = list(chain.from_iterable(flat))
+    elif tuple not in item_types:
+        n_items = np.fromiter(map(len, values), dtype=np.intp, count=len(values))
+        if (n_items % 2).any():
+            raise ValueError("The list must have an even number of elements.")
+        n_pairs = n_items // 2
+    else:
+        # cells mixing pairs and flattened items: pair them one by one
+        values = [_as_pairs(value) for value in values]
+        n_pairs = np.fromiter(map(len, values), dtype=np.intp, count=len(values))
+        flat = list(chain.from_iterable(chain.from_iterable(values)))
+    labels = np.empty(len(flat), dtype=object)
+    labels[:] = flat
+    labels = labels.reshape(-1, 2)
+    return pd.DataFrame(
+        {
+            "row": np.repeat(np.arange(len(values), dtype=np.intp), n_pairs),
+            "portfolio_id": labels[:, 0],
+            "strategy": labels[:, 1],
+        }
+    )
+
+
+def strategies_table(lists: pd.Series) -> pd.DataFrame:
+    """(row, strategy) rows of a column of strategy lists (non-lists are empty)."""
+    values = lists.tolist()
+    if not set(map(type, values)) <= {list}:
+        values = [value if isinstance(value, list) else [] for value in values]
+    rows = np.repeat(np.arange(len(values)), list(map(len, values))).astype(np.intp)
+    return pd.DataFrame(
+        {
+            "row": rows,
+            "strategy": np.array(list(chain.from_iterable(values)), dtype=object),
+        }
+    )
+
+
+def semi_join(left: pd.DataFrame, right: pd.DataFrame) -> np.ndarray:
+    """Boolean array: the (row, strategy) of each row of *left* is in *right*."""
+    codes, strategies = pd.factorize(
+        pd.Index(left["strategy"]).append(pd.Index(right["strategy"]))
+    )
+    # one int64 key per (row, strategy); +1 keeps NaN strategies (code -1) apart
+    keys = pd.concat([left["row"], right["row"]]).to_numpy(dtype=np.int64) * (
+        len(strategies) + 1
+    ) + (codes + 1)
+    return np.isin(keys[: len(left)], keys[len(left) :])
+
+
+def pair_lists(table: pd.DataFrame, n_rows: int) -> list:
+    """Per-row list of (portfolio_id, strategy) pairs of a table sorted by row."""
+    labels = list(zip(table["portfolio_id"].tolist(), table["strategy"].tolist()))
+    return _regroup(labels, table["row"].to_numpy(dtype=np.intp), n_rows)
+
+
+def strategy_lists(table: pd.DataFrame, n_rows: int) -> list:
+    """Per-row list of the strategies of a table sorted by row."""
+    return _regroup(
+        table["strategy"].tolist(), table["row"].to_numpy(dtype=np.intp), n_rows
+    )
+
+
+def strategy_masks(
+    table: pd.DataFrame, n_rows: int, codec: StrategyBitmask
+) -> np.ndarray:
+    """Per-row bitmask of the strategies in the table (0 for rows without any)."""
+    masks = np.zeros(n_rows, dtype=MASK_DTYPE)
+    np.bitwise_or.at(
+        masks, table["row"].to_numpy(dtype=np.intp), codec.bits(table["strategy"])
+    )
+    return masks
+
+
+def portfolios_hit(table: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per (portfolio_id, strategy, transition) of the table, with the
+    number of issuers hit and their aladdin_ids, most hit portfolios first.
+    """
+    if table.empty:
+        return pd.DataFrame(
+            columns=[
+                "portfolio_id",
+                "strategy",
+                "transition",
+                "n_issuers",
+                "aladdin_ids",
+            ]
+        )
+    return (
+        table.groupby(["portfolio_id", "strategy", "transition"], sort=False)[
+            "aladdin_id"
+        ]
+        .agg(n_issuers="nunique", aladdin_ids=lambda ids: sorted(set(ids)))
+        .reset_index()
+        .sort_values(
+            ["n_issuers", "portfolio_id", "strategy"],
+            ascending=[False, True, True],
+            kind="stable",
+        )
+        .reset_index(drop=True)
+    )
@@ -0,0 +1,264 @@
+# alignment.py
+"""
+Keyed alignment of two issuer frames (old / new month, BRS / Clarity).
+
+prepare_dataframes used to set the key as index, intersect / difference the
+two indexes and copy four ``.loc[...]`` slices. Label slicing on a key with
+duplicates returns every duplicate on both sides, so the "aligned" pair no
+longer lined up, and the duplicates were only detected (and _00 exited)
+afterwards. align_keys factorizes the keys of both frames once (one hash
+join) and keeps positional take-indices:
+
+    base_common, new_common  rows of base / new with a common key, paired
+    new_only                 rows of new whose key is not in base
+    missing                  rows of base whose key is not in new
+    duplicates               one row per duplicated key group and side
+
+Frames are only materialised on demand:
+
+>>> alignment = align_keys(old_df, new_df, target_index="permid")
+>>> alignment.duplicates                   # side, key, n_rows
+>>> old_common, new_common = alignment.common()
+>>> alignment.n_new, alignment.n_missing   # counts, without copies
+>>> alignment.new_rows()                   # rows only in new
+"""
+
+import logging
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------- #
+# Constants
+# --------------------------------------------------------------------------- #
+
+SIDES = ("base", "new")
+
+
+# --------------------------------------------------------------------------- #
+# Helpers
+# --------------------------------------------------------------------------- #
+
+
+def _keyed(df: pd.DataFrame, target_index: str, name: str) -> pd.DataFrame:
+    """Return *df* indexed by *target_index* (its current index if not a column)."""
+    if target_index in df.columns:
+        return df.set_index(target_index)
+    logger.warning(
+        f"{name} does not contain a '{target_index}' column. Using current index."
+    )
+    return df
+
+
+def _first_positions(codes: np.ndarray, n_keys: int) -> np.ndarray:
+    """Position of the first row of every key code (-1 if the key is absent)."""
+    first = np.full(n_keys, -1, dtype=np.intp)
+    present, positions = np.unique(codes, return_index=True)
+    first[present] = positions
+    return first
+
+
+def _key_order(keys: pd.Index) -> np.ndarray:
+    """Rank of every unique key in sorted order (insertion order if unorderable)."""
+    try:
+        order = keys.argsort()
+    except TypeError:
+        return np.arange(len(keys))
+    ranks = np.empty(len(keys), dtype=np.intp)
+    ranks[order] = np.arange(len(keys))
+    return ranks
+
+
+def _sorted_by_key(positions: np.ndarray, codes: np.ndarray, ranks: np.ndarray):
+    """*positions* ordered by their key, rows of one key kept together in order."""
+    return positions[np.argsort(ranks[codes[positions]], kind="stable")]
+
+
+# --------------------------------------------------------------------------- #
+# Public API
+# --------------------------------------------------------------------------- #
+
+
+class KeyAlignment:
+    """
+    Positional alignment of a base and a new frame on a shared key.
+
+    Keys duplicated on a side are paired through their first row; every
+    duplicated group is listed in ``duplicates``.
+
+    Attributes:
+        key (str): The key both frames are indexed by.
+        base, new (pd.DataFrame): The frames, indexed by the key.
+        base_common, new_common (np.ndarray): Paired rows with a common key,
+            in base order.
+        new_only (np.ndarray): Rows of new whose key is not in base.
+        missing (np.ndarray): Rows of base whose key is not in new.
+        duplicates (pd.DataFrame): side ("base" / "new"), key and n_rows of
+            every key found on more than one row of a side.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        base: pd.DataFrame,
+        new: pd.DataFrame,
+        base_common: np.ndarray,
+        new_common: np.ndarray,
+        new_only: np.ndarray,
+        missing: np.ndarray,
+        duplicates: pd.DataFrame,
+    ):
+        self.key = key
+        self.base = base
+        self.new = new
+        self.base_common = base_common
+        self.new_common = new_common
+        self.new_only = new_only
+        self.missing = missing
+        self.duplicates = duplicates
+        self._common = {}
+
+    def __repr__(self) -> str:
+        return (
+            f"KeyAlignment({self.key}: {self.n_common} common, {self.n_new} new, "
+            f"{self.n_missing} missing, {len(self.duplicates)} duplicated keys)"
+        )
+
+    @property
+    def n_common(self) -> int:
+        return len(self.base_common)
+
+    @property
+    def n_new(self) -> int:
+        return len(self.new_only)
+
+    @property
+    def n_missing(self) -> int:
+        return len(self.missing)
+
+    def has_duplicates(self, side: str = None) -> bool:
+        """True if a key is duplicated on *side* ("base" / "new"), or on either side."""
+        if side is None:
+            return not self.duplicates.empty
+        if side not in SIDES:
+            raise ValueError(f"Unknown side '{side}', expected one of {SIDES}")
+        return bool((self.duplicates["side"] == side).any())
+
+    def common(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Row-aligned (base, new) frames over the common keys, sharing one index.
+
+        Taken once and cached, so every delta stage compares the same pair.
+        """
+        return self.common_rows("base"), self.common_rows("new")
+
+    def common_rows(self, side: str) -> pd.DataFrame:
+        """
+        One side ("base" / "new") of common(), taken (once) without the other,
+        e.g. when the other side's states are read from a StateTable.
+        """
+        if side not in SIDES:
+            raise ValueError(f"Unknown side '{side}', expected one of {SIDES}")
+        if side not in self._common:
+            if side == "base":
+                self._common[side] = self.base.take(self.base_common)
+            else:
+                self._common[side] = self.new.take(self.new_common)
+        return self._common[side]
+
+    def new_rows(self) -> pd.DataFrame:
+        """Rows of new whose key is not in base."""
+        return self.new.take(self.new_only)
+
+    def missing_rows(self) -> pd.DataFrame:
+        """Rows of base whose key is not in new."""
+        return self.base.take(self.missing)
+
+    def duplicated_rows(self, side: str) -> pd.DataFrame:
+        """Every row of *side* ("base" / "new") whose key is duplicated there."""
+        if side not in SIDES:
+            raise ValueError(f"Unknown side '{side}', expected one of {SIDES}")
+        frame = self.base if side == "base" else self.new
+        keys = self.duplicates.loc[self.duplicates["side"] == side, "key"]
+        return frame[frame.index.isin(keys)]
+
+    def frames(self) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """(base common, new common, new only, missing), as prepare_dataframes."""
+        return (*self.common(), self.new_rows(), self.missing_rows())
+
+
+def align_keys(
+    base_df: pd.DataFrame, new_df: pd.DataFrame, target_index: str = "permid"
+) -> KeyAlignment:
+    """
+    Align *base_df* and *new_df* on *target_index* with one hash join.
+
+    Parameters:
+        base_df (pd.DataFrame): Baseline frame (e.g. last month, or BRS).
+        new_df (pd.DataFrame): Frame compared against it.
+        target_index (str): Key column; if a frame lacks it, its current
+            index is used. NaN is a key like any other.
+
+    Returns:
+        KeyAlignment: Take-indices of the common, new and missing rows and
+        the duplicated key groups.
+    """
+    logger.info(f"Aligning dataframes on {target_index}.")
+    base = _keyed(base_df, target_index, "base_df")
+    new = _keyed(new_df, target_index, "new_df")
+
+    codes, keys = pd.factorize(base.index.append(new.index), use_na_sentinel=False)
+    keys = pd.Index(keys)
+    base_codes, new_codes = codes[: len(base)], codes[len(base) :]
+    base_first = _first_positions(base_codes, len(keys))
+    new_first = _first_positions(new_codes, len(keys))
+
+    # common keys, paired through their first row, in base order
+    base_rows = np.sort(base_first[base_first >= 0])
+    paired = new_first[base_codes[base_rows]]
+    base_common = base_rows[paired >= 0]
+    new_common = paired[paired >= 0]
+
+    ranks = _key_order(keys)
+    new_only = _sorted_by_key(
+        np.flatnonzero(base_first[new_codes] < 0), new_codes, ranks
+    )
+    missing = _sorted_by_key(
+        np.flatnonzero(new_first[base_codes] < 0), base_codes, ranks
+    )
+
+    groups = []
+    sides = zip(SIDES, (base_codes, new_codes), (base_first, new_first))
+    for side, side_codes, first in sides:
+        n_rows = np.bincount(side_codes, minlength=len(keys))
+        duplicated = np.flatnonzero(n_rows > 1)
+        duplicated = duplicated[np.argsort(first[duplicated])]  # order of appearance
+        groups.append(
+            pd.DataFrame(
+                {
+                    "side": side,
+                    "key": keys.take(duplicated),
+                    "n_rows": n_rows[duplicated],
+                }
+            )
+        )
+    duplicates = pd.concat(groups, ignore_index=True)
+
+    alignment = KeyAlignment(
+        target_index,
+        base,
+        new,
+        base_common,
+        new_common,
+        new_only,
+        missing,
+        duplicates,
+    )
+    logger.info(f"Number of common indexes: {alignment.n_common}")
+    if alignment.has_duplicates():
+        logger.warning(f"Duplicated {target_index} groups:\n{duplicates}")
+    return alignment
@@ -1,47 +1,39 @@
 #!/usr/bin/env python
 """
 check_crossreference_csv_vol2.py
-Locate every row in the CSV that is not valid UTF-8 and print it.
+Locate every row in the CSV that is not valid UTF-8 (or holds an NBSP) and
+print it.
 
-• Any \xa0 (NBSP) or other non-UTF-8 byte is detected.
-• Rows are decoded with Latin-1 for display (never fails) and NBSP bytes
-  are replaced by the glyph '□' so you can see exactly where they are.
+• Any \xa0 (NBSP) or other non-UTF-8 byte is detected, with the vectorised
+  byte scan of utils.csv_encoding (one memory-mapped read of the file).
+• NBSP bytes are replaced by the glyph '□' so you can see exactly where they
+  are.
+
+The same check runs inside load_crossreference(validate_encoding=...), so
+this script is only needed to inspect a file by hand.
 """
 
+import sys
 from pathlib import Path
 
+# Ensure the parent directory (which contains utils/) is in sys.path.
+parent_dir = Path(__file__).resolve().parent.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from utils.csv_encoding import read_clean_csv_bytes
+
 # ⇩  Update this path or pass it via sys.argv / argparse if you prefer
 CSV_PATH = r"C:\Users\n740789\Documents\esg-sri-repos\clarity_data_quality_controls\excel_books\aladdin_data\crossreference\Aladdin_Clarity_Issuers_20250601.csv"
 
 
-def bad_rows(path: str, expected_encoding: str = "utf-8"):
-    """
-    Yield (lineno, error, raw_line_bytes) for every line that fails to decode
-    with the expected encoding.
-    """
-    with Path(path).open("rb") as fh:
-        for lineno, raw in enumerate(fh, 1):  # 1-based line numbers
-            try:
-                raw.decode(expected_encoding)
-            except UnicodeDecodeError as err:
-                yield lineno, err, raw
-
-
-def main():
-    found = False
-    for lineno, err, raw in bad_rows(CSV_PATH):
-        found = True
-        # Decode with Latin-1 so we can show the line without further errors
-        # and replace NBSP (\xA0) with a visible square.
-        pretty = (
-            raw.decode("latin-1", errors="replace")
-            .replace("\u00a0", "□")
-            .rstrip("\n\r")
-        )
-        print(f"{lineno}: {pretty}")
-    if not found:
+def main(path: str = CSV_PATH):
+    _, report = read_clean_csv_bytes(path, mode="quarantine")
+    for row in report.itertuples(index=False):
+        print(f"{row.lineno} [{row.issue}]: {row.raw_line}")
+    if report.empty:
         print("✅  No UTF-8 decoding problems detected.")
 
 
 if __name__ == "__main__":
-    main()
+    main(*sys.argv[1:2])
@@ -1,16 +1,25 @@
 #!/usr/bin/env python
 """
 check_crossreference_csv_vol2_save_bad_rows.py
-Scan a CSV for non-UTF-8 lines and write those lines (plus header) to a
-separate CSV.
+Scan a CSV for non-UTF-8 / NBSP lines and write them to a separate CSV
+report (lineno, issue, byte_offset, action, raw_line).
 
-• Keeps the file’s original delimiter and quoting untouched.
+• Uses the vectorised byte scan of utils.csv_encoding (one memory-mapped
+  read of the file), the same check load_crossreference(validate_encoding=...)
+  runs during the real load.
 • Fails fast if the destination already exists (to avoid overwriting).
 • Prints a short summary when done.
 """
 
-from pathlib import Path
 import sys
+from pathlib import Path
+
+# Ensure the parent directory (which contains utils/) is in sys.path.
+parent_dir = Path(__file__).resolve().parent.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from utils.csv_encoding import read_clean_csv_bytes, write_encoding_report
 
 # ---------------------------------------------------------------------------
 # ⇩ Edit these two paths or pass them on the command line (src dest)
@@ -19,8 +28,7 @@ DEST_PATH = r"C:\Users\n740789\Documents\esg-sri-repos\clarity_data_quality_cont
 # ---------------------------------------------------------------------------
 
 
-def save_bad_rows(src: str, dest: str, expected_encoding: str = "utf-8") -> int:
-    src_p = Path(src)
+def save_bad_rows(src: str, dest: str) -> int:
     dest_p = Path(dest)
 
     if dest_p.exists():
@@ -28,22 +36,9 @@ def save_bad_rows(src: str, dest: str, expected_encoding: str = "utf-8") -> int:
             f"{dest_p} already exists – pick another name or delete it."
         )
 
-    bad_count = 0
-    with src_p.open("rb") as fin, dest_p.open(
-        "w", encoding="utf-8", newline=""
-    ) as fout:
-        header_raw = fin.readline()  # keep header
-        fout.write(header_raw.decode("latin-1"))
-
-        for lineno, raw in enumerate(fin, start=2):  # start=2 because header is line 1
-            try:
-                raw.decode(expected_encoding)
-            except UnicodeDecodeError:
-                bad_count += 1
-                # write line exactly as in source, decoding with latin-1 never fails
-                fout.write(raw.decode("latin-1"))
-
-    return bad_count
+    _, report = read_clean_csv_bytes(src, mode="quarantine")
+    write_encoding_report(report, dest_p)
+    return len(report)
 
 
 if __name__ == "__main__":
@@ -9,7 +9,7 @@ Module to define functions & constans to carry Clarity.ai's data quality control
 import inspect
 import logging
 import re
-from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from itertools import chain
 from pathlib import Path
 from typing import List, Tuple, Union, Any, Mapping, Optional
@@ -19,6 +19,22 @@ import numpy as np
 import pandas as pd
 from pandas.api.types import is_scalar
 
+from .affectation import (
+    pair_lists,
+    pairs_table,
+    semi_join,
+    strategies_table,
+    strategy_lists,
+    strategy_masks,
+)
+from .alignment import align_keys
+from .membership_index import MembershipIndex
+from .override_index import OverrideIndex
+from .schema import ID_SCHEMA, to_aladdin_id, to_id_type
+from .state_table import StateSource
+from .strategy_mask import MASK_DTYPE, StrategyBitmask, is_mask
+from .transitions import Transitions, compute_transitions, transition_lists
+
 # Module-level logger
 logger = logging.getLogger(__name__)
 
@@ -40,6 +56,10 @@ delta_test_cols = [
 
 brs_test_cols = ["aladdin_id"] + delta_test_cols
 
+# per-issuer strategy lists, carried as bitmasks over delta_test_cols
+STRATEGY_MASK = StrategyBitmask(delta_test_cols)
+strategy_list_cols = ["exclusion_list", "inclusion_list", "flagged_list"]
+
 
 # DEFINE CDQC FUNCTIONS
 def prepare_dataframes(
@@ -47,32 +67,12 @@ def prepare_dataframes(
 ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
     """
     Prepare DataFrames by setting the index and filtering for common indexes.
-    Logs info about common, new, and missing indexes.
-    """
-    # Set index to 'permid' if it exists, otherwise assume it's already the index.
-    logger.info(f"Setting index to {target_index}.")
-    if target_index in base_df.columns:
-        base_df = base_df.set_index(target_index)
-    else:
-        logger.warning("df1 does not contain a 'permid' column. Using current index.")
-
-    if target_index in new_df.columns:
-        new_df = new_df.set_index(target_index)
-    else:
-        logger.warning("df2 does not contain a 'permid' column. Using current index.")
+    Returns (base common, new common, new only, missing) as copies.
 
-    common_indexes = base_df.index.intersection(new_df.index)
-    new_indexes = new_df.index.difference(base_df.index)
-    missing_indexes = base_df.index.difference(new_df.index)
-
-    logger.info(f"Number of common indexes: {len(common_indexes)}")
-
-    return (
-        base_df.loc[common_indexes],
-        new_df.loc[common_indexes],
-        new_df.loc[new_indexes],
-        base_df.loc[missing_indexes],
-    )
+    Thin wrapper over align_keys, kept for callers that want the four frames;
+    use the KeyAlignment itself to share one alignment and skip the copies.
+    """
+    return align_keys(base_df, new_df, target_index).frames()
 
 
 def finalize_delta(
@@ -80,12 +80,21 @@ def finalize_delta(
     test_col: List[str] = delta_test_cols,
     target_index: str = "permid",
 ) -> pd.DataFrame:
-    """Finalize the delta DataFrame by removing unchanged rows and resetting the index."""
+    """
+    Finalize the delta DataFrame by removing unchanged rows and resetting the index.
+
+    The target_index column keeps the canonical type of its identifier (Int64
+    permids, padded aladdin_ids; see scripts.utils.schema) so the delta joins
+    the lookup sources of process_data_by_strategy; other keys become str.
+    """
     delta = delta.dropna(subset=test_col, how="all")
     # Make a copy to avoid SettingWithCopyWarning
     delta = delta.copy()
     delta.reset_index(inplace=True)
-    delta.loc[:, target_index] = delta[target_index].astype(str)
+    if target_index in ID_SCHEMA:
+        delta[target_index] = to_id_type(delta[target_index])
+    else:
+        delta[target_index] = delta[target_index].astype(str)
     logger.info(f"Final delta shape: {delta.shape}")
     return delta
 
@@ -144,8 +153,31 @@ def filter_and_drop(
         raise
 
 
+def condition_transitions(
+    df1: pd.DataFrame,
+    df2: pd.DataFrame,
+    test_col: List[str],
+    condition_list: List[str],
+) -> Tuple[List[str], np.ndarray]:
+    """
+    Detect, for every row and column, a transition into *condition_list*: the
+    value in *df1* is not in the conditions and the value in *df2* is.
+
+    Both frames must be row-aligned (same index, same order), as returned by
+    prepare_dataframes; rows are compared by position.
+
+    Returns:
+        Tuple[List[str], np.ndarray]: The columns of *test_col* present in both
+        frames and the (rows x columns) boolean transition matrix.
+    """
+    transitions = compute_transitions(df1, df2, test_col)
+    return transitions.cols, transitions.into(condition_list)
+
+
 def generate_delta(
-    df1: pd.DataFrame,  # old_df that you get from othe function prepare_dataframes
+    df1: Optional[
+        pd.DataFrame
+    ],  # old_df from prepare_dataframes; unused with transitions
     df2: pd.DataFrame,  # new_df that you get from othe function prepare_dataframes
     test_col: List[str] = delta_test_cols,
     condition_list: List[str] = [],  # either ["EXCLUDED"] or ["OK", "FLAG"]
@@ -155,6 +187,8 @@ def generate_delta(
     target_index: str = "permid",  # index to be used for the DataFrame
     filter_col: str = "",
     drop_cols: List[str] = [],  # columns to be dropped after filtering
+    transitions: Transitions = None,  # compute_transitions(df1, df2, ...) if shared
+    as_mask: bool = False,  # store the list column as a STRATEGY_MASK bitmask
 ) -> pd.DataFrame:
     """
     Generate a delta DataFrame highlighting differences between two input DataFrames,
@@ -168,7 +202,8 @@ def generate_delta(
     3. Appends a column listing all columns where such condition-based transitions occurred.
 
     Parameters:
-        df1 (pd.DataFrame): The original DataFrame used as a baseline for comparison. These dataframes are the output of the function prepare_dataframes()
+        df1 (pd.DataFrame | None): The original DataFrame used as a baseline for comparison. These dataframes are the output of the function prepare_dataframes()
+            Only read when *transitions* is not given, so it may be None then (e.g. with StateTable.transitions).
         df2 (pd.DataFrame): The new DataFrame to compare against the baseline. These dataframes are the output of the function prepare_dataframes()
         test_col (List[str]): List of column names to be tested for changes and condition transitions.
         suffix_level (str): A suffix appended to the generated list column name for disambiguation (e.g., "_brs").
@@ -177,6 +212,11 @@ def generate_delta(
         delta_analysis_str (str): String label used to name the analysis, such as "exclusion" or "inclusion".
         get_inc_excl (bool): Flag indicating whether to perform condition-based transition analysis.
             If False, only the delta comparison is returned.
+        transitions (Transitions, optional): compute_transitions(df1, df2, test_col)
+            or StateTable.transitions, to share one comparison of the pair between
+            several calls (exclusion, inclusion, flag). Computed here if not given.
+        as_mask (bool): If True, the list column holds STRATEGY_MASK bitmasks
+            instead of lists of column names (see render_strategy_lists).
 
     Returns:
         pd.DataFrame: A modified copy of `df2` where unchanged values are replaced with NaN in specified columns,
@@ -187,14 +227,20 @@ def generate_delta(
     """
 
     # Step 1: Compare DataFrames and create a delta DataFrame
+    if transitions is None:
+        if df1 is None:
+            raise ValueError("df1 is required when transitions are not given")
+        transitions = compute_transitions(df1, df2, test_col)
+    elif not transitions.index.equals(df2.index):
+        raise ValueError("transitions were not computed for df2")
+    positions = [j for j, col in enumerate(transitions.cols) if col in test_col]
+    cols = [transitions.cols[j] for j in positions]
+    changed = transitions.changed[:, positions]
     delta = df2.copy()
-    for col in test_col:
-        if col in df1.columns and col in df2.columns:
-            logger.info(f"Comparing column: {col}")
-            # Create a mask for differences between the two DataFrames
-            diff_mask = df1[col] != df2[col]
-            # Update the delta DataFrame with the differences
-            delta.loc[~diff_mask, col] = np.nan
+    for j, col in enumerate(cols):
+        logger.info(f"Comparing column: {col}")
+        # keep only the values that differ between the two DataFrames
+        delta[col] = delta[col].where(changed[:, j])
 
     # Return early if inclusion/exclusion analysis is not required
     if not get_inc_excl:
@@ -210,41 +256,22 @@ def generate_delta(
 
     delta_column_name = f"new_{delta_analysis_str}"
     logger.info(f"Checking for new {delta_analysis_str}")
-    delta[delta_column_name] = False
-
-    # Normalize condition list once
-    normalized_conditions = [cond.strip().upper() for cond in condition_list]
-
-    for col in test_col:
-        if col in df1.columns and col in df2.columns:
-            logger.info(f"Checking for new {delta_analysis_str} in column: {col}")
-            mask = (
-                ~df1[col]
-                .astype(str)
-                .str.strip()
-                .str.upper()
-                .isin(normalized_conditions)
-            ) & (
-                df2[col].astype(str).str.strip().str.upper().isin(normalized_conditions)
-            )
-            delta.loc[mask, delta_column_name] = True
-            logger.info(f"Number of new {delta_analysis_str}s in {col}: {mask.sum()}")
-
-    # Auxiliary function to get the list of changed columns
-    def get_delta_list(row: pd.Series) -> List[str]:
-        """Get list of columns that changed to value in the condition_list."""
-        return [
-            col
-            for col in test_col
-            if col in df1.columns
-            and col in df2.columns
-            and str(df2.loc[row.name, col]).strip().upper() in normalized_conditions
-            and str(df1.loc[row.name, col]).strip().upper() not in normalized_conditions
-        ]
 
-    delta[f"{delta_analysis_str}_list"] = delta.apply(
-        lambda row: get_delta_list(row), axis=1
-    )
+    # one (rows x columns) matrix of transitions into the condition list
+    new_states = transitions.into(condition_list)[:, positions]
+    for col, n_new in zip(cols, new_states.sum(axis=0)):
+        logger.info(f"Number of new {delta_analysis_str}s in {col}: {n_new}")
+    delta[delta_column_name] = new_states.any(axis=1)
+
+    # list (or bitmask) of the columns that changed to a value in the condition_list
+    if as_mask:
+        delta[f"{delta_analysis_str}_list"] = STRATEGY_MASK.from_matrix(
+            cols, new_states
+        )
+    else:
+        delta[f"{delta_analysis_str}_list"] = pd.Series(
+            transition_lists(cols, new_states), index=delta.index, dtype=object
+        )
 
     final_df = finalize_delta(delta, test_col, target_index)
 
@@ -263,49 +290,77 @@ def create_override_dict(
     """
     Converts the overrides DataFrame to a dictionary.
     Args:
-        df (pd.DataFrame): DataFrame containing the overrides.
+        df (pd.DataFrame | OverrideIndex): DataFrame containing the overrides,
+            or an OverrideIndex built once from it.
         id_col (str): Column name for the identifier.
         str_col (str): Column name for the strategy.
         ovr_col (str): Column name for the override value.
     Returns:
-        dict: Dictionary of overrides.
+        dict: Dictionary of overrides, {id: {strategy: override value}}; the
+        last override of an (id, strategy) wins.
     """
-    # 1. Groupd the df by issuer_id
-    grouped = df.groupby(id_col)
-
-    # 2. Initialise the dictionary
-    ovr_dict = {}
-
-    # 3. Iterate over each group (issuer id and its corresponding rows)
-    for id, group_data in grouped:
-        # 3.1. for each issuer id create a dict pairing the strategy and the override value
-        ovr_result = dict(zip(group_data[str_col], group_data[ovr_col]))
-        # 3.2. add the dict to the main dict
-        ovr_dict[id] = ovr_result
-
-    return ovr_dict
+    if isinstance(df, OverrideIndex):
+        return df.to_dict(id_col)
+    return OverrideIndex.from_frame(
+        df, key_cols=[id_col], target_col=str_col, value_col=ovr_col
+    ).to_dict(id_col)
 
 
 def add_portfolio_benchmark_info_to_df(
-    portfolio_dict, delta_df, column_name="affected_portfolio_str"
+    portfolio_dict, delta_df, column_name="affected_portfolio_str", as_mask=False
 ):
+    """
+    Add to delta_df the portfolios (or benchmarks) holding each aladdin_id.
 
-    # Initialize a defaultdict to accumulate (portfolio_id, strategy_name) pairs
-    aladdin_to_info = defaultdict(list)
+    Parameters:
+        portfolio_dict (dict | MembershipIndex): portfolio_dict / benchmark_dict
+            from load_portfolios, or a MembershipIndex built once from it
+            (preferred when the function is called for several deltas).
+        delta_df (pd.DataFrame): Delta with an 'aladdin_id' column.
+        column_name (str): Name of the added column.
+        as_mask (bool): If True, the column holds the STRATEGY_MASK bitmask of
+            the strategies of those portfolios (see render_affected_pairs);
+            otherwise the list of (portfolio_id, strategy) pairs.
 
-    for portfolio_id, data in portfolio_dict.items():
-        strategy = data.get("strategy_name")
-        for a_id in data.get("aladdin_id", []):
-            aladdin_to_info[a_id].append((portfolio_id, strategy))
+    Returns:
+        pd.DataFrame: delta_df with column_name added.
+    """
+    if isinstance(portfolio_dict, MembershipIndex):
+        index = portfolio_dict
+    else:
+        index = MembershipIndex.from_dict(portfolio_dict)
 
-    # Map each aladdin_id in delta_df to a list of accumulated portfolio info
-    delta_df[column_name] = delta_df["aladdin_id"].apply(
-        lambda x: list(chain.from_iterable(aladdin_to_info.get(x, [])))
-    )
+    if as_mask:
+        delta_df[column_name] = index.strategy_masks(
+            delta_df["aladdin_id"], STRATEGY_MASK
+        )
+    else:
+        delta_df[column_name] = pd.Series(
+            index.pairs(delta_df["aladdin_id"]), index=delta_df.index, dtype=object
+        )
 
     return delta_df
 
 
+def render_affected_pairs(
+    df: pd.DataFrame, index: MembershipIndex, column_name: str
+) -> pd.DataFrame:
+    """
+    Replace the STRATEGY_MASK bitmask column *column_name* (see
+    add_portfolio_benchmark_info_to_df) by the (portfolio_id, strategy) pairs
+    of *index* whose strategy is in the mask, before *df* is written.
+    """
+    if column_name not in df.columns or not is_mask(df[column_name]):
+        return df
+    df = df.copy()
+    df[column_name] = pd.Series(
+        index.pairs(df["aladdin_id"], masks=df[column_name], codec=STRATEGY_MASK),
+        index=df.index,
+        dtype=object,
+    )
+    return df
+
+
 def get_issuer_level_df(df: pd.DataFrame, idx_name: str) -> pd.DataFrame:
     """
     Removes duplicates based on idx_name, and drops rows where idx_name column contains
@@ -333,6 +388,114 @@ def get_issuer_level_df(df: pd.DataFrame, idx_name: str) -> pd.DataFrame:
     return df_cleaned[valid_rows]
 
 
+def _non_empty(series: pd.Series) -> pd.Series:
+    """Boolean Series: the list (or STRATEGY_MASK bitmask) of the row is not empty."""
+    if is_mask(series):
+        return series != 0
+    return series.apply(lambda x: isinstance(x, list) and len(x) > 0)
+
+
+def _overridden_pairs(
+    df: pd.DataFrame,
+    values: set,
+    override_index: OverrideIndex = None,
+    key_col: str = "aladdin_id",
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (row position, strategy) of every override of *df* to one of *values*.
+
+    The overrides are joined on *key_col* from *override_index* if given
+    (the last override of a key and strategy wins, as in create_override_dict),
+    otherwise flattened from the per-row 'ovr_list' dicts.
+    """
+    if override_index is not None:
+        table = override_index.pairs(key_col)
+        table = table[table["value"].isin(values)]
+        # hash the few override keys, not the frame's
+        key_index = pd.Index(table["_key"].unique())
+        positions = key_index.get_indexer(df[key_col].to_numpy(dtype=object))
+        hit = np.flatnonzero(positions >= 0)
+        pairs = pd.DataFrame({"_code": positions[hit], "_row": hit}).merge(
+            pd.DataFrame(
+                {
+                    "_code": key_index.get_indexer(table["_key"]),
+                    "_strategy": table["_strategy"].to_numpy(dtype=object),
+                }
+            ),
+            on="_code",
+        )
+        return pairs["_row"].to_numpy(), pairs["_strategy"].to_numpy(dtype=object)
+
+    if "ovr_list" not in df.columns:
+        return np.array([], dtype=np.intp), np.array([], dtype=object)
+    dicts = [ovr if isinstance(ovr, dict) else {} for ovr in df["ovr_list"]]
+    rows = np.repeat(np.arange(len(dicts)), list(map(len, dicts)))
+    strategies = np.array(
+        list(chain.from_iterable(ovr.keys() for ovr in dicts)), dtype=object
+    )
+    ovr_values = pd.Series(
+        list(chain.from_iterable(ovr.values() for ovr in dicts)), dtype=object
+    )
+    selected = ovr_values.isin(values).to_numpy()
+    return rows[selected], strategies[selected]
+
+
+def _override_mask(
+    df: pd.DataFrame, values: set, override_index: OverrideIndex = None
+) -> np.ndarray:
+    """STRATEGY_MASK of the strategies overridden to one of *values*, per row."""
+    rows, strategies = _overridden_pairs(df, values, override_index)
+    masks = np.zeros(len(df), dtype=MASK_DTYPE)
+    np.bitwise_or.at(masks, rows, STRATEGY_MASK.bits(strategies))
+    return masks
+
+
+def _drop_overridden(
+    lists: pd.Series, rows: np.ndarray, strategies: np.ndarray
+) -> List[list]:
+    """
+    *lists* without the items overridden in their row: the (row, item) pairs
+    of the rows with overrides are matched against the (rows, strategies)
+    pairs in one vectorised isin. Values that are not list-likes become [].
+    """
+    values = lists.tolist()
+    if not set(map(type, values)) <= {list}:
+        values = [
+            list(items) if isinstance(items, (list, tuple, np.ndarray)) else []
+            for items in values
+        ]
+    affected = np.unique(rows)
+    affected_lists = [values[row] for row in affected.tolist()]
+    items = list(chain.from_iterable(affected_lists))
+    if not items:
+        return values
+
+    # (row, item) pairs of the affected rows, rows numbered 0..len(affected)
+    item_rows = np.repeat(np.arange(len(affected)), list(map(len, affected_lists)))
+    codes, uniques = pd.factorize(
+        pd.Index(items, dtype=object).append(pd.Index(strategies, dtype=object))
+    )
+    item_codes, strategy_codes = codes[: len(items)], codes[len(items) :]
+    # one int64 key per (row, strategy) pair
+    n_codes = len(uniques) + 1
+    keep = ~np.isin(
+        item_rows.astype(np.int64) * n_codes + item_codes,
+        np.searchsorted(affected, rows).astype(np.int64) * n_codes + strategy_codes,
+    )
+    kept = np.flatnonzero(keep).tolist()
+    ends = np.cumsum(np.bincount(item_rows[keep], minlength=len(affected))).tolist()
+    for row, start, end in zip(affected.tolist(), [0] + ends[:-1], ends):
+        values[row] = [items[j] for j in kept[start:end]]
+    return values
+
+
+def render_strategy_lists(
+    df: pd.DataFrame, columns: List[str] = strategy_list_cols
+) -> pd.DataFrame:
+    """Decode the STRATEGY_MASK bitmask columns of *df* to lists, before writing it."""
+    return STRATEGY_MASK.render(df, columns)
+
+
 def filter_empty_lists(df: pd.DataFrame, column: str) -> pd.DataFrame:
     """
     Returns a DataFrame filtered so that rows where the specified column contains
@@ -340,44 +503,43 @@ def filter_empty_lists(df: pd.DataFrame, column: str) -> pd.DataFrame:
 
     Parameters:
     - df (pd.DataFrame): The input DataFrame
-    - column (str): The name of the column to check
+    - column (str): The name of the column to check. It may hold lists or
+      STRATEGY_MASK bitmasks (then the check is a vectorised ``mask != 0``).
 
     Returns:
     - pd.DataFrame: Filtered DataFrame
     """
-    return df[df[column].apply(lambda x: isinstance(x, list) and len(x) > 0)]
+    return df[_non_empty(df[column])]
+
+
+def _strategy_masks(series: pd.Series) -> np.ndarray:
+    """STRATEGY_MASK bitmask per row of a list, (id, strategy) pairs or bitmask column."""
+    if is_mask(series):
+        return series.to_numpy()
+    return STRATEGY_MASK.encode(series)
 
 
 def filter_rows_with_common_elements(df, col1, col2):
     """
-    Return rows of df where the lists in col1 and col2 have at least one common element.
+    Return rows of df where col1 and col2 have at least one strategy in common.
+
+    Both columns are reduced to STRATEGY_MASK bitmasks (lists are exploded
+    once into (row, strategy) items, (id, strategy) pairs count as their
+    strategy and portfolio / benchmark ids are ignored), so the overlap is a
+    single vectorised ``col1 & col2 != 0``.
 
     Parameters:
         df (pd.DataFrame): The input DataFrame.
-        col1 (str): The name of the first column containing lists.
-        col2 (str): The name of the second column containing lists.
+        col1 (str): The name of the first column: lists of strategies (e.g.
+            exclusion_list) or their STRATEGY_MASK bitmasks.
+        col2 (str): The name of the second column: the (id, strategy) pairs of
+            add_portfolio_benchmark_info_to_df, or their bitmasks.
 
     Returns:
         pd.DataFrame: A DataFrame filtered to include only rows where col1 and col2 have a common element.
     """
-
-    # if col2 = "affected_benchmark_str" flatten list first
-    def flatten_mixed_list(val):
-        if isinstance(val, list):
-            flat = []
-            for item in val:
-                if isinstance(item, list):
-                    flat.extend(item)
-                else:
-                    flat.append(item)
-            return flat
-        return val
-
-    if col2 == "affected_benchmark_str":
-        df.loc[:, col2] = df[col2].apply(flatten_mixed_list)
-
     logger.info(f"Filtering rows with common elements in columns: {col1} and {col2}")
-    mask = df.apply(lambda row: bool(set(row[col1]) & set(row[col2])), axis=1)
+    mask = (_strategy_masks(df[col1]) & _strategy_masks(df[col2])) != 0
     return df[mask].copy()
 
 
@@ -467,118 +629,116 @@ def reorder_columns(
 
 
 # CLEANING FUNCTIONS
-def clean_inclusion_list(df):
+def clean_inclusion_list(df, override_index: OverrideIndex = None):
     """
     Processes each row of df:
     1. For each element in 'inclusion_list', if the element is a key in 'ovr_list' and
        its value is 'EXCLUDED', remove the element.
     2. Rows where 'inclusion_list' is empty (or becomes empty after filtering) are dropped.
-    """
+    If 'inclusion_list' holds STRATEGY_MASK bitmasks, step 1 is a bitwise AND NOT.
 
-    def process_row(row):
-        inc_list = row.get("inclusion_list", [])
-        ovr_list = row.get("ovr_list", {})
-
-        # If inc_list is a NumPy array, convert it to a list.
-        if isinstance(inc_list, np.ndarray):
-            inc_list = inc_list.tolist()
-
-        # If inc_list is not a list (or array), then treat it as empty.
-        if not isinstance(inc_list, list):
-            return []
-
-        # For ovr_list: if it's not a dict, then treat it as an empty dict.
-        if not isinstance(ovr_list, dict):
-            ovr_list = {}
-
-        # Filter out items that are in ovr_list and marked as 'EXCLUDED'
-        return [
-            item
-            for item in inc_list
-            if item not in ovr_list or ovr_list[item] != "EXCLUDED"
-        ]
-
-    # Apply the row-wise processing.
-    df.loc[:, "inclusion_list"] = df.apply(process_row, axis=1)
+    The overrides come from *override_index* (joined on aladdin_id) if given,
+    otherwise from the 'ovr_list' column; step 1 is a single join of the
+    (row, strategy) items against the overridden (row, strategy) pairs.
+    """
+    if is_mask(df["inclusion_list"]):
+        excluded = _override_mask(df, {"EXCLUDED"}, override_index)
+        df.loc[:, "inclusion_list"] = df["inclusion_list"].to_numpy() & ~excluded
+        return df[df["inclusion_list"] != 0]
+
+    rows, strategies = _overridden_pairs(df, {"EXCLUDED"}, override_index)
+    df.loc[:, "inclusion_list"] = pd.Series(
+        _drop_overridden(df["inclusion_list"], rows, strategies),
+        index=df.index,
+        dtype=object,
+    )
 
     # Drop rows where 'inclusion_list' is empty.
-    df = df[df["inclusion_list"].apply(lambda x: isinstance(x, list) and len(x) > 0)]
-
-    return df
-
-
-def clean_exclusion_list_with_ovr(df, exclusion_list_col: str = "exclusion_list"):
-    # Define helper function with safety check
-    def filter_exclusions(row):
-        ovr_dict = row["ovr_list"] if isinstance(row["ovr_list"], dict) else {}
-        return [
-            code
-            for code in row[exclusion_list_col]
-            if ovr_dict.get(code) not in {"OK", "FLAG"}
-        ]
-
-    # Apply filtering safely
-    df[exclusion_list_col] = df.apply(filter_exclusions, axis=1)
-
-    return df
+    return df[_non_empty(df["inclusion_list"])]
 
 
-def clean_portfolio_and_exclusion_list(
-    row,
-    affected_col_name="affected_portfolio_str",
-    exclusion_list_name="exclusion_list",
+def clean_exclusion_list_with_ovr(
+    df,
+    exclusion_list_col: str = "exclusion_list",
+    override_index: OverrideIndex = None,
 ):
     """
-    First pairs elements in 'affected_portfolio_str' and filters them based
-    on 'exclusion_list'. Then cleans 'exclusion_list' based on the
-    filtered results.
+    Remove from *exclusion_list_col* the strategies overridden to OK / FLAG.
+
+    The overrides come from *override_index* (joined on aladdin_id) if given,
+    otherwise from the 'ovr_list' column. Bitmasks are cleaned with one
+    bitwise AND NOT, lists with one join of their (row, strategy) items.
     """
+    if is_mask(df[exclusion_list_col]):
+        overridden = _override_mask(df, {"OK", "FLAG"}, override_index)
+        df[exclusion_list_col] = df[exclusion_list_col].to_numpy() & ~overridden
+        return df
 
-    def pair_elements(input_list):
-        """
-        Pairs consecutive elements in a list into tuples.
-        Parameters: -> input_list : list
-        -----------
-        Returns: -> list_of_tuples : list. A list where consecutive elements are paired as tuples.
-        --------
-        Raises TypeError: If the input is not a list and ValueError: If the list does not have an even number of elements.
-        """
-        if not isinstance(input_list, list):
-            raise TypeError("Expected a list as input.")
-        if len(input_list) % 2 != 0:
-            raise ValueError("The list must have an even number of elements.")
-
-        return [
-            (input_list[i], input_list[i + 1]) for i in range(0, len(input_list), 2)
-        ]
+    rows, strategies = _overridden_pairs(df, {"OK", "FLAG"}, override_index)
+    df[exclusion_list_col] = pd.Series(
+        _drop_overridden(df[exclusion_list_col], rows, strategies),
+        index=df.index,
+        dtype=object,
+    )
 
-    raw_list = row[affected_col_name]
-    exclusion_list = row[exclusion_list_name]
+    return df
 
-    # Pair elements first
-    paired = pair_elements(raw_list)
 
-    # Filter tuples based on exclusion list
-    cleaned_paired = [tup for tup in paired if tup[1] in exclusion_list]
+def clean_portfolio_and_exclusion_lists(
+    df: pd.DataFrame,
+    affected_col_name: str = "affected_portfolio_str",
+    exclusion_list_name: str = "exclusion_list",
+) -> pd.DataFrame:
+    """
+    Keep the affected (portfolio_id, strategy) pairs whose strategy is in
+    the exclusion list, and the exclusion list strategies with a kept pair.
 
-    # Update affected_portfolio_str
-    row[affected_col_name] = cleaned_paired
+    The affected column holds pair lists (or flattened [id, strategy, ...]
+    lists), or a STRATEGY_MASK bitmask; the exclusion list, lists or a
+    bitmask. Bitmasks on both sides are two bitwise ANDs and stay bitmasks
+    (see render_affected_pairs). Otherwise both columns are expanded into
+    long (row, portfolio_id, strategy) / (row, strategy) tables and filtered
+    with semi-joins (see affectation), with no per-row Python work.
 
-    # Extract strategies from the cleaned paired tuples
-    affected_strategies = {strategy for _, strategy in cleaned_paired}
+    Raises:
+        TypeError: If an affected cell is not a list (and not a bitmask).
+        ValueError: If a flattened affected list has an odd number of elements.
+    """
+    df = df.copy()
+    if is_mask(df[exclusion_list_name]) and is_mask(df[affected_col_name]):
+        common = df[exclusion_list_name].to_numpy() & df[affected_col_name].to_numpy()
+        df[exclusion_list_name] = common
+        df[affected_col_name] = common
+        return df
 
-    # Update exclusion_list
-    row[exclusion_list_name] = [
-        strategy for strategy in exclusion_list if strategy in affected_strategies
-    ]
+    pairs = pairs_table(df[affected_col_name])
+    if is_mask(df[exclusion_list_name]):
+        masks = df[exclusion_list_name].to_numpy(dtype=MASK_DTYPE)
+        kept = pairs[
+            (STRATEGY_MASK.bits(pairs["strategy"]) & masks[pairs["row"].to_numpy()])
+            != 0
+        ]
+        exclusion = strategy_masks(kept, len(df), STRATEGY_MASK)
+    else:
+        strategies = strategies_table(df[exclusion_list_name])
+        kept = pairs[semi_join(pairs, strategies)]
+        exclusion = pd.Series(
+            strategy_lists(strategies[semi_join(strategies, kept)], len(df)),
+            index=df.index,
+            dtype=object,
+        )
 
-    return row
+    df[affected_col_name] = pd.Series(
+        pair_lists(kept, len(df)), index=df.index, dtype=object
+    )
+    df[exclusion_list_name] = exclusion
+    return df
 
 
 def clean_empty_exclusion_rows(df, target_col: str = "exclusion_list"):
 
-    # Drop rows where exclusion_list is empty after cleaning
-    return df[df[target_col].apply(lambda x: isinstance(x, list) and len(x) > 0)]
+    # Drop rows where exclusion_list is empty after cleaning (mask != 0 for bitmasks)
+    return df[_non_empty(df[target_col])]
 
 
 # DEFINE FUNCTIONS TO CREATE STRATEGY-LEVEL DATAFRAMES & CLEAN THEM
@@ -609,15 +769,120 @@ def remove_matching_rows(
     return df_filtered, True
 
 
+# Helpers of process_data_by_strategy
+def _melt_delta_by_strategy(
+    input_delta_df: pd.DataFrame,
+    strategies_list: List[str],
+    exclusion_col: str,
+    columns: List[str],
+) -> pd.DataFrame:
+    """
+    One row per (row of input_delta_df, strategy of its exclusion column), with
+    *columns* (pd.NA if missing) and the strategy in '_strategy'. Rows keep the
+    delta's order within each strategy.
+    """
+    rows = input_delta_df.reindex(columns=columns, fill_value=pd.NA).reset_index(
+        drop=True
+    )
+    if exclusion_col not in input_delta_df.columns:
+        return rows.iloc[:0].assign(_strategy=pd.Series(dtype=object))
+
+    values = input_delta_df[exclusion_col]
+    if is_mask(values):
+        known = [s for s in strategies_list if s in STRATEGY_MASK.cols]
+        positions = {
+            s: np.flatnonzero(STRATEGY_MASK.contains(values, s)) for s in known
+        }
+    else:
+        exploded = pd.Series(values.to_numpy(), dtype=object).explode()
+        positions = {
+            s: np.unique(exploded.index[(exploded == s).to_numpy()])
+            for s in strategies_list
+        }
+    parts = [rows.iloc[rows_s].assign(_strategy=s) for s, rows_s in positions.items()]
+    if not parts:
+        return rows.iloc[:0].assign(_strategy=pd.Series(dtype=object))
+    return pd.concat(parts)
+
+
+def _melt_lookup(
+    source: Union[pd.DataFrame, StateSource],
+    key_col: str,
+    keys: list,
+    strategies_list: List[str],
+) -> pd.DataFrame:
+    """
+    (_key, _strategy, value) rows of the strategy columns of *source* for
+    *keys*. The key is the index of *source* if it is named *key_col*,
+    otherwise its *key_col* column. The first row of a duplicated key wins.
+    A StateSource is queried directly (see StateTable.lookup).
+    """
+    if isinstance(source, StateSource):
+        return source.lookup(key_col, keys, strategies_list)
+    if source.index.name == key_col:
+        key_values = source.index
+    elif key_col in source.columns:
+        key_values = source[key_col]
+    else:
+        raise KeyError(
+            f"'{key_col}' is neither a column nor the index in the lookup DataFrame. "
+            f"Available columns: {list(source.columns)}, Index name: {source.index.name}"
+        )
+    cols = [col for col in strategies_list if col in source.columns]
+    table = pd.DataFrame(
+        {col: source[col].to_numpy(dtype=object) for col in cols},
+        index=pd.Index(np.asarray(key_values, dtype=object), name="_key"),
+    )
+    table = table[table.index.isin(keys) & table.index.notna()]
+    table = table[~table.index.duplicated(keep="first")]
+    return table.reset_index().melt(
+        id_vars="_key", var_name="_strategy", value_name="value"
+    )
+
+
+def _strategy_part(table: pd.DataFrame, strategy_name: str) -> pd.DataFrame:
+    return table[table["_strategy"] == strategy_name]
+
+
+def _build_strategy_frame(
+    strategy_name: str,
+    rows: pd.DataFrame,
+    lookups: Mapping[str, Tuple[str, pd.DataFrame]],
+    affected_col: str,
+) -> pd.DataFrame:
+    """
+    Strategy-level frame of process_data_by_strategy: the delta *rows* of the
+    strategy with its {strategy}_new / _old / _brs / _ovr values, looked up by
+    a keyed left merge on (key column, strategy) of every *lookups* table
+    (pd.NA where the key has no value). Top-level so it runs in worker processes.
+    """
+    rows = rows.reset_index(drop=True)
+    frame = rows[["aladdin_id", "permid", "issuer_name"]].copy()
+    for suffix, (key_col, table) in lookups.items():
+        keys = pd.DataFrame({"_key": rows[key_col].to_numpy(dtype=object)})
+        matched = keys.merge(
+            table[["_key", "value"]], on="_key", how="left", indicator=True
+        )
+        frame[f"{strategy_name}_{suffix}"] = (
+            matched["value"]
+            .astype(object)
+            .where(matched["_merge"] == "both", pd.NA)
+            .to_numpy()
+        )
+    # the affected portfolio / benchmark column goes last
+    frame[affected_col] = rows[affected_col].to_numpy()
+    return frame
+
+
 def process_data_by_strategy(
     input_delta_df: pd.DataFrame,
     strategies_list: list,
     input_df_exclusion_col: str,
     # --- Dataframes with data for old, new, and overrides values ---
-    df1_lookup_source: pd.DataFrame,
-    df2_lookup_source: pd.DataFrame,
-    brs_lookup_source: pd.DataFrame,
-    overrides_df: pd.DataFrame,
+    df1_lookup_source: Union[pd.DataFrame, StateSource],
+    df2_lookup_source: Union[pd.DataFrame, StateSource],
+    brs_lookup_source: Union[pd.DataFrame, StateSource],
+    overrides_df: Union[pd.DataFrame, OverrideIndex, StateSource],
     affected_portfolio_col_name: str = "affected_portfolio_str",  # change to "affected_benchmark_str" if needed
     # --- Key column names in the strategy-specific DataFrames being built ---
     strategy_df_permid_col: str = "permid",  # Must be in initial_cols_to_extract
@@ -631,6 +896,7 @@ def process_data_by_strategy(
     overrides_target_col: str = "ovr_target",
     overrides_value_col: str = "ovr_value",
     logger: logging.Logger = None,
+    max_workers: int = None,
 ) -> dict:
     """
     Processes an input DataFrame to create separate, enriched DataFrames for each specified strategy.
@@ -640,11 +906,16 @@ def process_data_by_strategy(
                                  or dlt_inc_brs, and dlt_inc_benchmarks inclusions).
         strategies_list: A list of strategy names to iterate over (e.g., delta_test_cols).
         input_df_exclusion_col: Column name in input_delta_df that contains lists/iterables
-                                 of strategies for exclusion or inclusion criteria (e.g. "exclusion_list" or "inclusion_list").
+                                 of strategies for exclusion or inclusion criteria (e.g. "exclusion_list" or "inclusion_list"),
+                                 or their STRATEGY_MASK bitmasks.
         df1_lookup_source: DataFrame with previous Clarity Data (e.g., df_1).
         df2_lookup_source: DataFrame with latest Clarity Data (e.g., df_1).
         brs_lookup_source: DataFrame for the BRS lookup (e.g., brs_carteras_issuerlevel).
-        overrides_df: DataFrame for override lookups.
+                           Each of the three lookup sources may instead be a
+                           source of a StateTable (state_table.source("old")).
+        overrides_df: DataFrame for override lookups, an OverrideIndex built
+                      once from it, or the override source of a StateTable.
+                      The last override of a (permid, strategy) wins.
         affected_portfolio_col_name: Name of the column to move to the end of each
                                      strategy DataFrame.
         strategy_df_permid_col: Column name in strategy DataFrames used as key for
@@ -656,65 +927,35 @@ def process_data_by_strategy(
         overrides_permid_col: PermID column name in overrides_df.
         overrides_target_col: Target strategy column name in overrides_df.
         overrides_value_col: Value column name in overrides_df for the override.
+        max_workers: If > 1, the strategies are fanned out across a process pool
+                     of that size; otherwise they are processed in this process.
 
     Returns:
         A dictionary where keys are strategy names and values are the processed
         DataFrames for each strategy.
     """
-
-    cols_to_extract = [
-        "aladdin_id",
-        "permid",
-        "issuer_name",
-        affected_portfolio_col_name,
-    ]
-
+    logger = _resolve_logger(logger)
     logger.info(
         "Starting to process to generate exclusion & inclusion analysis at the strategies."
     )
-    str_dfs_dict = {}
 
-    # Part 1: Iterate over strategies to build initial DataFrames from input_df
-    logger.info(
-        "Starting to process to generate exclusion & inclusion analysis at the strategies."
+    # Part 0: Keys in their canonical type, so str permids match the Int64 lookups
+    input_delta_df = input_delta_df.assign(
+        **{
+            col: to_id_type(input_delta_df[col])
+            for col in input_delta_df.columns.intersection(list(ID_SCHEMA))
+        }
     )
-    for strategy_name_key in strategies_list:
-        rows = []
-        target_col_new = f"{strategy_name_key}_new"
-        target_col_old = f"{strategy_name_key}_old"
-        target_col_brs = f"{strategy_name_key}_brs"
-        target_col_ovr = f"{strategy_name_key}_ovr"
-
-        # Explicitly define standard columns for each strategy
-        required_cols = [
-            "aladdin_id",
-            "permid",
-            "issuer_name",
-            target_col_new,
-            target_col_old,
-            target_col_brs,
-            target_col_ovr,
-            affected_portfolio_col_name,
-        ]
 
-        for _, row in input_delta_df.iterrows():
-            # Check if the exclusion column exists and its value is iterable and contains the strategy
-            if (
-                input_df_exclusion_col in row
-                and hasattr(row[input_df_exclusion_col], "__contains__")
-                and strategy_name_key in row[input_df_exclusion_col]
-            ):
-                extracted_row_data = {col: row.get(col, pd.NA) for col in required_cols}
-                rows.append(extracted_row_data)
-
-        # Always initialise Dataframe with required columns
-        str_dfs_dict[strategy_name_key] = pd.DataFrame(rows, columns=required_cols)
-        logger.info(
-            f"Head of DataFrame for strategy {strategy_name_key}: \n{str_dfs_dict[strategy_name_key].head()}\n\n"
-        )
+    # Part 1: Melt the delta to one row per (issuer, strategy) of its exclusion column
+    long_delta = _melt_delta_by_strategy(
+        input_delta_df,
+        strategies_list,
+        input_df_exclusion_col,
+        ["aladdin_id", "permid", "issuer_name", affected_portfolio_col_name],
+    )
 
-    # Part 2: Prepare lookup DataFrames - create indexed copies to avoid modifying originals
-    # get list uniques permid & aladdin_ids from input_delta_df
+    # Part 2: Key columns present in the delta; at least one of them is required
     # 2.1  Pull the two columns only if they exist
     target_permid_list = (
         input_delta_df["permid"].dropna().unique().tolist()
@@ -727,7 +968,7 @@ def process_data_by_strategy(
         else []
     )
 
-    # 2️.2  Warn about any individual column that is missing
+    # 2.2  Warn about any individual column that is missing
     if "permid" not in input_delta_df.columns:
         logger.warning(
             "Column 'permid' not found in input_delta_df – continuing with aladdin_id only."
@@ -746,188 +987,77 @@ def process_data_by_strategy(
         logger.error(msg)
         raise ValueError(msg)
 
-    # We will loop through the lookup DataFrames to create new DataFrames using only the target permids & issuer_ids
-    lookup_configs = [
-        {
-            "source": df1_lookup_source,
-            "key_col": df1_source_key_col,
-            "target_list": target_permid_list,
-            "output_name": "permid_to_df1_lookup",
-        },
-        {
-            "source": df2_lookup_source,
-            "key_col": df2_source_key_col,
-            "target_list": target_permid_list,
-            "output_name": "permid_to_df2_lookup",
-        },
-        {
-            "source": brs_lookup_source,
-            "key_col": brs_source_key_col,
-            "target_list": target_aladdin_id_list,
-            "output_name": "aladdin_to_brs_lookup",
-        },
-    ]
-
-    # Dictionary to collect output DataFrames
-    lookup_results = {}
-
-    for config in lookup_configs:
-        source = config["source"]
-        key_col = config["key_col"]
-        target_list = config["target_list"]
-        output_name = config["output_name"]
-
-        try:
-            # Validate key_col
-            if key_col not in source.columns and source.index.name != key_col:
-                error_message = (
-                    f"'{key_col}' is neither a column nor the index in DataFrame for {output_name}. "
-                    f"Available columns: {list(source.columns)}, Index name: {source.index.name}"
-                )
-                logger.error(error_message)
-                raise KeyError(error_message)
-
-            if source.index.name != key_col:
-                logger.info(
-                    f"Setting index for {output_name} using key_col '{key_col}'."
-                )
-                df = (
-                    source[source[key_col].isin(target_list)]
-                    .copy()
-                    .set_index(key_col, drop=False)
-                )
-            else:
-                df = source.loc[source.index.isin(target_list)].copy()
-
-            lookup_results[output_name] = df
-            logger.info(
-                f"{output_name} has {lookup_results[output_name].shape[0]} rows"
+    # Part 3: Long (key, strategy, value) lookup tables, restricted to the delta's keys
+    if isinstance(overrides_df, StateSource):
+        ovr_pairs = overrides_df.lookup(overrides_permid_col, target_permid_list)
+    else:
+        if isinstance(overrides_df, OverrideIndex):
+            override_index = overrides_df
+        else:
+            override_index = OverrideIndex.from_frame(
+                overrides_df,
+                key_cols=[overrides_permid_col],
+                target_col=overrides_target_col,
+                value_col=overrides_value_col,
             )
+        ovr_pairs = override_index.pairs(overrides_permid_col)
+    lookups = {
+        "new": _melt_lookup(
+            df2_lookup_source, df2_source_key_col, target_permid_list, strategies_list
+        ),
+        "old": _melt_lookup(
+            df1_lookup_source, df1_source_key_col, target_permid_list, strategies_list
+        ),
+        "brs": _melt_lookup(
+            brs_lookup_source,
+            brs_source_key_col,
+            target_aladdin_id_list,
+            strategies_list,
+        ),
+        "ovr": ovr_pairs[ovr_pairs["_key"].isin(target_permid_list)],
+    }
+    lookup_keys = {
+        "new": strategy_df_permid_col,
+        "old": strategy_df_permid_col,
+        "brs": strategy_df_aladdin_id_col,
+        "ovr": strategy_df_permid_col,
+    }
 
-        except KeyError as e:
-            logger.error(f"Key error for {output_name}: {e}")
-        except Exception as e:
-            logger.error(f"Unexpected error for {output_name}: {e}", exc_info=True)
-
-    # def  prefix func
-    def prefix_func(
-        df: pd.DataFrame, suffix: str, target_columns: List[str] = strategies_list
-    ) -> pd.DataFrame:
-        common_cols = set(df.columns).intersection(target_columns)
-        new_column_names = [
-            f"{col}_{suffix}" if col in common_cols else col for col in df.columns
-        ]
-        return df.rename(columns=dict(zip(df.columns, new_column_names)))
-
-    # Unpack variables
-    permid_to_df1_lookup = prefix_func(
-        lookup_results["permid_to_df1_lookup"], suffix="old"
-    )
-    permid_to_df2_lookup = prefix_func(
-        lookup_results["permid_to_df2_lookup"], suffix="new"
-    )
-    aladdin_to_brs_lookup = prefix_func(
-        lookup_results["aladdin_to_brs_lookup"], suffix="brs"
-    )
-    # delete lookup_results to free up memory
-    del lookup_results
-
-    # Part 3: Iterate through the newly created strategy DataFrames to add/enrich columns
-    logger.info("Adding new columns to strategy DataFrames.")
-    for strategy_name, temp_df in str_dfs_dict.items():
-        if temp_df.empty:
-            logger.info(f"Df for {strategy_name} is empty")
-            continue  # Skip processing for strategies with no initial data
-
-        # Define derived column names based on the strategy_name (as seen in snippet)
-        # These columns will be added to the temp_df for the current strategy
-        target_col_new = f"{strategy_name}_new"
-        target_col_old = f"{strategy_name}_old"
-        target_col_brs = f"{strategy_name}_brs"
-        target_col_ovr = f"{strategy_name}_ovr"
-
-        # Initialize these new columns in the strategy-specific DataFrame
-        # Using pd.NA for better compatibility with pandas dtypes, allows nullable integers etc.
-        temp_df[target_col_new] = pd.NA
-        temp_df[target_col_old] = pd.NA
-        temp_df[target_col_brs] = pd.NA
-        temp_df[target_col_ovr] = pd.NA
-
-        # Ensure columns are of object type if they might hold mixed types or pd.NA
-        # This is important if the source data for these columns is not uniformly numeric.
-        temp_df = temp_df.astype(
-            {target_col_old: object, target_col_brs: object, target_col_ovr: object}
-        )
-
-        for i, df_row in temp_df.iterrows():
-            permid_val = df_row.get(strategy_df_permid_col)
-            aladdin_id_val = df_row.get(strategy_df_aladdin_id_col)
-
-            # Lookup from df1_lookup_source
-            if pd.notna(permid_val) and permid_val in permid_to_df1_lookup.index:
-                # The source column name in df1_lookup_source is assumed to match target_col_old
-                if target_col_old in permid_to_df1_lookup.columns:
-                    temp_df.at[i, target_col_old] = permid_to_df1_lookup.at[
-                        permid_val, target_col_old
-                    ]
-
-            # Lookup from df2_lookup_source
-            if pd.notna(permid_val) and permid_val in permid_to_df2_lookup.index:
-                # The source column name in df2_lookup_source is assumed to match target_col_new
-                if target_col_new in permid_to_df2_lookup.columns:
-                    temp_df.at[i, target_col_new] = permid_to_df2_lookup.at[
-                        permid_val, target_col_new
-                    ]
-
-            # Lookup from brs_lookup_source
-            if (
-                pd.notna(aladdin_id_val)
-                and aladdin_id_val in aladdin_to_brs_lookup.index
-            ):
-                # The source column name in brs_lookup_source is assumed to match target_col_brs
-                if target_col_brs in aladdin_to_brs_lookup.columns:
-                    temp_df.at[i, target_col_brs] = aladdin_to_brs_lookup.at[
-                        aladdin_id_val, target_col_brs
-                    ]
-
-            # Lookup from overrides_df
-            if pd.notna(permid_val):
-                # Filter overrides_df for matching permid and strategy_name
-                match_override = overrides_df[
-                    (overrides_df[overrides_permid_col] == permid_val)
-                    & (overrides_df[overrides_target_col] == strategy_name)
-                ]
-                if not match_override.empty:
-                    # Assign the first matched override value
-                    temp_df.at[i, target_col_ovr] = match_override[
-                        overrides_value_col
-                    ].values[0]
-
-        # Part 4: Move the 'affected_portfolio_col_name' to the end of the DataFrame
-        logger.info(
-            f"Moving {affected_portfolio_col_name} column to the end of the DataFrame."
-        )
-        if affected_portfolio_col_name in temp_df.columns:
-            cols = [
-                col for col in temp_df.columns if col != affected_portfolio_col_name
-            ] + [affected_portfolio_col_name]
-            temp_df = temp_df[cols]
-
-        str_dfs_dict[strategy_name] = (
-            temp_df  # Update dictionary with the processed DataFrame
+    # Part 4: Keyed merges per strategy, optionally across a process pool
+    jobs = {
+        strategy_name: (
+            strategy_name,
+            _strategy_part(long_delta, strategy_name).drop(columns="_strategy"),
+            {
+                suffix: (lookup_keys[suffix], _strategy_part(table, strategy_name))
+                for suffix, table in lookups.items()
+            },
+            affected_portfolio_col_name,
         )
+        for strategy_name in strategies_list
+    }
+    if max_workers and max_workers > 1:
         logger.info(
-            f"Df {strategy_name} has {str_dfs_dict[strategy_name].shape[0]} rows"
+            "Processing %d strategies across %d worker processes",
+            len(jobs),
+            max_workers,
         )
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                name: pool.submit(_build_strategy_frame, *job)
+                for name, job in jobs.items()
+            }
+            str_dfs_dict = {name: future.result() for name, future in futures.items()}
+    else:
+        str_dfs_dict = {name: _build_strategy_frame(*job) for name, job in jobs.items()}
+    del jobs, lookups, long_delta
     logger.info(
         "Finished processing to generate exclusion & inclusion analysis at the strategies."
     )
 
     # Part 5: Clean up the DataFrames in str_dfs_dict
     # remove matchin rows from strategies dataframes
-    logger.info("\n\n==============DEBUGGING CHECK ===============\n\n")
     for df_name, df in str_dfs_dict.items():
-        logger.info(f"{df_name}'s COLUMNS: \n{df.columns.tolist()}")
         logger.info(f"{df_name} has {df.shape[0]} rows")
 
     logger.info("Removing matching rows from strategy DataFrames.")
@@ -1187,51 +1317,18 @@ def log_dict_compact(
 # Helper function to correct corrupted issuer_id/aladdin_ids
 # --------------------------------------------------------------------------- #
 
-"""
-Utility helpers for working with identifier columns.
-
-Functions
----------
-pad_identifiers(series: pd.Series, width: int = 6) -> pd.Series
-    Pads every value in *series* on the left with zeros until it
-    reaches *width* characters.  Missing values are preserved.
-"""
-
 
 def pad_identifiers(series: pd.Series, width: int = 6) -> pd.Series:
     """
-    Return a copy of *series* in which every identifier is a string of
-    exactly *width* characters, padded on the left with zeros.
+    Return *series* as zero-padded aladdin ids of *width* characters.
 
-    Parameters
-    ----------
-    series : pd.Series
-        The column to clean.  May contain strings or numbers (or a mix).
-    width : int, default 6
-        Desired total length after padding.
-
-    Notes
-    -----
-    * ``pd.NA`` / ``NaN`` / ``None`` are left untouched.
-    * Any numeric values are converted to integers first, so ``364`` →
-      ``"364"`` → ``"000364"``.
-
-    Examples
-    --------
-    >>> import pandas as pd
-    >>> from id_tools import pad_identifiers
-    >>> s = pd.Series(["000364", 98734, None])
-    >>> pad_identifiers(s)
+    The loaders already emit canonical aladdin ids; this is kept for frames
+    built by hand (e.g. in notebooks). See scripts.utils.schema.to_aladdin_id.
+
+    >>> pad_identifiers(pd.Series(["000364", 98734, None]))
     0    000364
     1    098734
     2      <NA>
     dtype: string
     """
-    # Convert to the pandas “string” dtype (preserves missing values cleanly)
-    s = series.astype("string")
-
-    # Remove any trailing “.0” Excel might have introduced (e.g. 364.0)
-    s = s.str.replace(r"\.0$", "", regex=True)
-
-    # Pad with zeros on the left
-    return s.str.zfill(width)
+    return to_aladdin_id(series, width=width)
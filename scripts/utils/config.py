@@ -1,4 +1,5 @@
 # config.py
+import argparse
 import sys
 import os
 from pathlib import Path
@@ -6,8 +7,10 @@ from datetime import datetime
 from dateutil.relativedelta import relativedelta
 
 from .get_date import get_date
-from .set_up_log import set_up_log
+from .set_up_log import log_dir_for, set_up_log
 from .get_output_dir import get_output_dir
+from .read_engine import READ_ENGINES, get_read_engine, set_read_engine
+from .load_metrics import enable_load_metrics
 
 
 def get_config(
@@ -17,6 +20,7 @@ def get_config(
     output_dir_dated: bool = False,
     auto_date: bool = True,
     fixed_date: str = None,
+    read_engine: str = None,
 ) -> dict:
     """
     Generate and return a configuration dictionary containing shared constants, directory paths,
@@ -35,6 +39,10 @@ def get_config(
         output_dir_dated (bool): If True, includes the current date in the generated OUTPUT_DIR name.
         auto_date (bool): If True, retrieves the current date automatically using `get_date`.
         fixed_date (str, optional): Manually specified date in 'YYYYMM' format, used if auto_date is False.
+        read_engine (str, optional): CSV read engine for every CSV loader of the run,
+            "c" or "pyarrow" (see scripts.utils.read_engine). If None, the
+            --read-engine flag or the SRI_READ_ENGINE environment variable is used,
+            falling back to "c".
 
     Returns:
         dict: A configuration dictionary with the following keys:
@@ -52,6 +60,7 @@ def get_config(
             - 'paths': Dictionary of specific input file paths relevant to the current date.
             - 'OUTPUT_DIR': Output directory path if generated, else None.
             - 'ESG_METRICS_MAP_DIR': Directory for ESG metric mappings.
+            - 'READ_ENGINE': CSV read engine used by the loaders ("c" or "pyarrow").
     """
     # Initialize logger for the current script
     logger = set_up_log(script_name)
@@ -72,6 +81,24 @@ def get_config(
             # Validate the fixed_date format
             DATE = fixed_date
 
+    # Set the CSV read engine once for every loader of this run
+    if read_engine is None:
+        parser = argparse.ArgumentParser(add_help=False)
+        parser.add_argument("--read-engine", choices=READ_ENGINES)
+        args, _ = parser.parse_known_args()
+        read_engine = args.read_engine or get_read_engine()
+    READ_ENGINE = set_read_engine(read_engine)
+    logger.info("CSV read engine: %s", READ_ENGINE)
+
+    # Dump what every loader read (time, bytes, rows, memory) next to the logs
+    enable_load_metrics(
+        Path(log_dir_for(script_name))
+        / f"{script_name}_{datetime.now():%Y%m%d_%H%M%S}_loads.json",
+        script=script_name,
+        date=DATE,
+        read_engine=READ_ENGINE,
+    )
+
     YEAR = DATE[:4]
     date_obj = datetime.strptime(DATE, "%Y%m")
     prev_date_obj = date_obj - relativedelta(months=1)
@@ -170,5 +197,6 @@ def get_config(
         "ESG_METRICS_MAP_DIR": ESG_METRICS_MAP_DIR,
         "DOWNLOAD_DIR": DOWNLOAD_DIR,
         "BRS_ISSUER_DATA_DIR_PATH": BRS_ISSUER_DATA_DIR_PATH,
+        "READ_ENGINE": READ_ENGINE,
     }
     return config
@@ -0,0 +1,240 @@
+# csv_encoding.py
+"""
+Vectorised UTF-8 / NBSP validation and repair of raw CSV bytes.
+
+The crossreference (Aladdin_Clarity_Issuers_{DATE}01.csv) occasionally ships
+with Latin-1 / cp1252 bytes (typically a lone NBSP, 0xA0) or with UTF-8 NBSPs
+inside identifiers. The old check_crossreference_csv_vol2*.py scripts found
+them by decoding the file line by line in Python, as a separate pass before
+the real load.
+
+Here the file is memory-mapped once and scanned as a NumPy uint8 array:
+
+* only the non-ASCII bytes are inspected (usually none, or a handful),
+* every lead byte is checked against its continuation bytes with fancy
+  indexing, so the cost is one vectorised pass over the file,
+* offending byte positions are mapped to physical lines with searchsorted.
+
+Flagged lines are repaired (re-decoded as cp1252, NBSP -> space) or
+quarantined (dropped), the cleaned bytes are handed to the CSV parser and the
+flagged lines are returned as a side report.
+"""
+
+import io
+import logging
+import mmap
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------- #
+# Constants
+# --------------------------------------------------------------------------- #
+
+ENCODING_MODES = ("repair", "quarantine")
+# Encoding used to re-decode lines that are not valid UTF-8
+FALLBACK_ENCODING = "cp1252"
+NBSP = "\u00a0"
+# Shown instead of NBSP in the report so the position is visible
+NBSP_GLYPH = "□"
+
+REPORT_COLUMNS = ["lineno", "issue", "byte_offset", "action", "raw_line"]
+
+
+# --------------------------------------------------------------------------- #
+# Helpers
+# --------------------------------------------------------------------------- #
+
+
+def _byte_at(buf: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """Return buf[positions], with 0 for positions past the end of the buffer."""
+    inside = positions < len(buf)
+    return np.where(inside, buf[np.minimum(positions, len(buf) - 1)], 0)
+
+
+def _scan_non_ascii(buf: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return the byte positions of invalid UTF-8 and of UTF-8 NBSPs (C2 A0).
+
+    Implements the UTF-8 well-formedness table (RFC 3629): lead bytes C2-DF,
+    E0-EF and F0-F4 need 1, 2 and 3 continuation bytes (80-BF), with the
+    overlong / surrogate limits on the second byte of E0, ED, F0 and F4.
+    """
+    pos = np.flatnonzero(buf >= 0x80)
+    if len(pos) == 0:
+        return pos, pos
+    byte = buf[pos]
+    need = np.select(
+        [
+            (byte >= 0xC2) & (byte <= 0xDF),
+            (byte >= 0xE0) & (byte <= 0xEF),
+            (byte >= 0xF0) & (byte <= 0xF4),
+        ],
+        [1, 2, 3],
+        default=0,
+    )
+    is_lead = need > 0
+    is_cont = (byte & 0xC0) == 0x80
+
+    second = _byte_at(buf, pos + 1)
+    lead_ok = is_lead.copy()
+    for k in (1, 2, 3):
+        follower = _byte_at(buf, pos + k)
+        lead_ok &= (need < k) | ((follower & 0xC0) == 0x80)
+    lead_ok &= ~((byte == 0xE0) & (second < 0xA0))  # overlong
+    lead_ok &= ~((byte == 0xED) & (second > 0x9F))  # surrogates
+    lead_ok &= ~((byte == 0xF0) & (second < 0x90))  # overlong
+    lead_ok &= ~((byte == 0xF4) & (second > 0x8F))  # > U+10FFFF
+
+    # continuation bytes are only valid right after a well-formed lead
+    owned = np.concatenate([pos[lead_ok & (need >= k)] + k for k in (1, 2, 3)]).astype(
+        pos.dtype
+    )
+    cont_ok = np.isin(pos, owned)
+
+    invalid = (is_lead & ~lead_ok) | (is_cont & ~cont_ok) | (~is_lead & ~is_cont)
+    nbsp = lead_ok & (byte == 0xC2) & (second == 0xA0)
+    return pos[invalid], pos[nbsp]
+
+
+def _line_bounds(buf: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the start and end (exclusive, incl. newline) offset of every line."""
+    newlines = np.flatnonzero(buf == 0x0A)
+    starts = np.concatenate([[0], newlines + 1])
+    ends = np.concatenate([newlines + 1, [len(buf)]])
+    if starts[-1] == len(buf):  # file ends with a newline
+        starts, ends = starts[:-1], ends[:-1]
+    return starts, ends
+
+
+def _repair_line(raw: bytes) -> bytes:
+    """Return *raw* as valid UTF-8 with NBSPs turned into plain spaces."""
+    try:
+        text = raw.decode("utf-8")
+    except UnicodeDecodeError:
+        text = raw.decode(FALLBACK_ENCODING, errors="replace")
+    return text.replace(NBSP, " ").encode("utf-8")
+
+
+def _pretty_line(raw: bytes) -> str:
+    try:
+        text = raw.decode("utf-8")
+    except UnicodeDecodeError:
+        text = raw.decode("latin-1")
+    return text.replace(NBSP, NBSP_GLYPH).rstrip("\r\n")
+
+
+# --------------------------------------------------------------------------- #
+# Public API
+# --------------------------------------------------------------------------- #
+
+
+def scan_encoding(buf: np.ndarray) -> pd.DataFrame:
+    """
+    Return one row per line of *buf* with invalid UTF-8 bytes or NBSPs.
+
+    Returns:
+        pd.DataFrame: columns lineno (1-based), issue ("invalid_utf8", "nbsp"
+        or both, ';'-separated) and byte_offset (first offending byte in the
+        line).
+    """
+    invalid, nbsp = _scan_non_ascii(buf)
+    if len(invalid) == 0 and len(nbsp) == 0:
+        return pd.DataFrame(columns=["lineno", "issue", "byte_offset"])
+
+    starts, _ = _line_bounds(buf)
+    hits = pd.DataFrame(
+        {
+            "byte": np.concatenate([invalid, nbsp]),
+            "issue": ["invalid_utf8"] * len(invalid) + ["nbsp"] * len(nbsp),
+        }
+    )
+    line_idx = np.searchsorted(starts, hits["byte"].to_numpy(), side="right") - 1
+    hits["lineno"] = line_idx + 1
+    hits["byte_offset"] = hits["byte"].to_numpy() - starts[line_idx]
+    return (
+        hits.sort_values(["lineno", "byte_offset"])
+        .groupby("lineno", sort=True)
+        .agg(
+            issue=("issue", lambda s: ";".join(dict.fromkeys(s))),
+            byte_offset=("byte_offset", "first"),
+        )
+        .reset_index()
+    )
+
+
+def clean_csv_bytes(
+    buf: np.ndarray, mode: str = "repair"
+) -> Tuple[bytes, pd.DataFrame]:
+    """
+    Validate *buf* and return (clean bytes, report of the flagged lines).
+
+    Parameters:
+        buf (np.ndarray): Raw file content as uint8 (e.g. a memory map).
+        mode (str): "repair" re-decodes flagged lines as cp1252 and replaces
+            NBSPs with spaces; "quarantine" drops them (the header is always
+            repaired, never dropped).
+
+    Returns:
+        tuple[bytes, pd.DataFrame]: UTF-8 content ready for the CSV parser
+        and the report (REPORT_COLUMNS).
+    """
+    if mode not in ENCODING_MODES:
+        raise ValueError(f"Unknown mode '{mode}', expected one of {ENCODING_MODES}")
+
+    flagged = scan_encoding(buf)
+    if flagged.empty:
+        return buf.tobytes(), pd.DataFrame(columns=REPORT_COLUMNS)
+
+    starts, ends = _line_bounds(buf)
+    pieces = []
+    raw_lines = []
+    actions = []
+    cursor = 0
+    for lineno in flagged["lineno"].to_numpy():
+        start, end = starts[lineno - 1], ends[lineno - 1]
+        raw = buf[start:end].tobytes()
+        pieces.append(buf[cursor:start].tobytes())
+        if mode == "repair" or lineno == 1:
+            pieces.append(_repair_line(raw))
+            actions.append("repaired")
+        else:
+            actions.append("quarantined")
+        raw_lines.append(_pretty_line(raw))
+        cursor = end
+    pieces.append(buf[cursor:].tobytes())
+
+    report = flagged.assign(action=actions, raw_line=raw_lines)[REPORT_COLUMNS]
+    return b"".join(pieces), report
+
+
+def read_clean_csv_bytes(
+    file_path: Path, mode: str = "repair"
+) -> Tuple[io.BytesIO, pd.DataFrame]:
+    """
+    Memory-map *file_path*, validate / clean it in one pass and return the
+    cleaned content as a file-like object plus the report of flagged lines.
+    """
+    with open(file_path, "rb") as fh:
+        if fh.seek(0, io.SEEK_END) == 0:  # mmap cannot map empty files
+            return io.BytesIO(b""), pd.DataFrame(columns=REPORT_COLUMNS)
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            buf = np.frombuffer(mapped, dtype=np.uint8)
+            try:
+                content, report = clean_csv_bytes(buf, mode)
+            finally:
+                del buf  # release the export before the map is closed
+    return io.BytesIO(content), report
+
+
+def write_encoding_report(report: pd.DataFrame, report_path: Path) -> Path:
+    """Write the flagged lines to *report_path* (UTF-8 CSV) and return the path."""
+    report_path = Path(report_path)
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report.to_csv(report_path, index=False, encoding="utf-8")
+    return report_path
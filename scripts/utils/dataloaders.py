@@ -3,11 +3,26 @@ import re
 import warnings
 from itertools import chain
 from pathlib import Path
-from typing import Any, Dict, List, Tuple, Union
+from typing import Any, Callable, Dict, Iterator, List, Tuple, Union
 from datetime import datetime
 
 import pandas as pd
 
+from . import read_engine
+from .csv_encoding import read_clean_csv_bytes, write_encoding_report
+from .excel_writer import write_workbook, write_workbooks_parallel
+from .load_metrics import instrumented_loader, record_io
+from .override_store import OverrideStore
+from .parquet_cache import read_through_cache
+from .schema import (
+    ID_SCHEMA,
+    apply_id_types,
+    apply_schema,
+    csv_read_dtypes,
+    release_schema,
+    to_aladdin_id,
+)
+
 # Module-level logger
 logger = logging.getLogger(__name__)
 
@@ -28,17 +43,51 @@ def clean_columns(columns):
 
 def convert_id_columns(df):
     """
-    Converts columns that end with '_id' or 'id' to string dtype,
-    if they are not already strings.
+    Converts the registered identifier columns (permid, clarityid, aladdin_id, ...)
+    to their canonical type (see scripts.utils.schema) and any other column that
+    ends with '_id' or 'id' to string dtype, if it is not already a string.
     """
+    df = apply_id_types(df)
     pattern = re.compile(r"(_)?id$", re.IGNORECASE)
     for column in df.columns:
+        if column in ID_SCHEMA:
+            continue
         if pattern.search(column) and not pd.api.types.is_string_dtype(df[column]):
             logger.info(f"Converting column '{column}' to string.")
             df[column] = df[column].astype(str)
     return df
 
 
+def column_projection(columns: List[str]) -> Callable[[Any], bool]:
+    """
+    Return a ``usecols`` callable for pd.read_excel keeping the header cells
+    whose cleaned name (see clean_columns) is in *columns*. pandas resolves it
+    against the header row (after skiprows), so unneeded columns are never
+    converted nor stored.
+    """
+    wanted = set(columns)
+    return lambda name: clean_columns([str(name)])[0] in wanted
+
+
+def check_projection(
+    df: pd.DataFrame,
+    columns: List[str],
+    sheet_name: str,
+    optional_columns: List[str] = (),
+) -> None:
+    """
+    Raise ValueError if a projected column is missing from the sheet header;
+    *optional_columns* are projected only if present.
+    """
+    optional = set(optional_columns)
+    header = clean_columns(df.columns)
+    missing = [col for col in columns if col not in header and col not in optional]
+    if missing:
+        raise ValueError(
+            f"Columns {missing} not found in the header of sheet '{sheet_name}'"
+        )
+
+
 def clean_and_convert(df):
     """
     First standardizes the DataFrame's column names, then converts any
@@ -49,6 +98,7 @@ def clean_and_convert(df):
     return df
 
 
+@instrumented_loader()
 def load_excel(
     file_path: Path, sheet_name: str, clean_n_convert: bool = True
 ) -> pd.DataFrame:
@@ -86,11 +136,13 @@ def load_excel(
         return df
 
 
+@instrumented_loader()
 def load_csv(
     file_path: Path, clean_n_convert: bool = True, low_memory: bool = False
 ) -> pd.DataFrame:
     """
-    Read the specified sheet from an csv file into a DataFrame.
+    Read the specified sheet from an csv file into a DataFrame, using the
+    configured read engine (see scripts.utils.read_engine).
 
     Parameters:
         file_path (Path): Path to the csv file.
@@ -102,7 +154,8 @@ def load_csv(
     """
     logger.info("Attempting to read csv file: %s", file_path)
     try:
-        df = pd.read_csv(file_path, low_memory=low_memory)
+        df = read_engine.read_csv(file_path, low_memory=low_memory)
+        df = read_engine.to_numpy_dtypes(df)
         logger.info("Successfully read csv file: %s", file_path)
     except Exception:
         logger.exception("Failed to read csv file: %s", file_path)
@@ -119,7 +172,39 @@ def load_csv(
         return df
 
 
-def load_clarity_data(file_path: Path, target_cols: list[str] = None) -> pd.DataFrame:
+def _parse_clarity_csv(file_path: Path, typed_ids: bool = True) -> pd.DataFrame:
+    """
+    Parse a whole Clarity CSV with id columns as strings and clean column names,
+    using the configured read engine (see scripts.utils.read_engine).
+    """
+    df = read_engine.read_csv(
+        file_path,
+        dtype={
+            "permid": str,
+            "permId": str,
+            "isin": str,
+            "ISIN": str,
+            "ClarityID": str,
+            "clarityid": str,
+            # strategy columns are parsed (and cached) as raw categoricals
+            **csv_read_dtypes(),
+        },
+        low_memory=False,
+    )
+    df = read_engine.to_numpy_dtypes(df)
+    df.columns = clean_columns(df.columns)
+    # typed ids are cached as int64 so warm reads skip the conversion
+    return apply_id_types(df, integer_ids=typed_ids)
+
+
+@instrumented_loader()
+def load_clarity_data(
+    file_path: Path,
+    target_cols: list[str] = None,
+    use_cache: bool = True,
+    normalise_states: bool = True,
+    typed_ids: bool = True,
+) -> pd.DataFrame:
     """
     Load Clarity data from a CSV file into a DataFrame.
 
@@ -127,30 +212,42 @@ def load_clarity_data(file_path: Path, target_cols: list[str] = None) -> pd.Data
         file_path (Path): Path to the CSV file containing Clarity data.
         target_cols (list[str], optional): List of columns to read from the CSV file.
             If None, read all columns. Defaults to None.
+        use_cache (bool): If True, read through the Parquet cache (see
+            scripts.utils.parquet_cache): the CSV is parsed once and later calls
+            only read target_cols from Parquet. Defaults to True.
+        normalise_states (bool): If True, strategy columns are stripped,
+            upper-cased and returned as the shared STRATEGY_DTYPE (see
+            scripts.utils.schema). If False they are returned as plain object
+            columns with the values exactly as delivered, e.g. when the feed
+            is written back. Defaults to True.
+        typed_ids (bool): If True, permid and clarityid are returned as Int64.
+            If False they are kept as delivered text (the Parquet cache, which
+            stores typed ids, is bypassed), e.g. when the feed is written back.
+            aladdin_id is always returned zero-padded. Defaults to True.
 
     Returns:
         pd.DataFrame: DataFrame containing the Clarity data.
     """
     logger.info("Loading Clarity data from: %s", file_path)
     try:
-        if target_cols:
-            df = pd.read_csv(
-                file_path, usecols=target_cols, dtype={"permid": str, "isin": str}
-            )
-        else:
-            df = pd.read_csv(
+        if use_cache and typed_ids:
+            df = read_through_cache(file_path, _parse_clarity_csv, columns=target_cols)
+        elif target_cols:
+            df = read_engine.read_csv(
                 file_path,
+                usecols=target_cols,
                 dtype={
                     "permid": str,
-                    "permId": str,
-                    "isin": str,
-                    "ISIN": str,
-                    "ClarityID": str,
                     "clarityid": str,
+                    "isin": str,
+                    **csv_read_dtypes(target_cols),
                 },
-                low_memory=False,
             )
-            df.columns = clean_columns(df.columns)
+            df = read_engine.to_numpy_dtypes(df)
+        else:
+            df = _parse_clarity_csv(file_path, typed_ids=typed_ids)
+        df = apply_id_types(df, integer_ids=typed_ids)
+        df = apply_schema(df) if normalise_states else release_schema(df)
     except Exception:
         logger.exception("Failed to load Clarity data from: %s", file_path)
         raise
@@ -158,24 +255,300 @@ def load_clarity_data(file_path: Path, target_cols: list[str] = None) -> pd.Data
     return df
 
 
-def load_aladdin_data(file_path: Path, sheet_name: str) -> pd.DataFrame:
+def iter_clarity_chunks(
+    file_path: Path,
+    columns: list[str] = None,
+    chunksize: int = 200_000,
+    typed_ids: bool = True,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream a Clarity CSV in chunks so that peak memory does not grow with the
+    size of the feed.
+
+    Every chunk has clean column names (see clean_columns) and its id columns
+    (names ending with 'id') read as strings, so missing ids stay NaN instead
+    of becoming the string "nan". Registered identifiers (permid, clarityid,
+    aladdin_id) are then cast to their canonical type (see scripts.utils.schema);
+    with typed_ids=False permid and clarityid keep the delivered text, e.g.
+    when the chunks are written back.
+
+    Parameters:
+        file_path (Path): Path to the CSV file containing Clarity data.
+        columns (list[str], optional): Cleaned names of the columns to read.
+            If None, read all columns. Defaults to None.
+        chunksize (int): Number of rows per chunk. Defaults to 200_000.
+        typed_ids (bool): Cast permid and clarityid to Int64. Defaults to True.
+
+    Yields:
+        pd.DataFrame: Cleaned, id-typed chunk of the feed.
+    """
+    logger.info("Streaming Clarity data from: %s (chunksize=%d)", file_path, chunksize)
+    try:
+        header = pd.read_csv(file_path, nrows=0).columns
+    except Exception:
+        logger.exception("Failed to read header of Clarity data from: %s", file_path)
+        raise
+
+    cleaned_names = dict(zip(header, clean_columns(header)))
+    if columns:
+        missing = [col for col in columns if col not in cleaned_names.values()]
+        if missing:
+            raise ValueError(f"Columns {missing} not found in {file_path}")
+        usecols = [raw for raw, clean in cleaned_names.items() if clean in columns]
+    else:
+        usecols = list(header)
+
+    id_pattern = re.compile(r"(_)?id$", re.IGNORECASE)
+    dtype = {
+        raw: str
+        for raw in usecols
+        if id_pattern.search(cleaned_names[raw]) or cleaned_names[raw] == "isin"
+    }
+
+    n_rows = 0
+    with pd.read_csv(
+        file_path, usecols=usecols, dtype=dtype, chunksize=chunksize
+    ) as reader:
+        for chunk in reader:
+            chunk.columns = clean_columns(chunk.columns)
+            chunk = apply_id_types(chunk, integer_ids=typed_ids)
+            n_rows += len(chunk)
+            yield chunk
+    logger.info("Finished streaming %d rows from: %s", n_rows, file_path)
+
+
+class WorkbookSession:
+    """
+    Parse-once view of an Excel workbook shared by every loader of a run.
+
+    The workbook is opened a single time and the requested sheets are parsed
+    together on first access; every consumer then receives a copy of the
+    cached frame, so openpyxl parse time is paid once per run instead of once
+    per loader call.
+
+    Parameters:
+        file_path (Path): Path to the Excel workbook.
+        sheet_names (list[str], optional): Sheets to parse in the first pass.
+            Sheets requested later are parsed on demand and cached as well.
+        skiprows (int): Header rows to skip in every sheet (3 for BRS exports).
+        dtype: dtype passed to the parser. Defaults to str.
+        columns (dict, optional): Sheet name -> cleaned column names to parse
+            (see column_projection); the other columns of that sheet are
+            skipped. Must cover every consumer of the session.
+        optional_columns (dict, optional): Sheet name -> the cleaned names of
+            *columns* that are parsed only if the sheet has them (descriptors);
+            the others raise a ValueError when missing.
+
+    Example:
+        >>> brs_book = WorkbookSession(path, ["portfolio_carteras"], skiprows=3)
+        >>> carteras = load_aladdin_data(brs_book, "portfolio_carteras")
+    """
+
+    def __init__(
+        self,
+        file_path: Path,
+        sheet_names: List[str] = None,
+        skiprows: int = 0,
+        dtype: Any = str,
+        columns: Dict[str, List[str]] = None,
+        optional_columns: Dict[str, List[str]] = None,
+    ):
+        self.file_path = Path(file_path)
+        self.sheet_names = list(sheet_names or [])
+        self.skiprows = skiprows
+        self.dtype = dtype
+        self.columns = dict(columns or {})
+        self.optional_columns = dict(optional_columns or {})
+        self._book = None
+        self._frames: Dict[str, pd.DataFrame] = {}
+
+    @classmethod
+    def from_frames(
+        cls,
+        file_path: Path,
+        frames: Dict[str, pd.DataFrame],
+        skiprows: int = 0,
+        dtype: Any = str,
+        columns: Dict[str, List[str]] = None,
+        optional_columns: Dict[str, List[str]] = None,
+    ) -> "WorkbookSession":
+        """
+        Build a session around sheets that were already parsed elsewhere
+        (e.g. by load_workbook_sheets in a worker process).
+        """
+        session = cls(
+            file_path,
+            list(frames),
+            skiprows=skiprows,
+            dtype=dtype,
+            columns=columns,
+            optional_columns=optional_columns,
+        )
+        session._frames.update(frames)
+        return session
+
+    def __repr__(self) -> str:
+        return f"WorkbookSession({self.file_path})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _open(self) -> pd.ExcelFile:
+        if self._book is None:
+            logger.info("Opening workbook once for this run: %s", self.file_path)
+            self._book = pd.ExcelFile(self.file_path)
+        return self._book
+
+    def _parse(self, sheet_names: List[str]) -> None:
+        pending = [name for name in sheet_names if name not in self._frames]
+        if not pending:
+            return
+        logger.info("Parsing sheets %s from %s", pending, self.file_path)
+        book = self._open()
+        full = [name for name in pending if name not in self.columns]
+        if full:
+            self._frames.update(
+                book.parse(sheet_name=full, skiprows=self.skiprows, dtype=self.dtype)
+            )
+        for name in pending:
+            if name not in self.columns:
+                continue
+            df = book.parse(
+                sheet_name=name,
+                skiprows=self.skiprows,
+                dtype=self.dtype,
+                usecols=column_projection(self.columns[name]),
+            )
+            check_projection(
+                df, self.columns[name], name, self.optional_columns.get(name, ())
+            )
+            self._frames[name] = df
+
+    def sheet(self, sheet_name: str) -> pd.DataFrame:
+        """Return a copy of the cached *sheet_name* frame, parsing it if needed."""
+        if sheet_name not in self._frames:
+            # first access parses every requested sheet in a single pass
+            self._parse(self.sheet_names + [sheet_name])
+            record_io(bytes_read=self.file_path.stat().st_size, cache="miss")
+        else:
+            record_io(bytes_read=0, cache="hit")
+        return self._frames[sheet_name].copy()
+
+    def close(self) -> None:
+        """Close the underlying workbook; cached frames stay available."""
+        if self._book is not None:
+            self._book.close()
+            self._book = None
+
+
+ExcelSource = Union[Path, str, WorkbookSession]
+
+
+@instrumented_loader()
+def load_workbook_sheets(
+    file_path: Path,
+    sheet_names: List[str],
+    skiprows: int = 0,
+    dtype: Any = str,
+    columns: Dict[str, List[str]] = None,
+    optional_columns: Dict[str, List[str]] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Parse *sheet_names* from *file_path* in a single pass and return the raw
+    frames keyed by sheet name, optionally projected to *columns* (see
+    WorkbookSession). Picklable, so it can run in a worker process; wrap the
+    result with WorkbookSession.from_frames to feed the loaders.
+    """
+    logger.info("Loading sheets %s from %s", sheet_names, file_path)
+    with WorkbookSession(
+        file_path,
+        sheet_names,
+        skiprows=skiprows,
+        dtype=dtype,
+        columns=columns,
+        optional_columns=optional_columns,
+    ) as book:
+        return {name: book.sheet(name) for name in sheet_names}
+
+
+def _read_sheet(
+    source: ExcelSource,
+    sheet_name: str,
+    usecols: List[str] = None,
+    columns: List[str] = None,
+    optional_columns: List[str] = (),
+    **read_kwargs,
+) -> pd.DataFrame:
+    """
+    Read *sheet_name* either from a WorkbookSession (cached, parsed once) or
+    from a path with pd.read_excel and *read_kwargs*. *usecols* selects raw
+    header names, *columns* cleaned ones (see column_projection), of which
+    *optional_columns* are read only if present.
+    """
+    if isinstance(source, WorkbookSession):
+        df = source.sheet(sheet_name)
+        if columns is not None:
+            check_projection(df, columns, sheet_name, optional_columns)
+            df = df.loc[:, [col in columns for col in clean_columns(df.columns)]]
+        if usecols is not None:
+            missing = [col for col in usecols if col not in df.columns]
+            if missing:
+                raise ValueError(
+                    f"Usecols do not match columns, columns expected but not found: {missing}"
+                )
+            df = df[[col for col in df.columns if col in usecols]]
+        return df
+    record_io(bytes_read=Path(source).stat().st_size)
+    if columns is not None:
+        df = pd.read_excel(
+            source,
+            sheet_name=sheet_name,
+            usecols=column_projection(columns),
+            **read_kwargs,
+        )
+        check_projection(df, columns, sheet_name, optional_columns)
+        return df
+    return pd.read_excel(source, sheet_name=sheet_name, usecols=usecols, **read_kwargs)
+
+
+@instrumented_loader()
+def load_aladdin_data(
+    file_path: ExcelSource,
+    sheet_name: str,
+    columns: List[str] = None,
+    optional_columns: List[str] = (),
+) -> pd.DataFrame:
     """
     Load Aladdin data from a CSV file into a DataFrame.
 
     Parameters:
-        file_path (Path): Path to the CSV file containing Aladdin data.
+        file_path (Path | WorkbookSession): Path to the Excel file containing Aladdin
+            data, or a WorkbookSession opened on it with skiprows=3.
         sheet_name (str): Name of the sheet to read.
+        columns (list[str], optional): Cleaned column names to read; the other
+            columns are skipped while parsing. Defaults to every column.
+        optional_columns (list[str], optional): The descriptors of *columns*
+            read only if the sheet has them; the others are required.
 
     Returns:
         pd.DataFrame: DataFrame with the Aladdin data.
     """
     logger.info(f"Loading {sheet_name} data from {file_path}")
     try:
-        df = pd.read_excel(
-            file_path, dtype="unicode", sheet_name=sheet_name, skiprows=3
+        df = _read_sheet(
+            file_path,
+            sheet_name,
+            columns=columns,
+            optional_columns=optional_columns,
+            dtype="unicode",
+            skiprows=3,
         )
         logger.info(f"Cleaning columns and converting data types for {sheet_name}")
         df = clean_and_convert(df)
+        df = apply_schema(df)
     except Exception:
         logger.error(
             f"""
@@ -194,7 +567,12 @@ def load_aladdin_data(file_path: Path, sheet_name: str) -> pd.DataFrame:
     return df
 
 
-def load_crossreference(file_path: Path) -> pd.DataFrame:
+@instrumented_loader()
+def load_crossreference(
+    file_path: Path,
+    validate_encoding: str = None,
+    bad_rows_path: Path = None,
+) -> pd.DataFrame:
     """
     Load cross-reference data from a CSV file into a DataFrame.
 
@@ -202,6 +580,14 @@ def load_crossreference(file_path: Path) -> pd.DataFrame:
     ----------
     file_path : Path
         Path to the CSV file containing cross-reference data.
+    validate_encoding : str, optional
+        "repair" or "quarantine": memory-map the file, find lines with invalid
+        UTF-8 bytes or NBSPs (see scripts.utils.csv_encoding) and repair or
+        drop them before parsing, in the same read. None parses the file as is.
+    bad_rows_path : Path, optional
+        Where to write the flagged lines when validating. Defaults to
+        ``<file stem>_bad_rows.csv`` next to *file_path*; only written if
+        there are flagged lines.
 
     Returns
     -------
@@ -209,8 +595,26 @@ def load_crossreference(file_path: Path) -> pd.DataFrame:
         DataFrame with cleaned / renamed columns.
     """
     logger.info("Loading crossreference data from: %s", file_path)
+    source = file_path
+    if validate_encoding is not None:
+        source, report = read_clean_csv_bytes(file_path, mode=validate_encoding)
+        if report.empty:
+            logger.info("No encoding problems found in %s", file_path)
+        else:
+            file_path = Path(file_path)
+            report_path = write_encoding_report(
+                report,
+                bad_rows_path or file_path.with_name(f"{file_path.stem}_bad_rows.csv"),
+            )
+            logger.warning(
+                "%d crossreference line(s) with invalid UTF-8 / NBSP %s, " "see %s",
+                len(report),
+                "repaired" if validate_encoding == "repair" else "quarantined",
+                report_path,
+            )
     try:
-        df = pd.read_csv(file_path, dtype=str)
+        df = read_engine.read_csv(source, dtype=str)
+        df = read_engine.to_numpy_dtypes(df)
     except Exception:  # let caller decide what to do with the traceback
         logger.exception("Failed to load crossreference data from: %s", file_path)
         raise
@@ -238,14 +642,31 @@ def load_crossreference(file_path: Path) -> pd.DataFrame:
             "'aladdin_id' will be missing."
         )
 
+    df = apply_id_types(df)
     logger.info("Finished processing crossreference data from: %s", file_path)
     return df
 
 
+@instrumented_loader()
 def load_overrides(
-    file_path: Path, target_cols: list[str] = None, drop_active: bool = True
+    file_path: Path,
+    target_cols: list[str] = None,
+    drop_active: bool = True,
+    normalise_states: bool = True,
+    typed_ids: bool = True,
 ) -> pd.DataFrame:
-    """Load overrides from a CSV file."""
+    """
+    Load overrides from the overrides workbook.
+
+    The workbook is parsed only when its content changed; otherwise the
+    columns are read from its latest snapshot (see scripts.utils.override_store).
+
+    If normalise_states is True, ovr_value / df_value are returned as the shared
+    STRATEGY_DTYPE (see scripts.utils.schema). If typed_ids is True, permid and
+    clarityid are returned as Int64. Pass False to keep the values exactly as
+    stored, e.g. when the overrides database is written back. aladdin_id is
+    always returned zero-padded.
+    """
     if target_cols is None:
         # Default columns to load if not specified
         target_cols = [
@@ -258,34 +679,16 @@ def load_overrides(
         ]
     try:
         logger.info(f"Loading overrides from: {file_path}")
-        try:
-            df = pd.read_excel(
-                file_path,
-                usecols=target_cols,
-                dtype={
-                    "clarityid": str,
-                    "permid": str,
-                    "aladdin_id": str,
-                    "ovr_target": str,
-                    "ovr_value": str,
-                    "ovr_active": bool,
-                },
-            )
-        except ValueError as ve:
-            logger.error(
-                f"Error reading 'ovr_active' column from {file_path}. "
-                f"This usually indicates missing or invalid boolean values in column 'ovr_active'. "
-                f"Please check the file and ensure that the column contains only boolean values (TRUE/FALSE) and that is complete. "
-                f"Original error: {ve}"
-            )
-            raise ValueError(
-                f"'ovr_active' column in {file_path} contains missing or non-boolean values. Cannot proceed."
-            ) from ve
-
+        # parsed once per workbook version, then read from its Parquet snapshot
+        df = OverrideStore(file_path).load(columns=target_cols)
     except Exception:
         logger.exception(f"Failed to load overrides from: {file_path}")
         raise
 
+    df = apply_id_types(df, integer_ids=typed_ids)
+    if normalise_states:
+        df = apply_schema(df)
+
     if drop_active:
         # return only active overrides
         df = df[df["ovr_active"] == True].copy()
@@ -297,9 +700,10 @@ def load_overrides(
         return df[df["ovr_active"] == True].copy()
 
 
+@instrumented_loader(source_arg="path_pb")
 def load_portfolios(
-    path_pb: Path,
-    path_committe: Path,
+    path_pb: ExcelSource,
+    path_committe: ExcelSource,
     target_cols_portfolio: List[str] = None,
     target_cols_benchmarks: List[str] = None,
 ) -> Tuple[
@@ -320,12 +724,14 @@ def load_portfolios(
           }
 
     Parameters:
-        path_pb (Path):
+        path_pb (Path | WorkbookSession):
             The file path to the Excel workbook containing the portfolio_carteras
-            and portfolio_benchmarks sheets.
-        path_committe (Path):
+            and portfolio_benchmarks sheets, or a WorkbookSession opened on it
+            with skiprows=3.
+        path_committe (Path | WorkbookSession):
             The file path to the Excel workbook containing the 'Portfolios' and
-            'Benchmarks' sheets that map each ID to a strategy.
+            'Benchmarks' sheets that map each ID to a strategy, or a
+            WorkbookSession opened on it.
         target_cols_portfolio (list, optional):
             Columns to read from the portfolio_carteras sheet.
             Defaults to ["aladdin_id", "portfolio_id"].
@@ -377,7 +783,7 @@ def load_portfolios(
     # 2. Load the original portfolios and benchmarks from path_pb
     try:
         logger.info("Loading portfolios from: %s", path_pb)
-        portfolios = pd.read_excel(
+        portfolios = _read_sheet(
             path_pb,
             sheet_name="portfolio_carteras",
             usecols=target_cols_portfolio,
@@ -391,7 +797,7 @@ def load_portfolios(
 
     try:
         logger.info("Loading benchmarks from: %s", path_pb)
-        benchmarks = pd.read_excel(
+        benchmarks = _read_sheet(
             path_pb,
             sheet_name="portfolio_benchmarks",
             usecols=target_cols_benchmarks,
@@ -403,6 +809,9 @@ def load_portfolios(
         logger.exception("Failed to load benchmarks from: %s", path_pb)
         raise
 
+    portfolios["aladdin_id"] = to_aladdin_id(portfolios["aladdin_id"])
+    benchmarks["aladdin_id"] = to_aladdin_id(benchmarks["aladdin_id"])
+
     # Remove rows with missing or 'nan' values in aladdin_id or portfolio/benchmark ID
     portfolios = portfolios.dropna(subset=["aladdin_id", "portfolio_id"])
     benchmarks = benchmarks.dropna(subset=["aladdin_id", "benchmark_id"])
@@ -410,7 +819,7 @@ def load_portfolios(
     # 3. Load the 'Portfolios' sheet from path_committe to build a map: portfolio_id -> strategy_name
     try:
         logger.info("Loading strategy data for portfolios from: %s", path_committe)
-        portfolios_strategies = pd.read_excel(
+        portfolios_strategies = _read_sheet(
             path_committe, sheet_name="Portfolios", dtype=str
         )
     except Exception:
@@ -438,7 +847,7 @@ def load_portfolios(
     # 5. Load the 'Benchmarks' sheet from path_committe to build a map: benchmark_id -> strategy_name
     try:
         logger.info("Loading strategy data for benchmarks from: %s", path_committe)
-        benchmarks_strategies = pd.read_excel(
+        benchmarks_strategies = _read_sheet(
             path_committe, sheet_name="Benchmarks", dtype=str
         )
     except Exception:
@@ -493,14 +902,22 @@ def load_portfolios(
     )
 
 
-def save_excel(df_dict: dict, output_dir: Path, file_name: str) -> Path:
+def save_excel(
+    df_dict: dict, output_dir: Path, file_name: str, sidecar: str = None
+) -> Path:
     """
     Writes multiple DataFrames to an Excel file with each DataFrame in a separate sheet.
 
+    Sheets are streamed row by row in constant-memory mode (see
+    scripts.utils.excel_writer), so peak memory does not grow with the size
+    of the workbook.
+
     Parameters:
     - df_dict (dict): A dictionary where keys are sheet names and values are DataFrames.
     - output_dir (Path): The directory where the Excel file will be saved.
     - file_name (str): The base name for the Excel file.
+    - sidecar (str, optional): "parquet" or "csv" to also write every sheet to
+      a file in a folder named like the workbook.
 
     Returns:
     - Path: The full path to the saved Excel file.
@@ -516,10 +933,36 @@ def save_excel(df_dict: dict, output_dir: Path, file_name: str) -> Path:
     output_file = output_dir / f"{date_str}_{file_name}.xlsx"
 
     # Write each DataFrame to its own sheet with index set to False
-    with pd.ExcelWriter(output_file) as writer:
-        logger.info("Writing DataFrames to Excel file: %s", output_file)
-        for sheet_name, df in df_dict.items():
-            logger.info("Writing sheet: %s", sheet_name)
-            df.to_excel(writer, sheet_name=sheet_name, index=False)
+    logger.info("Writing DataFrames to Excel file: %s", output_file)
+    write_workbook(df_dict, output_file, sidecar=sidecar)
 
     logger.info("Results saved to Excel file: %s", output_file)
+    return output_file
+
+
+def save_excel_many(
+    workbooks: Dict[str, dict],
+    output_dir: Path,
+    sidecar: str = None,
+    max_workers: int = None,
+) -> Dict[str, Path]:
+    """
+    Writes several independent Excel files concurrently, one worker process
+    per workbook (see save_excel).
+
+    Parameters:
+    - workbooks (dict): file_name -> df_dict, as passed to save_excel.
+    - output_dir (Path): The directory where the Excel files will be saved.
+    - sidecar (str, optional): "parquet" or "csv" sidecars, as in save_excel.
+    - max_workers (int, optional): Maximum number of worker processes.
+
+    Returns:
+    - dict: file_name -> full path to the saved Excel file.
+    """
+    jobs = [
+        (save_excel, (df_dict, output_dir, file_name), {"sidecar": sidecar})
+        for file_name, df_dict in workbooks.items()
+    ]
+    logger.info("Writing %d Excel files to %s", len(jobs), output_dir)
+    paths = write_workbooks_parallel(jobs, max_workers=max_workers)
+    return dict(zip(workbooks, paths))
@@ -0,0 +1,249 @@
+# excel_writer.py
+"""
+Constant-memory streaming Excel writer used by dataloaders.save_excel.
+
+pd.ExcelWriter keeps every cell of every sheet in memory until the workbook
+is closed, so peak memory grows with the total volume of the workbook. Here
+each sheet is streamed with XlsxWriter's ``constant_memory`` mode:
+
+* rows are emitted in order and flushed to disk as soon as the next row
+  starts, so only one row is held by XlsxWriter at a time,
+* the frame is converted to Python values one block of rows at a time, and
+  the cell writer and number format of every column are chosen once per
+  column (from its dtype) instead of once per cell,
+* the output matches DataFrame.to_excel(index=False): same bold, bordered
+  header, NaN cells left empty, inf written as "inf", datetimes formatted as
+  "YYYY-MM-DD HH:MM:SS".
+
+Independent workbooks are written concurrently in worker processes with
+write_workbooks_parallel, and every sheet can optionally get a Parquet or CSV
+sidecar for downstream code that does not need Excel.
+"""
+
+import datetime as dt
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------- #
+# Constants
+# --------------------------------------------------------------------------- #
+
+SIDECAR_FORMATS = ("parquet", "csv")
+MAX_SHEET_NAME_LENGTH = 31
+# Worksheet limits; XlsxWriter returns -1 past them instead of raising
+MAX_ROWS = 1_048_576
+MAX_COLS = 16_384
+# Rows converted to Python values at a time
+ROW_BLOCK_SIZE = 10_000
+
+# Same formats pandas uses with the xlsxwriter engine
+HEADER_FORMAT = {"bold": True, "border": 1, "align": "center", "valign": "top"}
+DATETIME_FORMAT = "YYYY-MM-DD HH:MM:SS"
+DATE_FORMAT = "YYYY-MM-DD"
+
+
+# --------------------------------------------------------------------------- #
+# Helpers
+# --------------------------------------------------------------------------- #
+
+
+def _sheet_names(names: List[str]) -> List[str]:
+    """Return Excel-safe, unique sheet names (max 31 characters)."""
+    safe = []
+    for name in names:
+        base = str(name)[:MAX_SHEET_NAME_LENGTH]
+        candidate, n = base, 1
+        while candidate.lower() in {s.lower() for s in safe}:
+            suffix = f"~{n}"
+            candidate = base[: MAX_SHEET_NAME_LENGTH - len(suffix)] + suffix
+            n += 1
+        if candidate != str(name):
+            logger.warning("Sheet name '%s' written as '%s'", name, candidate)
+        safe.append(candidate)
+    return safe
+
+
+def _write_any(worksheet, row: int, col: int, value, cell_format) -> None:
+    """Fallback writer for object columns holding mixed Python values."""
+    if isinstance(value, str):
+        worksheet.write_string(row, col, value)
+    elif isinstance(value, (bool, np.bool_)):
+        worksheet.write_boolean(row, col, bool(value))
+    elif isinstance(value, (int, float, np.integer, np.floating)):
+        _write_float(worksheet, row, col, float(value), None)
+    elif isinstance(value, dt.datetime):
+        worksheet.write_datetime(row, col, value, cell_format["datetime"])
+    elif isinstance(value, dt.date):
+        worksheet.write_datetime(row, col, value, cell_format["date"])
+    else:
+        worksheet.write_string(row, col, str(value))
+
+
+def _write_float(worksheet, row: int, col: int, value: float, _format) -> None:
+    if math.isinf(value):
+        worksheet.write_string(row, col, "inf" if value > 0 else "-inf")
+    else:
+        worksheet.write_number(row, col, value)
+
+
+def _column_plan(
+    series: pd.Series, formats: Dict[str, object]
+) -> Tuple[Callable, object]:
+    """Return the (cell writer, cell format) used for every cell of *series*."""
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    if pd.api.types.is_bool_dtype(dtype):
+        return (lambda ws, r, c, v, f: ws.write_boolean(r, c, bool(v))), None
+    if pd.api.types.is_numeric_dtype(dtype):
+        return _write_float, None
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return (lambda ws, r, c, v, f: ws.write_datetime(r, c, v, f)), formats[
+            "datetime"
+        ]
+    if pd.api.types.is_string_dtype(dtype) and not dtype == object:
+        return (lambda ws, r, c, v, f: ws.write_string(r, c, v)), None
+    return _write_any, formats
+
+
+def _block_values(block: pd.DataFrame) -> List[list]:
+    """Return the columns of *block* as Python lists, with None for missing."""
+    columns = []
+    for _, series in block.items():
+        # datetimes become Timestamps, which XlsxWriter accepts as datetimes
+        values = series.astype(object).tolist()
+        missing = series.isna().to_numpy()
+        columns.append(
+            [None if is_missing else v for v, is_missing in zip(values, missing)]
+        )
+    return columns
+
+
+def _check_sheet_size(df: pd.DataFrame) -> None:
+    """Raise like DataFrame.to_excel if *df* (plus its header) does not fit a sheet."""
+    num_rows, num_cols = len(df) + 1, len(df.columns)
+    if num_rows > MAX_ROWS or num_cols > MAX_COLS:
+        raise ValueError(
+            f"This sheet is too large! Your sheet size is: {num_rows}, {num_cols} "
+            f"Max sheet size is: {MAX_ROWS}, {MAX_COLS}"
+        )
+
+
+def _write_sheet(worksheet, df: pd.DataFrame, formats) -> None:
+    header_format = formats["header"]
+    for col, name in enumerate(df.columns):
+        worksheet.write_string(0, col, str(name), header_format)
+
+    plans = [_column_plan(df[col], formats) for col in df.columns]
+    for start in range(0, len(df), ROW_BLOCK_SIZE):
+        block = df.iloc[start : start + ROW_BLOCK_SIZE]
+        columns = _block_values(block)
+        for offset, row_values in enumerate(zip(*columns)):
+            row = start + offset + 1
+            for col, value in enumerate(row_values):
+                if value is None:
+                    continue  # pandas leaves NaN cells empty
+                writer, cell_format = plans[col]
+                writer(worksheet, row, col, value, cell_format)
+
+
+def _write_sidecar(df: pd.DataFrame, path: Path, sidecar: str) -> None:
+    try:
+        if sidecar == "parquet":
+            try:
+                df.to_parquet(path, index=False)
+            except (TypeError, ValueError):
+                # mixed object columns (e.g. lists next to strings): store as text
+                object_cols = df.columns[df.dtypes == object]
+                df.astype({col: "string" for col in object_cols}).to_parquet(
+                    path, index=False
+                )
+        else:
+            df.to_csv(path, index=False)
+    except Exception:
+        # the workbook is the deliverable: never fail it because of a sidecar
+        logger.warning("Could not write %s sidecar %s", sidecar, path, exc_info=True)
+
+
+# --------------------------------------------------------------------------- #
+# Public API
+# --------------------------------------------------------------------------- #
+
+
+def write_workbook(
+    df_dict: Dict[str, pd.DataFrame],
+    output_file: Path,
+    sidecar: Optional[str] = None,
+) -> Path:
+    """
+    Stream *df_dict* (sheet name -> DataFrame) to *output_file* in
+    constant-memory mode, one sheet per DataFrame, without the index.
+
+    Parameters:
+        df_dict (dict): Sheet name -> DataFrame.
+        output_file (Path): Workbook to write (.xlsx).
+        sidecar (str, optional): "parquet" or "csv": also write every sheet to
+            ``<output_file stem>/<sheet>.<ext>``.
+
+    Returns:
+        Path: *output_file*.
+
+    Raises:
+        ValueError: If a DataFrame does not fit an Excel sheet (checked before
+            the workbook is created), or *sidecar* is unknown.
+    """
+    if sidecar is not None and sidecar not in SIDECAR_FORMATS:
+        raise ValueError(
+            f"Unknown sidecar '{sidecar}', expected one of {SIDECAR_FORMATS}"
+        )
+    for df in df_dict.values():
+        _check_sheet_size(df)
+    output_file = Path(output_file)
+    sidecar_dir = output_file.with_suffix("")
+    if sidecar is not None:
+        sidecar_dir.mkdir(parents=True, exist_ok=True)
+
+    workbook = xlsxwriter.Workbook(str(output_file), {"constant_memory": True})
+    formats = {
+        "header": workbook.add_format(HEADER_FORMAT),
+        "datetime": workbook.add_format({"num_format": DATETIME_FORMAT}),
+        "date": workbook.add_format({"num_format": DATE_FORMAT}),
+    }
+    try:
+        for sheet_name, (name, df) in zip(_sheet_names(list(df_dict)), df_dict.items()):
+            logger.info("Writing sheet: %s (%d rows)", sheet_name, len(df))
+            worksheet = workbook.add_worksheet(sheet_name)
+            _write_sheet(worksheet, df, formats)
+            if sidecar is not None:
+                _write_sidecar(df, sidecar_dir / f"{sheet_name}.{sidecar}", sidecar)
+    finally:
+        workbook.close()
+    return output_file
+
+
+def write_workbooks_parallel(
+    jobs: List[Tuple[Callable, tuple, dict]],
+    max_workers: Optional[int] = None,
+) -> list:
+    """
+    Run independent workbook writes (``(func, args, kwargs)`` tuples) in
+    worker processes and return their results in job order. A single job, or
+    max_workers=1, runs in this process.
+    """
+    max_workers = min(len(jobs), max_workers or os.cpu_count() or 1)
+    if max_workers <= 1:
+        return [func(*args, **kwargs) for func, args, kwargs in jobs]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(func, *args, **kwargs) for func, args, kwargs in jobs]
+        return [future.result() for future in futures]
@@ -0,0 +1,261 @@
+# load_metrics.py
+"""
+Per-run registry of what every dataloader read and how long it took.
+
+Each ``load_*`` function in dataloaders is wrapped with @instrumented_loader,
+which appends one record per call to the registry:
+
+    loader        function name (nested loads keep their parent's name)
+    source        file the loader read (path or WorkbookSession)
+    wall_s        wall time of the call
+    bytes_read    bytes read from disk (file size, or the Parquet / snapshot
+                  size on a cache hit, 0 when served from memory)
+    cache         "hit" / "miss" where a cache applies, else null
+    rows, columns shape of the returned frame(s)
+    memory_bytes  DataFrame.memory_usage(deep=True).sum() of the result
+
+get_config enables the registry for every stage script, and it is dumped as
+``<log dir>/<script>_<YYYYMMDD_HHMMSS>_loads.json`` when the process exits,
+next to the run's log file. Comparing these files across monthly runs shows
+which input dominates the load phase and how it evolves.
+"""
+
+import atexit
+import functools
+import inspect
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------- #
+# Registry
+# --------------------------------------------------------------------------- #
+
+_RECORDS: List[Dict[str, Any]] = []
+_RECORDS_LOCK = threading.Lock()
+# Records being measured by the current thread (innermost last)
+_ACTIVE = threading.local()
+_RUN_INFO: Dict[str, Any] = {}
+
+
+def _active_stack() -> list:
+    if not hasattr(_ACTIVE, "stack"):
+        _ACTIVE.stack = []
+    return _ACTIVE.stack
+
+
+# --------------------------------------------------------------------------- #
+# Helpers
+# --------------------------------------------------------------------------- #
+
+
+def _source_path(source: Any) -> Optional[Path]:
+    path = getattr(source, "file_path", source)  # WorkbookSession
+    if isinstance(path, (str, os.PathLike)):
+        return Path(path)
+    return None
+
+
+def _file_size(path: Optional[Path]) -> Optional[int]:
+    try:
+        return path.stat().st_size if path is not None else None
+    except OSError:
+        return None
+
+
+def _result_stats(result: Any) -> Dict[str, int]:
+    """Return rows / columns / memory_bytes summed over the frames in *result*."""
+    stats = {"rows": 0, "columns": 0, "memory_bytes": 0}
+    if isinstance(result, pd.DataFrame):
+        stats["rows"] = len(result)
+        stats["columns"] = result.shape[1]
+        stats["memory_bytes"] = int(result.memory_usage(deep=True).sum())
+    elif isinstance(result, dict):
+        for value in result.values():
+            for key, n in _result_stats(value).items():
+                stats[key] += n
+        if not any(isinstance(v, (pd.DataFrame, dict)) for v in result.values()):
+            stats["rows"] = len(result)  # plain mapping, e.g. portfolio dicts
+    elif isinstance(result, (list, tuple)):
+        for value in result:
+            for key, n in _result_stats(value).items():
+                stats[key] += n
+    elif hasattr(result, "_arrays"):  # CrossreferenceIndex
+        stats["rows"] = len(result)
+        stats["memory_bytes"] = sum(a.nbytes for a in result._arrays.values())
+    return stats
+
+
+# --------------------------------------------------------------------------- #
+# Public API
+# --------------------------------------------------------------------------- #
+
+
+def record_io(bytes_read: Optional[int] = None, cache: Optional[str] = None) -> None:
+    """
+    Annotate the load currently measured on this thread, e.g. from a cache
+    layer: ``record_io(bytes_read=entry.stat().st_size, cache="hit")``.
+    No-op outside an instrumented loader.
+    """
+    stack = _active_stack()
+    if not stack:
+        return
+    record = stack[-1]
+    if bytes_read is not None:
+        record["bytes_read"] = (record.get("bytes_read") or 0) + int(bytes_read)
+    if cache is not None:
+        record["cache"] = cache
+
+
+def instrumented_loader(source_arg: str = "file_path") -> Callable:
+    """
+    Decorator recording one registry entry per call of a loader.
+
+    Parameters:
+        source_arg (str): Name of the argument holding the file (or
+            WorkbookSession) the loader reads.
+    """
+
+    def decorator(loader: Callable) -> Callable:
+        signature = inspect.signature(loader)
+
+        @functools.wraps(loader)
+        def wrapper(*args, **kwargs):
+            try:
+                source = signature.bind_partial(*args, **kwargs).arguments.get(
+                    source_arg
+                )
+            except TypeError:
+                source = None
+            stack = _active_stack()
+            record = {
+                "loader": loader.__name__,
+                "parent": stack[-1]["loader"] if stack else None,
+                "source": str(getattr(source, "file_path", source)),
+                "started": datetime.now().isoformat(timespec="milliseconds"),
+                "pid": os.getpid(),
+                "thread": threading.current_thread().name,
+                "cache": None,
+                "error": None,
+                "rows": None,
+                "columns": None,
+                "memory_bytes": None,
+            }
+            stack.append(record)
+            start = time.perf_counter()
+            try:
+                result = loader(*args, **kwargs)
+            except Exception as e:
+                record["error"] = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                record["wall_s"] = round(time.perf_counter() - start, 4)
+                stack.pop()
+                if "bytes_read" not in record:
+                    record["bytes_read"] = _file_size(_source_path(source))
+                with _RECORDS_LOCK:
+                    _RECORDS.append(record)
+            record.update(_result_stats(result))
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def load_records() -> List[Dict[str, Any]]:
+    """Return a copy of the records of this run."""
+    with _RECORDS_LOCK:
+        return [dict(record) for record in _RECORDS]
+
+
+def take_records(since: int = 0) -> List[Dict[str, Any]]:
+    """Remove and return the records from index *since* (for worker processes)."""
+    with _RECORDS_LOCK:
+        taken = _RECORDS[since:]
+        del _RECORDS[since:]
+    return taken
+
+
+def record_count() -> int:
+    with _RECORDS_LOCK:
+        return len(_RECORDS)
+
+
+def merge_records(records: List[Dict[str, Any]]) -> None:
+    """Add records collected in a worker process to this run's registry."""
+    with _RECORDS_LOCK:
+        _RECORDS.extend(records)
+
+
+def summarise_records(records: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Return the top-level loads, slowest first."""
+    top_level = [r for r in records if r["parent"] is None]
+    if not top_level:
+        return pd.DataFrame()
+    return (
+        pd.DataFrame(top_level)[
+            ["loader", "source", "wall_s", "bytes_read", "cache", "rows", "columns"]
+        ]
+        .sort_values("wall_s", ascending=False)
+        .reset_index(drop=True)
+    )
+
+
+def dump_load_metrics(json_path: Optional[Path] = None) -> Optional[Path]:
+    """
+    Write this run's records to *json_path* (defaults to the path given to
+    enable_load_metrics) and log the slowest loads. Returns the path written.
+    """
+    json_path = json_path or _RUN_INFO.get("json_path")
+    records = load_records()
+    if json_path is None or not records:
+        return None
+    json_path = Path(json_path)
+    payload = {
+        **{k: v for k, v in _RUN_INFO.items() if k != "json_path"},
+        "finished": datetime.now().isoformat(timespec="seconds"),
+        "total_wall_s": round(
+            sum(r["wall_s"] for r in records if r["parent"] is None), 4
+        ),
+        "records": records,
+    }
+    try:
+        json_path.parent.mkdir(parents=True, exist_ok=True)
+        with json_path.open("w", encoding="utf-8") as fh:
+            json.dump(payload, fh, indent=2, default=str)
+    except OSError:
+        logger.warning("Could not write load metrics to %s", json_path, exc_info=True)
+        return None
+    summary = summarise_records(records)
+    logger.info(
+        "Load metrics written to %s; slowest loads:\n%s",
+        json_path,
+        summary.head(10).to_string(index=False),
+    )
+    return json_path
+
+
+def enable_load_metrics(json_path: Path, **run_info) -> None:
+    """
+    Dump the registry to *json_path* when the process exits. Extra keyword
+    arguments (script name, feed date, read engine ...) are stored in the JSON.
+    """
+    if multiprocessing.parent_process() is not None:
+        return  # worker processes hand their records back to the parent
+    first_call = "json_path" not in _RUN_INFO
+    _RUN_INFO.update(run_info, json_path=Path(json_path))
+    _RUN_INFO.setdefault("started", datetime.now().isoformat(timespec="seconds"))
+    if first_call:
+        atexit.register(dump_load_metrics)
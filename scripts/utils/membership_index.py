@@ -0,0 +1,220 @@
+# membership_index.py
+"""
+Inverted issuer -> portfolio -> strategy membership index.
+
+load_portfolios returns portfolio_dict / benchmark_dict, keyed by portfolio
+(or benchmark) id with the aladdin_ids it holds and its strategy. The deltas
+need the inverse, per issuer. MembershipIndex builds it once, as CSR arrays:
+
+    issuers          pd.Index of aladdin_ids (row i of the index)
+    indptr           memberships of issuer i are entries indptr[i]:indptr[i+1]
+    portfolio_codes  per entry, position in ``portfolios``
+    strategy_codes   per entry, position in ``strategies``
+
+A benchmark mapped to several strategies gives one entry per strategy.
+Lookups are vectorised over a column of aladdin_ids:
+
+>>> portfolio_index = MembershipIndex.from_dict(portfolio_dict)
+>>> portfolio_index.counts(df["aladdin_id"])           # memberships per row
+>>> portfolio_index.strategy_masks(df["aladdin_id"], STRATEGY_MASK)
+>>> portfolio_index.pairs(df["aladdin_id"])            # [(portfolio_id, strategy), ...]
+>>> portfolio_index.join(df)                           # one row per membership
+"""
+
+import logging
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from .strategy_mask import MASK_DTYPE, StrategyBitmask
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------------------------------------------- #
+# Helpers
+# --------------------------------------------------------------------------- #
+
+
+def _strategy_names(value) -> List[str]:
+    """strategy_name of a portfolio_dict entry: one name, a list of names, or ""."""
+    if isinstance(value, (list, tuple)):
+        return [name for name in value if name]
+    return [value] if value else []
+
+
+# --------------------------------------------------------------------------- #
+# Public API
+# --------------------------------------------------------------------------- #
+
+
+class MembershipIndex:
+    """
+    CSR index of the (portfolio_id, strategy) memberships of every issuer.
+
+    Attributes:
+        issuers (pd.Index): aladdin_ids with at least one membership.
+        indptr (np.ndarray): Entry offsets per issuer (len(issuers) + 1).
+        portfolio_codes, strategy_codes (np.ndarray): Per-entry codes.
+        portfolios, strategies (np.ndarray): Labels of the codes.
+    """
+
+    def __init__(
+        self,
+        issuers: pd.Index,
+        indptr: np.ndarray,
+        portfolio_codes: np.ndarray,
+        strategy_codes: np.ndarray,
+        portfolios: np.ndarray,
+        strategies: np.ndarray,
+    ):
+        self.issuers = issuers
+        self.indptr = indptr
+        self.portfolio_codes = portfolio_codes
+        self.strategy_codes = strategy_codes
+        self.portfolios = portfolios
+        self.strategies = strategies
+
+    def __repr__(self) -> str:
+        return (
+            f"MembershipIndex({len(self.issuers)} issuers, "
+            f"{len(self.portfolios)} portfolios, {len(self.strategy_codes)} entries)"
+        )
+
+    def __len__(self) -> int:
+        return len(self.issuers)
+
+    @classmethod
+    def from_dict(cls, portfolio_dict: Dict[str, dict]) -> "MembershipIndex":
+        """
+        Build the index from a portfolio_dict / benchmark_dict (see load_portfolios).
+
+        Entries of an issuer keep the order of *portfolio_dict*.
+        """
+        aladdin_ids, portfolio_ids, strategy_names = [], [], []
+        for portfolio_id, data in portfolio_dict.items():
+            names = _strategy_names(data.get("strategy_name"))
+            for aladdin_id in data.get("aladdin_id", []):
+                for name in names:
+                    aladdin_ids.append(aladdin_id)
+                    portfolio_ids.append(portfolio_id)
+                    strategy_names.append(name)
+
+        issuer_codes, issuers = pd.factorize(pd.Series(aladdin_ids, dtype=object))
+        portfolio_codes, portfolios = pd.factorize(
+            pd.Series(portfolio_ids, dtype=object)
+        )
+        strategy_codes, strategies = pd.factorize(
+            pd.Series(strategy_names, dtype=object)
+        )
+        order = np.argsort(issuer_codes, kind="stable")
+        indptr = np.zeros(len(issuers) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(issuer_codes, minlength=len(issuers)), out=indptr[1:])
+
+        index = cls(
+            pd.Index(issuers, name="aladdin_id"),
+            indptr,
+            portfolio_codes[order].astype(np.int32),
+            strategy_codes[order].astype(np.int32),
+            np.asarray(portfolios, dtype=object),
+            np.asarray(strategies, dtype=object),
+        )
+        logger.info("Built %r", index)
+        return index
+
+    def _slices(self, positions: np.ndarray):
+        """First entry and number of entries per position (0 entries if -1)."""
+        found = positions >= 0
+        safe = np.where(found, positions, 0)
+        starts = self.indptr[safe]
+        ends = np.take(self.indptr, safe + 1, mode="clip")  # empty index: no row 1
+        counts = np.where(found, ends - starts, 0)
+        return starts, counts
+
+    def positions(self, aladdin_ids: Iterable) -> np.ndarray:
+        """Row of every aladdin_id in the index (-1 if it has no membership)."""
+        return self.issuers.get_indexer(pd.Index(aladdin_ids, dtype=object))
+
+    def counts(self, aladdin_ids: Iterable) -> np.ndarray:
+        """Number of memberships of every aladdin_id."""
+        return self._slices(self.positions(aladdin_ids))[1]
+
+    def strategy_masks(
+        self, aladdin_ids: Iterable, codec: StrategyBitmask
+    ) -> np.ndarray:
+        """
+        Bitmask (over *codec*'s strategies) of the strategies of the portfolios
+        holding every aladdin_id. Strategies outside the codec are ignored.
+        """
+        positions = self.positions(aladdin_ids)
+        masks = np.zeros(len(positions), dtype=MASK_DTYPE)
+        if len(self.strategy_codes):
+            # every issuer has at least one entry, so no reduceat segment is empty
+            issuer_masks = np.bitwise_or.reduceat(
+                self.entry_bits(codec), self.indptr[:-1]
+            )
+            found = positions >= 0
+            masks[found] = issuer_masks[positions[found]]
+        return masks
+
+    def _expand(self, positions: np.ndarray):
+        starts, counts = self._slices(positions)
+        rows = np.repeat(np.arange(len(counts)), counts)
+        # entries of row r: starts[r], starts[r] + 1, ... (counts[r] of them)
+        offsets = np.cumsum(counts) - counts
+        entries = np.repeat(starts - offsets, counts) + np.arange(len(rows))
+        return rows, entries
+
+    def expand(self, aladdin_ids: Iterable):
+        """
+        (row, entry) of every membership of every aladdin_id: rows are
+        positions in *aladdin_ids*, in order, entries keep the index order.
+        """
+        return self._expand(self.positions(aladdin_ids))
+
+    def entry_bits(self, codec: StrategyBitmask) -> np.ndarray:
+        """Strategy bit (in *codec*) of every entry, 0 outside the codec."""
+        return codec.bits(self.strategies)[self.strategy_codes]
+
+    def pairs(
+        self,
+        aladdin_ids: Iterable,
+        masks: Iterable[int] = None,
+        codec: StrategyBitmask = None,
+    ) -> List[list]:
+        """
+        (portfolio_id, strategy) pairs of every aladdin_id. If *masks* is
+        given, only the pairs whose strategy bit (in *codec*) is set are kept.
+        """
+        positions = self.positions(aladdin_ids)
+        rows, entries = self._expand(positions)
+        if masks is not None:
+            keep = (self.entry_bits(codec)[entries] & np.asarray(masks)[rows]) != 0
+            rows, entries = rows[keep], entries[keep]
+        labels = list(
+            zip(
+                self.portfolios[self.portfolio_codes[entries]].tolist(),
+                self.strategies[self.strategy_codes[entries]].tolist(),
+            )
+        )
+        ends = np.cumsum(np.bincount(rows, minlength=len(positions))).tolist()
+        return [labels[start:end] for start, end in zip([0] + ends[:-1], ends)]
+
+    def join(
+        self,
+        df: pd.DataFrame,
+        on: str = "aladdin_id",
+        id_name: str = "portfolio_id",
+        strategy_name: str = "strategy_name",
+    ) -> pd.DataFrame:
+        """
+        Inner join of *df* with the memberships of its *on* column: one row per
+        (row of df, membership), with columns *id_name* and *strategy_name* added.
+        """
+        rows, entries = self.expand(df[on])
+        joined = df.iloc[rows].copy()
+        joined[id_name] = self.portfolios[self.portfolio_codes[entries]]
+        joined[strategy_name] = self.strategies[self.strategy_codes[entries]]
+        return joined
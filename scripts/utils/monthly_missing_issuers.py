@@ -17,6 +17,7 @@ import pandas as pd
 from datetime import datetime
 
 
+from . import read_engine
 from .config import get_config
 
 # -------------------------------------------------
@@ -46,11 +47,12 @@ def month_tag(f: Path) -> str:
 
 def load_df(f: Path) -> pd.DataFrame:
     """Read only the needed columns and index by permid."""
-    df = pd.read_csv(
+    df = read_engine.read_csv(
         f,
         usecols=["permid", "issuer_name"],
-        dtype={"permid": "string"},  # choose plain string to avoid pyarrow dep
+        dtype={"permid": "string"},
     )
+    df = read_engine.to_numpy_dtypes(df)
     return df.set_index("permid", drop=False)
 
 
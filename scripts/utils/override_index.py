@@ -0,0 +1,305 @@
+# override_index.py
+"""
+Keyed lookup structure over the overrides database.
+
+Every stage used to resolve overrides its own way: a groupby loop into nested
+dicts (create_override_dict), a boolean scan of the overrides per delta row
+(process_data_by_strategy), a boolean mask over the feed per override
+(_02_apply_ovr) and a melt + merge (update_ovr_db_active_col). An
+OverrideIndex is built once from load_overrides and resolves overrides
+against a whole frame with hash joins, so the cost grows with the number of
+rows and overrides, not with their product:
+
+>>> override_index = OverrideIndex.from_frame(overrides)
+>>> override_index.conflicts                   # same issuer / target, several values
+>>> override_index.values(df, "str_001_s")     # ovr_value per row of df (NaN if none)
+>>> override_index.apply(df)                   # write every override into df
+>>> override_index.pairs("permid")             # (_key, _strategy, value) table
+>>> override_index.to_dict()                   # {aladdin_id: {ovr_target: ovr_value}}
+
+Matching follows _02_apply_ovr: an override is matched on the first of its
+keys (aladdin_id, then permid, then clarityid) found in the frame, and when
+several overrides hit the same cell the last one (in workbook order) wins.
+Keys are compared in their canonical type (see scripts.utils.schema), so a
+feed loaded with its permids as delivered text still matches.
+"""
+
+import logging
+from typing import Dict, Iterable, List, Mapping
+
+import numpy as np
+import pandas as pd
+
+from .override_store import ISSUER_KEY_COLUMNS
+from .schema import to_id_type
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------------------------------------------- #
+# Helpers
+# --------------------------------------------------------------------------- #
+
+
+def _key_pairs(frame_keys: pd.Series, ovr_keys: pd.Series) -> pd.DataFrame:
+    """(row, override) positions with equal, non-null keys (one hash join)."""
+    codes, _ = pd.factorize(pd.Index(frame_keys).append(pd.Index(ovr_keys)))
+    frame_codes, ovr_codes = codes[: len(frame_keys)], codes[len(frame_keys) :]
+    rows = pd.DataFrame({"code": frame_codes, "row": np.arange(len(frame_codes))})
+    overrides = pd.DataFrame({"code": ovr_codes, "pos": np.arange(len(ovr_codes))})
+    return rows[rows["code"] >= 0].merge(overrides[overrides["code"] >= 0], on="code")
+
+
+# --------------------------------------------------------------------------- #
+# Public API
+# --------------------------------------------------------------------------- #
+
+
+class OverrideIndex:
+    """
+    The overrides, with their targets factorized and conflicts detected.
+
+    Attributes:
+        overrides (pd.DataFrame): The overrides, in workbook order (RangeIndex).
+        key_cols (list[str]): Issuer key columns, by matching priority.
+        target_col, value_col (str): Strategy and value columns.
+        targets (pd.Index): Distinct ovr_target values.
+        target_codes (np.ndarray): Position of every override's target in
+            ``targets`` (-1 if it has none; such overrides never match).
+        conflicts (pd.DataFrame): Overrides of an (issuer, target) with more
+            than one distinct value, sorted by issuer and target.
+    """
+
+    def __init__(
+        self,
+        overrides: pd.DataFrame,
+        key_cols: List[str],
+        target_col: str,
+        value_col: str,
+    ):
+        self.overrides = overrides
+        self.key_cols = list(key_cols)
+        self.target_col = target_col
+        self.value_col = value_col
+        self.target_codes, targets = pd.factorize(overrides[target_col])
+        self.targets = pd.Index(targets)
+        self._values = overrides[value_col].to_numpy(dtype=object)
+        self._keys = {col: to_id_type(overrides[col]) for col in self.key_cols}
+        self.conflicts = self._find_conflicts()
+
+    def __repr__(self) -> str:
+        return (
+            f"OverrideIndex({len(self.overrides)} overrides, "
+            f"{len(self.targets)} targets, {len(self.conflicts)} conflicting)"
+        )
+
+    def __len__(self) -> int:
+        return len(self.overrides)
+
+    @classmethod
+    def from_frame(
+        cls,
+        overrides: pd.DataFrame,
+        key_cols: List[str] = ISSUER_KEY_COLUMNS,
+        target_col: str = "ovr_target",
+        value_col: str = "ovr_value",
+    ) -> "OverrideIndex":
+        """
+        Build the index from the frame returned by load_overrides.
+
+        Parameters:
+            overrides (pd.DataFrame): One override per row, in workbook order.
+            key_cols (list[str]): Issuer keys by priority; those missing from
+                *overrides* are skipped, at least one is required.
+            target_col, value_col (str): Strategy and value columns.
+        """
+        key_cols = [col for col in key_cols if col in overrides.columns]
+        if not key_cols:
+            raise ValueError(
+                f"overrides have none of the key columns {ISSUER_KEY_COLUMNS}"
+            )
+        index = cls(overrides.reset_index(drop=True), key_cols, target_col, value_col)
+        logger.info("Built %r", index)
+        if not index.conflicts.empty:
+            logger.warning(
+                f"{len(index.conflicts)} overrides give different values to the "
+                f"same issuer and target; the last one wins:\n"
+                f"{index.conflicts.head(10)}"
+            )
+        return index
+
+    def _find_conflicts(self) -> pd.DataFrame:
+        # issuer of an override: its first non-null key (canonical, as matched),
+        # prefixed by the key name
+        issuer = pd.Series(np.nan, index=self.overrides.index, dtype=object)
+        for col in reversed(self.key_cols):
+            ids = self._keys[col].astype("string")
+            issuer = (col + ":" + ids).astype(object).where(ids.notna(), issuer)
+        grouped = pd.DataFrame(
+            {"issuer": issuer, "target": self.target_codes, "value": self._values}
+        )
+        grouped = grouped[grouped["issuer"].notna() & (grouped["target"] >= 0)]
+        n_values = grouped.groupby(["issuer", "target"])["value"].transform("nunique")
+        rows = grouped.index[n_values > 1]
+        columns = self.key_cols + [self.target_col, self.value_col]
+        return (
+            self.overrides.loc[rows, columns]
+            .sort_values(self.key_cols[:1] + [self.target_col], kind="stable")
+            .copy()
+        )
+
+    def levels(self, df: pd.DataFrame, present: Mapping[str, Iterable] = None):
+        """
+        Key column every override is matched on in *df* (None if unmatched).
+
+        Parameters:
+            df (pd.DataFrame): Frame the overrides are applied to.
+            present (dict, optional): {key column: keys present in the whole
+                feed}, for frames that are one chunk of it. Key columns not
+                given are looked up in *df*.
+        """
+        return self._levels(self._frame_keys(df), present)
+
+    def _frame_keys(self, df: pd.DataFrame) -> Dict[str, pd.Series]:
+        """Key columns of *df*, in their canonical type."""
+        return {col: to_id_type(df[col]) for col in self.key_cols if col in df.columns}
+
+    def _levels(
+        self, frame_keys: Dict[str, pd.Series], present: Mapping[str, Iterable]
+    ) -> np.ndarray:
+        present = present or {}
+        levels = np.full(len(self.overrides), None, dtype=object)
+        unmatched = np.ones(len(self.overrides), dtype=bool)
+        for col in self.key_cols:
+            if col in present:
+                keys = to_id_type(pd.Series(present[col], name=col))
+            elif col in frame_keys:
+                keys = pd.Index(frame_keys[col].dropna())
+            else:
+                continue
+            ovr_keys = self._keys[col]
+            found = unmatched & (ovr_keys.notna() & ovr_keys.isin(keys)).to_numpy()
+            levels[found] = col
+            unmatched &= ~found
+        return levels
+
+    def match(
+        self, df: pd.DataFrame, present: Mapping[str, Iterable] = None
+    ) -> pd.DataFrame:
+        """
+        Resolved overrides of *df*: one (row, target, value) per overridden
+        cell, *row* being a position in *df*. The last matching override wins.
+        """
+        frame_keys = self._frame_keys(df)
+        levels = self._levels(frame_keys, present)
+        pairs = []
+        for col in self.key_cols:
+            selected = np.flatnonzero((levels == col) & (self.target_codes >= 0))
+            if not len(selected) or col not in frame_keys:
+                continue
+            hits = _key_pairs(frame_keys[col], self._keys[col].iloc[selected])
+            pairs.append(
+                pd.DataFrame(
+                    {"row": hits["row"].to_numpy(), "pos": selected[hits["pos"]]}
+                )
+            )
+        if not pairs:
+            return pd.DataFrame(
+                {
+                    "row": pd.Series(dtype=np.intp),
+                    "target": pd.Series(dtype=object),
+                    "value": pd.Series(dtype=object),
+                }
+            )
+        pairs = pd.concat(pairs, ignore_index=True)
+        pairs["code"] = self.target_codes[pairs["pos"]]
+        pairs = pairs.sort_values("pos", kind="stable").drop_duplicates(
+            ["row", "code"], keep="last"
+        )
+        return pd.DataFrame(
+            {
+                "row": pairs["row"].to_numpy(),
+                "target": self.targets.take(pairs["code"]).to_numpy(dtype=object),
+                "value": self._values[pairs["pos"]],
+            }
+        )
+
+    def values(
+        self,
+        df: pd.DataFrame,
+        target: str,
+        present: Mapping[str, Iterable] = None,
+        fill=np.nan,
+    ) -> np.ndarray:
+        """ovr_value of *target* for every row of *df* (*fill* if not overridden)."""
+        matched = self.match(df, present)
+        matched = matched[matched["target"] == target]
+        values = np.full(len(df), fill, dtype=object)
+        values[matched["row"].to_numpy()] = matched["value"].to_numpy()
+        return values
+
+    def apply(
+        self, df: pd.DataFrame, present: Mapping[str, Iterable] = None
+    ) -> pd.DataFrame:
+        """
+        Write every override into *df* (in place) and return it. Target
+        columns missing from *df* are added, as _02_apply_ovr always did.
+        """
+        matched = self.match(df, present)
+        for target, cells in matched.groupby("target", sort=False):
+            column = (
+                df[target].to_numpy(dtype=object, copy=True)
+                if target in df.columns
+                else np.full(len(df), np.nan, dtype=object)
+            )
+            column[cells["row"].to_numpy()] = cells["value"].to_numpy()
+            df[target] = column
+        return df
+
+    def pairs(self, key_col: str) -> pd.DataFrame:
+        """
+        (_key, _strategy, value) table of the overrides keyed on *key_col*
+        alone, one row per (key, target); the last override wins.
+        """
+        table = pd.DataFrame(
+            {
+                "_key": self.overrides[key_col].to_numpy(dtype=object),
+                "_strategy": self.overrides[self.target_col].to_numpy(dtype=object),
+                "value": self._values,
+            }
+        )
+        table = table[
+            self.overrides[key_col].notna().to_numpy() & (self.target_codes >= 0)
+        ]
+        return table.drop_duplicates(subset=["_key", "_strategy"], keep="last")
+
+    def to_dict(self, key_col: str = "aladdin_id") -> Dict[object, Dict[str, object]]:
+        """{key: {ovr_target: ovr_value}} over *key_col*; the last override wins."""
+        ovr_dict = {}
+        table = self.pairs(key_col)
+        for key, target, value in zip(
+            table["_key"].tolist(), table["_strategy"].tolist(), table["value"].tolist()
+        ):
+            ovr_dict.setdefault(key, {})[target] = value
+        return ovr_dict
+
+    def feed_values(self, df: pd.DataFrame, key_col: str = "aladdin_id") -> np.ndarray:
+        """
+        Value of every override's target column in *df*, at the first row of
+        *df* with the override's *key_col* (NaN if none), aligned to
+        ``overrides``.
+        """
+        feed_keys = df[key_col]
+        first = np.flatnonzero(feed_keys.notna() & ~feed_keys.duplicated())
+        ovr_keys = self.overrides[key_col]
+        rows = pd.Index(feed_keys.iloc[first]).get_indexer(ovr_keys)
+        rows = np.where((rows >= 0) & ovr_keys.notna().to_numpy(), first[rows], -1)
+
+        values = np.full(len(self.overrides), np.nan, dtype=object)
+        for code, target in enumerate(self.targets):
+            if target not in df.columns:
+                continue
+            selected = np.flatnonzero((self.target_codes == code) & (rows >= 0))
+            values[selected] = df[target].to_numpy(dtype=object)[rows[selected]]
+        return values
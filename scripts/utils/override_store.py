@@ -0,0 +1,413 @@
+# override_store.py
+"""
+Versioned columnar snapshots of the overrides database (overrides_db.xlsx).
+
+load_overrides used to run pd.read_excel on the workbook in every stage. The
+store keeps Parquet snapshots in the (git-ignored) cache instead::
+
+    <repo_root>/cache/overrides/overrides_db_<path hash>/
+        manifest.json              versions, newest last
+        v0001_<fingerprint>.parquet
+        v0002_<fingerprint>.parquet
+        ...
+
+The workbook is only parsed when its content fingerprint is not the latest
+snapshot's; otherwise the latest snapshot is read (projected to the
+requested columns). Every new snapshot is a new version, and diff() returns
+the added, removed and changed overrides between two versions, so later
+stages can restrict their work to the issuers whose overrides changed.
+
+Example
+-------
+>>> store = OverrideStore(OVR_PATH)
+>>> overrides = store.load(columns=["permid", "ovr_target", "ovr_value"])
+>>> delta = store.diff()                  # previous version -> latest
+>>> delta.summary()
+{'added': 3, 'removed': 1, 'changed': 2}
+>>> df_to_redo = df[delta.affects(df)]
+"""
+
+import hashlib
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .load_metrics import record_io
+from .parquet_cache import CACHE_DIR, file_fingerprint, temp_path_for
+from .schema import ALADDIN_ID_COLUMNS, to_aladdin_id, to_integer_id
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------- #
+# Constants
+# --------------------------------------------------------------------------- #
+
+# Columns parsed with a fixed dtype, as load_overrides always did
+OVERRIDE_READ_DTYPES = {
+    "clarityid": str,
+    "permid": str,
+    "aladdin_id": str,
+    "ovr_target": str,
+    "ovr_value": str,
+    "ovr_active": bool,
+}
+# Columns identifying the issuer of an override, by priority
+ISSUER_KEY_COLUMNS = ["aladdin_id", "permid", "clarityid"]
+KEEP_VERSIONS = 24
+SNAPSHOT_ROOT = CACHE_DIR.parent / "overrides"
+MANIFEST_NAME = "manifest.json"
+
+
+# --------------------------------------------------------------------------- #
+# Helpers
+# --------------------------------------------------------------------------- #
+
+
+def _parse_workbook(file_path: Path) -> pd.DataFrame:
+    """Parse the whole overrides sheet with the override dtypes."""
+    try:
+        return pd.read_excel(file_path, dtype=OVERRIDE_READ_DTYPES)
+    except ValueError as ve:
+        logger.error(
+            f"Error reading 'ovr_active' column from {file_path}. "
+            f"This usually indicates missing or invalid boolean values in column 'ovr_active'. "
+            f"Please check the file and ensure that the column contains only boolean values (TRUE/FALSE) and that is complete. "
+            f"Original error: {ve}"
+        )
+        raise ValueError(
+            f"'ovr_active' column in {file_path} contains missing or non-boolean values. Cannot proceed."
+        ) from ve
+
+
+def _snapshot_name(version: int, fingerprint: str) -> str:
+    return f"v{version:04d}_{fingerprint}.parquet"
+
+
+def _write_snapshot(df: pd.DataFrame, path: Path) -> None:
+    tmp_path = temp_path_for(path)
+    try:
+        try:
+            df.to_parquet(tmp_path, index=False)
+        except (TypeError, ValueError):
+            # free-text columns mixing numbers and text: store them as text
+            mixed = [
+                col
+                for col in df.columns[df.dtypes == object]
+                if col not in OVERRIDE_READ_DTYPES
+            ]
+            logger.info("Storing mixed-type override columns as text: %s", mixed)
+            df.astype({col: "string" for col in mixed}).astype(
+                {col: object for col in mixed}
+            ).to_parquet(tmp_path, index=False)
+        tmp_path.replace(path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def _read_snapshot(path: Path, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    df = pd.read_parquet(path, columns=columns)
+    # parquet nulls come back as None: use NaN like read_excel does
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].where(df[col].notna(), np.nan)
+    return df
+
+
+def _issuer_key(df: pd.DataFrame) -> pd.Series:
+    """Return one issuer key per row: the first available id, prefixed by its name."""
+    key = pd.Series(np.nan, index=df.index, dtype=object)
+    for col in reversed([c for c in ISSUER_KEY_COLUMNS if c in df.columns]):
+        ids = df[col].astype("string").str.strip()
+        key = (col + ":" + ids).astype(object).where(ids.notna() & (ids != ""), key)
+    return key
+
+
+def _canonical_ids(series: pd.Series, col: str) -> pd.Series:
+    """Return *series* as canonical ids (padded aladdin_id, integer permid ...)."""
+    ids = to_aladdin_id(series) if col in ALADDIN_ID_COLUMNS else to_integer_id(series)
+    return ids.astype("string")
+
+
+def _keyed(df: pd.DataFrame) -> pd.DataFrame:
+    """Index *df* by (issuer key, ovr_target, occurrence of that pair)."""
+    keyed = df.copy()
+    keyed["_issuer"] = _issuer_key(df)
+    keyed["_target"] = df["ovr_target"].astype("string").str.strip().str.lower()
+    keyed["_n"] = keyed.groupby(["_issuer", "_target"], dropna=False).cumcount()
+    return keyed.set_index(["_issuer", "_target", "_n"])
+
+
+# --------------------------------------------------------------------------- #
+# Public API
+# --------------------------------------------------------------------------- #
+
+
+class OverrideDelta:
+    """
+    Added, removed and changed overrides between two snapshots.
+
+    Overrides are matched on their issuer (aladdin_id, else permid, else
+    clarityid) and ovr_target; changed rows are the new rows, with a
+    changed_columns column listing what differs.
+    """
+
+    def __init__(
+        self, added: pd.DataFrame, removed: pd.DataFrame, changed: pd.DataFrame
+    ):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+
+    def __repr__(self) -> str:
+        return f"OverrideDelta({self.summary()})"
+
+    def __bool__(self) -> bool:
+        return any(len(frame) for frame in (self.added, self.removed, self.changed))
+
+    @classmethod
+    def between(cls, old: pd.DataFrame, new: pd.DataFrame) -> "OverrideDelta":
+        old_k, new_k = _keyed(old), _keyed(new)
+        added = new_k.loc[new_k.index.difference(old_k.index)]
+        removed = old_k.loc[old_k.index.difference(new_k.index)]
+
+        common = new_k.index.intersection(old_k.index)
+        compared = [col for col in new_k.columns if col in old_k.columns]
+        old_common = old_k.loc[common, compared].astype("string").fillna("<NA>")
+        new_common = new_k.loc[common, compared].astype("string").fillna("<NA>")
+        differs = old_common != new_common
+        changed_rows = differs.any(axis=1)
+        changed = new_k.loc[common[changed_rows.to_numpy()]].copy()
+        changed["changed_columns"] = [
+            ",".join(differs.columns[row]) for row in differs[changed_rows].to_numpy()
+        ]
+        return cls(
+            added.reset_index(drop=True),
+            removed.reset_index(drop=True),
+            changed.reset_index(drop=True),
+        )
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "added": len(self.added),
+            "removed": len(self.removed),
+            "changed": len(self.changed),
+        }
+
+    def affected_ids(self) -> Dict[str, set]:
+        """
+        Return the canonical ids (see scripts.utils.schema), per id column, of
+        every issuer with an added, removed or changed override.
+        """
+        ids = {}
+        for col in ISSUER_KEY_COLUMNS:
+            frames = [
+                frame[col]
+                for frame in (self.added, self.removed, self.changed)
+                if col in frame.columns
+            ]
+            values = _canonical_ids(pd.concat(frames), col) if frames else []
+            ids[col] = set(pd.Series(values).dropna())
+        return ids
+
+    def affects(self, df: pd.DataFrame) -> pd.Series:
+        """Return a mask of the rows of *df* whose issuer has a changed override."""
+        mask = pd.Series(False, index=df.index)
+        for col, ids in self.affected_ids().items():
+            if col in df.columns and ids:
+                mask |= _canonical_ids(df[col], col).isin(ids).fillna(False)
+        return mask.astype(bool)
+
+
+class OverrideStore:
+    """
+    Fingerprinted, versioned Parquet snapshots of an overrides workbook.
+
+    Parameters:
+        file_path (Path): The overrides workbook (overrides_db.xlsx).
+        snapshot_dir (Path, optional): Defaults to
+            ``<workbook stem>_<path hash>`` in SNAPSHOT_ROOT (cache/overrides).
+        keep_versions (int): Snapshots kept; older ones are deleted.
+    """
+
+    def __init__(
+        self,
+        file_path: Path,
+        snapshot_dir: Path = None,
+        keep_versions: int = KEEP_VERSIONS,
+    ):
+        self.file_path = Path(file_path)
+        if snapshot_dir is None:
+            path_hash = hashlib.sha1(str(self.file_path.resolve()).encode())
+            snapshot_dir = (
+                SNAPSHOT_ROOT / f"{self.file_path.stem}_{path_hash.hexdigest()[:8]}"
+            )
+        self.snapshot_dir = Path(snapshot_dir)
+        self.keep_versions = keep_versions
+
+    def __repr__(self) -> str:
+        return f"OverrideStore({self.file_path}, {len(self.versions())} versions)"
+
+    # ---- manifest -------------------------------------------------------- #
+
+    @property
+    def _manifest_path(self) -> Path:
+        return self.snapshot_dir / MANIFEST_NAME
+
+    def versions(self) -> List[dict]:
+        """Return the manifest entries (version, fingerprint, file, created, rows)."""
+        if not self._manifest_path.exists():
+            return []
+        with self._manifest_path.open() as fh:
+            return json.load(fh)["versions"]
+
+    def _save_manifest(self, versions: List[dict]) -> None:
+        tmp_path = temp_path_for(self._manifest_path)
+        try:
+            with tmp_path.open("w") as fh:
+                json.dump(
+                    {"source": str(self.file_path), "versions": versions}, fh, indent=2
+                )
+            tmp_path.replace(self._manifest_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def _append_version(self, entry: dict) -> dict:
+        """
+        Record the snapshot *entry* in the manifest as it is now on disk, not
+        as refresh() first read it, so a version added meanwhile by another
+        writer (the prefetcher, another stage) is kept. Returns the entry as
+        recorded: renumbered after such a version, or that version if it
+        already holds the same content.
+        """
+        versions = self.versions()
+        if versions and versions[-1]["fingerprint"] == entry["fingerprint"]:
+            if versions[-1]["file"] != entry["file"]:
+                (self.snapshot_dir / entry["file"]).unlink(missing_ok=True)
+            return versions[-1]
+        version = versions[-1]["version"] + 1 if versions else 1
+        if version != entry["version"]:
+            file = _snapshot_name(version, entry["fingerprint"])
+            (self.snapshot_dir / entry["file"]).replace(self.snapshot_dir / file)
+            entry = {**entry, "version": version, "file": file}
+        versions.append(entry)
+        for old in versions[: -self.keep_versions]:
+            (self.snapshot_dir / old["file"]).unlink(missing_ok=True)
+        self._save_manifest(versions[-self.keep_versions :])
+        return entry
+
+    def _entry(self, version: Optional[int]) -> dict:
+        versions = self.versions()
+        if not versions:
+            raise FileNotFoundError(f"No override snapshots in {self.snapshot_dir}")
+        if version is None:
+            return versions[-1]
+        for entry in versions:
+            if entry["version"] == version:
+                return entry
+        raise KeyError(f"Override snapshot version {version} not found")
+
+    # ---- snapshots ------------------------------------------------------- #
+
+    def refresh(self) -> dict:
+        """
+        Snapshot the workbook if its content changed since the latest
+        snapshot, and return the manifest entry of the current version.
+        """
+        fingerprint = file_fingerprint(self.file_path, hash_content=True)[:16]
+        # the fingerprint reads the whole workbook (without parsing it)
+        record_io(bytes_read=self.file_path.stat().st_size)
+        versions = self.versions()
+        if versions and versions[-1]["fingerprint"] == fingerprint:
+            record_io(cache="hit")
+            return versions[-1]
+        # parsing reads the workbook a second time
+        record_io(bytes_read=self.file_path.stat().st_size, cache="miss")
+
+        logger.info("Overrides changed, parsing %s", self.file_path)
+        df = _parse_workbook(self.file_path)
+        version = versions[-1]["version"] + 1 if versions else 1
+        entry = {
+            "version": version,
+            "fingerprint": fingerprint,
+            "file": _snapshot_name(version, fingerprint),
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "rows": len(df),
+        }
+        try:
+            self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+            _write_snapshot(df, self.snapshot_dir / entry["file"])
+            entry = self._append_version(entry)
+        except Exception:
+            # snapshots are an optimisation: never fail the load because of them
+            logger.warning(
+                "Could not snapshot overrides to %s", self.snapshot_dir, exc_info=True
+            )
+            entry["frame"] = df
+            return entry
+
+        version = entry["version"]
+        if len(self.versions()) > 1:
+            delta = self.diff(new_version=version)
+            logger.info("Overrides snapshot v%d: %s", version, delta.summary())
+        else:
+            logger.info("Overrides snapshot v%d: %d rows", version, len(df))
+        return entry
+
+    def load(
+        self, columns: Optional[List[str]] = None, version: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        Return the overrides as parsed from the workbook (ids and states as
+        strings, ovr_active as bool), refreshing the snapshot first unless a
+        *version* is requested.
+
+        Raises:
+            ValueError: If any of *columns* is not in the overrides.
+        """
+        entry = self.refresh() if version is None else self._entry(version)
+        if "frame" in entry:  # snapshot could not be written
+            df = entry["frame"]
+            available = list(df.columns)
+        else:
+            import pyarrow.parquet as pq
+
+            path = self.snapshot_dir / entry["file"]
+            available = pq.read_schema(path).names
+        if columns:
+            missing = [col for col in columns if col not in available]
+            if missing:
+                raise ValueError(f"Columns {missing} not found in {self.file_path}")
+            # keep the workbook's column order, as read_excel(usecols=...) does
+            columns = [col for col in available if col in set(columns)]
+        if "frame" in entry:
+            return df[columns].copy() if columns else df.copy()
+        record_io(bytes_read=path.stat().st_size)
+        return _read_snapshot(path, columns)
+
+    def diff(
+        self, old_version: Optional[int] = None, new_version: Optional[int] = None
+    ) -> OverrideDelta:
+        """
+        Return the delta between two snapshot versions (default: the one
+        before the latest -> the latest). With a single version, everything
+        in it counts as added.
+        """
+        versions = self.versions()
+        new_entry = self._entry(new_version)
+        if old_version is None:
+            older = [v for v in versions if v["version"] < new_entry["version"]]
+            old_entry = older[-1] if older else None
+        else:
+            old_entry = self._entry(old_version)
+
+        new = _read_snapshot(self.snapshot_dir / new_entry["file"])
+        if old_entry is None:
+            old = new.iloc[0:0]
+        else:
+            old = _read_snapshot(self.snapshot_dir / old_entry["file"])
+        return OverrideDelta.between(old, new)
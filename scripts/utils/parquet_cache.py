@@ -0,0 +1,266 @@
+# parquet_cache.py
+"""
+Content-addressed on-disk Parquet cache for the monthly Clarity CSV feeds.
+
+Every stage of the pipeline re-parses the same issuer-level CSV. The first
+call converts the CSV once to Parquet (cleaned column names, id columns as
+strings) and later calls only read the projected columns from Parquet.
+
+Cache entries live in ``<repo_root>/cache/clarity`` and are named after a
+fingerprint of the source CSV (resolved path, size, mtime and, optionally,
+a SHA-1 of the content) and of the parse itself (CACHE_SCHEMA_VERSION, the
+read engine and the schema registry), so neither an updated delivery nor an
+entry written by an older build of the parser is ever served.
+"""
+
+import hashlib
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from .load_metrics import record_io
+from .read_engine import get_read_engine
+from .schema import COLUMN_SCHEMA, ID_SCHEMA
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------- #
+# Constants
+# --------------------------------------------------------------------------- #
+
+# Since this file is in <repo_root>/scripts/utils, go up two levels.
+CACHE_DIR = Path(__file__).resolve().parents[2] / "cache" / "clarity"
+MAX_AGE_DAYS = 120
+MAX_TOTAL_MB = 4096
+# Bump whenever the cached frames change (column cleaning, dtypes, id types...)
+CACHE_SCHEMA_VERSION = 2
+
+_HASH_BLOCK_SIZE = 1 << 20
+
+# Per-run hit / miss counters and load timings
+_CACHE_STATS: Dict[str, list] = {"hits": [], "misses": []}
+
+
+class MissingColumnsError(ValueError):
+    """Requested columns are not in the cached frame (not a corrupt entry)."""
+
+
+# --------------------------------------------------------------------------- #
+# Helpers
+# --------------------------------------------------------------------------- #
+
+
+def file_fingerprint(file_path: Path, hash_content: bool = False) -> str:
+    """
+    Return a hex fingerprint of *file_path* built from its resolved path,
+    size and modification time. If *hash_content* is True the SHA-1 of the
+    file content is used instead of path/mtime, so identical deliveries
+    share a cache entry wherever they live.
+    """
+    file_path = Path(file_path).resolve()
+    stat = file_path.stat()
+    digest = hashlib.sha1()
+    if hash_content:
+        with file_path.open("rb") as fh:
+            for block in iter(lambda: fh.read(_HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        digest.update(str(stat.st_size).encode())
+    else:
+        digest.update(f"{file_path}|{stat.st_size}|{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+def parse_fingerprint() -> str:
+    """
+    Return a hex fingerprint of what the parsers produce: CACHE_SCHEMA_VERSION,
+    the read engine and the registered column / identifier dtypes.
+    """
+    registry = sorted((col, str(dtype)) for col, dtype in COLUMN_SCHEMA.items())
+    registry += sorted((col, str(dtype)) for col, dtype in ID_SCHEMA.items())
+    digest = hashlib.sha1(
+        f"{CACHE_SCHEMA_VERSION}|{get_read_engine()}|{registry}".encode()
+    )
+    return digest.hexdigest()
+
+
+def cache_path_for(
+    file_path: Path, cache_dir: Path = CACHE_DIR, hash_content: bool = False
+) -> Path:
+    """Return the Parquet path that caches *file_path* with the current parser."""
+    digest = hashlib.sha1(
+        file_fingerprint(file_path, hash_content=hash_content).encode()
+        + parse_fingerprint().encode()
+    )
+    return Path(cache_dir) / f"{Path(file_path).stem}_{digest.hexdigest()[:16]}.parquet"
+
+
+def temp_path_for(path: Path) -> Path:
+    """
+    Return a unique temporary sibling of *path*, to write before an atomic
+    replace; concurrent writers of the same file never share it.
+    """
+    path = Path(path)
+    return path.with_name(f"{path.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+
+
+def evict_stale_entries(
+    cache_dir: Path = CACHE_DIR,
+    max_age_days: float = MAX_AGE_DAYS,
+    max_total_mb: float = MAX_TOTAL_MB,
+) -> List[Path]:
+    """
+    Remove cache entries older than *max_age_days* and then, oldest first,
+    as many entries as needed to keep the cache below *max_total_mb*.
+
+    Returns:
+        list[Path]: The evicted files.
+    """
+    cache_dir = Path(cache_dir)
+    if not cache_dir.exists():
+        return []
+
+    now = time.time()
+    entries = sorted(
+        (p for p in cache_dir.glob("*.parquet") if p.is_file()),
+        key=lambda p: p.stat().st_mtime,
+    )
+    evicted = []
+    kept = []
+    for entry in entries:
+        if (now - entry.stat().st_mtime) > max_age_days * 86400:
+            evicted.append(entry)
+        else:
+            kept.append(entry)
+
+    total_bytes = sum(p.stat().st_size for p in kept)
+    max_total_bytes = max_total_mb * 1024 * 1024
+    while kept and total_bytes > max_total_bytes:
+        oldest = kept.pop(0)
+        total_bytes -= oldest.stat().st_size
+        evicted.append(oldest)
+
+    for entry in evicted:
+        try:
+            entry.unlink()
+            logger.info("Evicted cache entry: %s", entry)
+        except OSError:
+            logger.warning("Could not evict cache entry: %s", entry)
+    return evicted
+
+
+def cache_stats() -> Dict[str, dict]:
+    """Return hit / miss counts and mean load times (seconds) for this run."""
+    stats = {}
+    for kind, timings in _CACHE_STATS.items():
+        stats[kind] = {
+            "count": len(timings),
+            "mean_seconds": (sum(timings) / len(timings)) if timings else 0.0,
+        }
+    return stats
+
+
+def log_cache_stats() -> None:
+    """Log the cold (miss) vs warm (hit) load report for this run."""
+    stats = cache_stats()
+    logger.info(
+        "Parquet cache report – hits: %d (avg %.2fs warm), misses: %d (avg %.2fs cold)",
+        stats["hits"]["count"],
+        stats["hits"]["mean_seconds"],
+        stats["misses"]["count"],
+        stats["misses"]["mean_seconds"],
+    )
+
+
+# --------------------------------------------------------------------------- #
+# Public API
+# --------------------------------------------------------------------------- #
+
+
+def read_through_cache(
+    file_path: Path,
+    parse_csv: Callable[[Path], pd.DataFrame],
+    columns: Optional[List[str]] = None,
+    cache_dir: Path = CACHE_DIR,
+    hash_content: bool = False,
+) -> pd.DataFrame:
+    """
+    Return the content of *file_path* from the Parquet cache, building the
+    entry with *parse_csv* on a miss.
+
+    Parameters:
+        file_path (Path): Source CSV.
+        parse_csv (callable): Function that parses the whole CSV into the
+            cleaned DataFrame that should be cached.
+        columns (list[str], optional): Projection read from Parquet.
+            If None, all columns are returned.
+        cache_dir (Path): Directory holding the cache entries.
+        hash_content (bool): Fingerprint the CSV content as well.
+
+    Returns:
+        pd.DataFrame: The (projected) cached frame.
+
+    Raises:
+        MissingColumnsError: If any of *columns* is not in the cached frame
+            (a ValueError).
+    """
+    start = time.perf_counter()
+    entry = cache_path_for(file_path, cache_dir=cache_dir, hash_content=hash_content)
+
+    if entry.exists():
+        try:
+            df = _read_projection(entry, columns)
+            elapsed = time.perf_counter() - start
+            _CACHE_STATS["hits"].append(elapsed)
+            record_io(bytes_read=entry.stat().st_size, cache="hit")
+            logger.info("Cache hit for %s (%.2fs): %s", file_path, elapsed, entry)
+            return df
+        except MissingColumnsError:
+            raise
+        except Exception:
+            # includes pyarrow's ArrowInvalid (a ValueError) on truncated files
+            logger.warning("Corrupted cache entry %s, rebuilding it.", entry)
+            entry.unlink(missing_ok=True)
+
+    df = parse_csv(file_path)
+    tmp_entry = temp_path_for(entry)
+    try:
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(tmp_entry, index=False)
+        tmp_entry.replace(entry)
+        evict_stale_entries(cache_dir)
+    except Exception:
+        tmp_entry.unlink(missing_ok=True)
+        # The cache is an optimisation: never fail the load because of it.
+        logger.warning("Could not write cache entry for %s", file_path, exc_info=True)
+
+    if columns:
+        missing = [col for col in columns if col not in df.columns]
+        if missing:
+            raise MissingColumnsError(f"Columns {missing} not found in {file_path}")
+        df = df[columns]
+
+    elapsed = time.perf_counter() - start
+    _CACHE_STATS["misses"].append(elapsed)
+    record_io(bytes_read=Path(file_path).stat().st_size, cache="miss")
+    logger.info("Cache miss for %s (%.2fs): built %s", file_path, elapsed, entry)
+    return df
+
+
+def _read_projection(entry: Path, columns: Optional[List[str]]) -> pd.DataFrame:
+    """Read *columns* from the Parquet *entry*, validating them against its schema."""
+    if columns:
+        import pyarrow.parquet as pq
+
+        available = pq.read_schema(entry).names
+        missing = [col for col in columns if col not in available]
+        if missing:
+            raise MissingColumnsError(
+                f"Columns {missing} not found in cache entry {entry}"
+            )
+    return pd.read_parquet(entry, columns=columns)
@@ -0,0 +1,178 @@
+# prefetch.py
+"""
+Background prefetch of the next pipeline stage's inputs.
+
+The pipelines (pre_ovr_pipeline.py, ...) run every stage as a separate
+process, one after the other, and every stage starts with cold reads of
+inputs whose paths are known from get_config()['paths'] before the run
+begins. While a stage computes, a Prefetcher warms the inputs of the next
+stage on a background thread of the pipeline process:
+
+* "page_cache"      read the file once, so the OS page cache (or the SMB
+                    client cache of a network share) holds it,
+* "clarity"         build the Parquet cache entry of a Clarity CSV
+                    (see parquet_cache), or warm it if it already exists,
+* "crossreference"  build / warm the memory-mapped index (see xref_index),
+* "overrides"       snapshot the overrides workbook (see override_store).
+
+Prefetch specs are plain dicts: ``{"path": Path, "kind": "clarity"}``.
+Inputs the running stage reads or writes itself are never prefetched, so the
+two processes never build the same cache entry or read a half-written file.
+Prefetching is an optimisation: failures are logged and otherwise ignored.
+"""
+
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .dataloaders import load_clarity_data
+from .override_store import OverrideStore
+from .parquet_cache import cache_path_for
+from .xref_index import index_path_for, load_crossreference_index
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------- #
+# Constants
+# --------------------------------------------------------------------------- #
+
+_READ_BLOCK_SIZE = 8 << 20
+
+
+# --------------------------------------------------------------------------- #
+# Warmers
+# --------------------------------------------------------------------------- #
+
+
+def warm_page_cache(file_path: Path) -> int:
+    """Read *file_path* once, discarding the data, and return the bytes read."""
+    buffer = bytearray(_READ_BLOCK_SIZE)
+    n_bytes = 0
+    with open(file_path, "rb", buffering=0) as fh:
+        while True:
+            n = fh.readinto(buffer)
+            if not n:
+                break
+            n_bytes += n
+    return n_bytes
+
+
+def warm_clarity_cache(file_path: Path) -> int:
+    """Build the Parquet cache entry of *file_path* if missing, then warm it."""
+    entry = cache_path_for(file_path)
+    if not entry.exists():
+        load_clarity_data(file_path)
+    return warm_page_cache(entry)
+
+
+def warm_crossreference_index(file_path: Path) -> int:
+    """Build the crossreference index of *file_path* if missing, then warm it."""
+    load_crossreference_index(file_path)
+    return sum(warm_page_cache(p) for p in index_path_for(file_path).glob("*.npy"))
+
+
+def warm_override_snapshot(file_path: Path) -> int:
+    """Snapshot the overrides workbook if it changed, then warm the snapshot."""
+    store = OverrideStore(file_path)
+    entry = store.refresh()
+    snapshot = store.snapshot_dir / entry["file"]
+    return warm_page_cache(snapshot) if snapshot.exists() else 0
+
+
+WARMERS: Dict[str, Callable[[Path], int]] = {
+    "page_cache": warm_page_cache,
+    "clarity": warm_clarity_cache,
+    "crossreference": warm_crossreference_index,
+    "overrides": warm_override_snapshot,
+}
+
+
+# --------------------------------------------------------------------------- #
+# Public API
+# --------------------------------------------------------------------------- #
+
+
+def prefetch_specs(
+    next_reads: List[dict], current_reads: List[dict], current_writes: List[Path]
+) -> List[dict]:
+    """
+    Return the specs of *next_reads* that can be prefetched while a stage
+    reading *current_reads* and writing *current_writes* runs.
+    """
+    busy = {Path(spec["path"]) for spec in current_reads}
+    busy.update(Path(path) for path in current_writes)
+    return [spec for spec in next_reads if Path(spec["path"]) not in busy]
+
+
+class Prefetcher:
+    """
+    Warm a list of inputs on a daemon thread.
+
+    Example:
+        >>> prefetcher = Prefetcher("_00_preovr_analysis").start(specs)
+        >>> subprocess.run(current_stage)
+        >>> prefetcher.wait()  # before starting _00_preovr_analysis
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.timings: Dict[str, float] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def __repr__(self) -> str:
+        return f"Prefetcher({self.name})"
+
+    def _run(self, specs: List[dict]) -> None:
+        for spec in specs:
+            path, kind = Path(spec["path"]), spec.get("kind", "page_cache")
+            start = time.perf_counter()
+            try:
+                if not path.exists():
+                    logger.info("Prefetch %s: %s not found, skipped", self.name, path)
+                    continue
+                n_bytes = WARMERS[kind](path)
+                self.timings[f"{path} [{kind}]"] = time.perf_counter() - start
+                logger.info(
+                    "Prefetch %s: warmed %s (%s, %.1f MB) in %.2fs",
+                    self.name,
+                    path.name,
+                    kind,
+                    n_bytes / 2**20,
+                    self.timings[f"{path} [{kind}]"],
+                )
+            except Exception:
+                logger.warning(
+                    "Prefetch %s: could not warm %s", self.name, path, exc_info=True
+                )
+
+    def start(self, specs: List[dict]) -> "Prefetcher":
+        """Start warming *specs* in the background and return self."""
+        unknown = [
+            spec for spec in specs if spec.get("kind", "page_cache") not in WARMERS
+        ]
+        if unknown:
+            raise ValueError(
+                f"Unknown prefetch kind in {unknown}, expected one of {list(WARMERS)}"
+            )
+        if specs:
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(specs,),
+                name=f"prefetch-{self.name}",
+                daemon=True,
+            )
+            self._thread.start()
+        return self
+
+    def wait(self) -> None:
+        """Block until the prefetch is done (it never raises)."""
+        if self._thread is None:
+            return
+        start = time.perf_counter()
+        self._thread.join()
+        waited = time.perf_counter() - start
+        if waited > 0.5:
+            logger.info("Waited %.2fs for the %s prefetch to finish", waited, self.name)
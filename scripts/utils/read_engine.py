@@ -0,0 +1,205 @@
+# read_engine.py
+"""
+Process-wide CSV read engine shared by every CSV loader.
+
+Two engines are supported:
+
+* "c" (default): pandas' C parser with NumPy dtypes.
+* "pyarrow": pyarrow's multithreaded CSV reader with the Arrow dtype backend.
+  Columns requested as strings are declared as Arrow strings *before*
+  parsing, so ids like "0001" keep their leading zeros (pandas' own
+  ``engine="pyarrow"`` infers the type first and casts afterwards).
+
+The engine is chosen once per run by get_config (argument, ``--read-engine``
+flag or the SRI_READ_ENGINE environment variable). Loaders call read_csv and
+then to_numpy_dtypes once at the boundary where their stage still needs NumPy
+dtypes; both are no-ops beyond pd.read_csv when the engine is "c".
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------- #
+# Constants
+# --------------------------------------------------------------------------- #
+
+READ_ENGINES = ("c", "pyarrow")
+DEFAULT_READ_ENGINE = "c"
+# Environment variable holding the engine, so spawned worker processes inherit it
+READ_ENGINE_ENV_VAR = "SRI_READ_ENGINE"
+
+# read_csv options the pyarrow path ignores (they only tune the C parser)
+_IGNORED_PYARROW_KWARGS = {"low_memory"}
+# dtype spellings read as plain strings
+_STRING_DTYPES = (str, "str", object, "object", "string", "unicode")
+
+
+# --------------------------------------------------------------------------- #
+# Engine setting
+# --------------------------------------------------------------------------- #
+
+
+def set_read_engine(engine: str) -> str:
+    """Set the CSV read engine for this process (and the ones it spawns)."""
+    engine = (engine or DEFAULT_READ_ENGINE).strip().lower()
+    if engine not in READ_ENGINES:
+        raise ValueError(
+            f"Unknown read engine '{engine}', expected one of {READ_ENGINES}"
+        )
+    os.environ[READ_ENGINE_ENV_VAR] = engine
+    return engine
+
+
+def get_read_engine() -> str:
+    """Return the CSV read engine for this process."""
+    engine = os.environ.get(READ_ENGINE_ENV_VAR, DEFAULT_READ_ENGINE).strip().lower()
+    if engine not in READ_ENGINES:
+        logger.warning(
+            "Ignoring %s=%s, expected one of %s",
+            READ_ENGINE_ENV_VAR,
+            engine,
+            READ_ENGINES,
+        )
+        return DEFAULT_READ_ENGINE
+    return engine
+
+
+# --------------------------------------------------------------------------- #
+# Helpers
+# --------------------------------------------------------------------------- #
+
+
+def _arrow_type_for(dtype: Any):
+    """Return the Arrow type to declare for a requested pandas dtype, if any."""
+    import pyarrow as pa
+
+    if dtype in _STRING_DTYPES or isinstance(dtype, pd.StringDtype):
+        return pa.string()
+    if dtype == "category":
+        return pa.dictionary(pa.int32(), pa.string())
+    return None
+
+
+def _read_csv_pyarrow(
+    file_path: Path,
+    usecols: Optional[List[str]],
+    dtype: Union[Dict[str, Any], Any, None],
+) -> pd.DataFrame:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    header = list(pd.read_csv(file_path, nrows=0).columns)
+    if hasattr(file_path, "seek"):  # in-memory buffer: rewind after the header
+        file_path.seek(0)
+    if usecols is not None:
+        missing = [col for col in usecols if col not in header]
+        if missing:
+            raise ValueError(
+                f"Usecols do not match columns, columns expected but not found: {missing}"
+            )
+        # keep the file order, like pandas does
+        usecols = [col for col in header if col in set(usecols)]
+    columns = usecols if usecols is not None else header
+
+    requested = dtype if isinstance(dtype, dict) else dict.fromkeys(columns, dtype)
+    column_types = {}
+    pandas_casts = {}
+    for col, col_dtype in requested.items():
+        if col not in columns or col_dtype is None:
+            continue
+        arrow_type = _arrow_type_for(col_dtype)
+        if arrow_type is not None:
+            column_types[col] = arrow_type
+        if (
+            arrow_type is None
+            or col_dtype in ("string",)
+            or isinstance(col_dtype, pd.StringDtype)
+        ):
+            # e.g. "Int64" / "string": parse, then cast to the requested dtype
+            pandas_casts[col] = col_dtype
+
+    table = pacsv.read_csv(
+        file_path,
+        read_options=pacsv.ReadOptions(use_threads=True),
+        convert_options=pacsv.ConvertOptions(
+            column_types=column_types,
+            include_columns=usecols,
+            strings_can_be_null=True,
+        ),
+    )
+    # dictionary columns become pandas categoricals, everything else Arrow-backed
+    df = table.to_pandas(
+        types_mapper=lambda t: (None if pa.types.is_dictionary(t) else pd.ArrowDtype(t))
+    )
+    for col, col_dtype in pandas_casts.items():
+        df[col] = df[col].astype(col_dtype)
+    return df
+
+
+# --------------------------------------------------------------------------- #
+# Public API
+# --------------------------------------------------------------------------- #
+
+
+def read_csv(
+    file_path: Path,
+    usecols: Optional[List[str]] = None,
+    dtype: Union[Dict[str, Any], Any, None] = None,
+    engine: Optional[str] = None,
+    **kwargs,
+) -> pd.DataFrame:
+    """
+    pd.read_csv through the configured read engine.
+
+    With the "pyarrow" engine the frame comes back Arrow-backed; call
+    to_numpy_dtypes where the stage needs NumPy dtypes. Options the pyarrow
+    path does not support (callable usecols, nrows, converters, ...) fall back
+    to the C engine.
+
+    Parameters:
+        file_path (Path | file-like): CSV to read.
+        usecols (list[str], optional): Columns to read.
+        dtype (dict | dtype, optional): As in pd.read_csv.
+        engine (str, optional): Override the configured engine for this call.
+        **kwargs: Passed to pd.read_csv on the C engine.
+
+    Returns:
+        pd.DataFrame: The parsed frame.
+    """
+    engine = engine or get_read_engine()
+    if engine == "pyarrow":
+        unsupported = set(kwargs) - _IGNORED_PYARROW_KWARGS
+        if unsupported or callable(usecols):
+            logger.info(
+                "pyarrow read engine does not support %s, using the C engine for %s",
+                sorted(unsupported) or ["callable usecols"],
+                file_path,
+            )
+        else:
+            return _read_csv_pyarrow(file_path, usecols, dtype)
+    return pd.read_csv(file_path, usecols=usecols, dtype=dtype, **kwargs)
+
+
+def to_numpy_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert Arrow-backed columns (pd.ArrowDtype) to the NumPy dtypes the C
+    engine would have produced: strings become object columns with NaN for
+    missing values, integers with nulls become float64. Categoricals and the
+    canonical id dtypes are left untouched. No-op for NumPy-backed frames.
+    """
+    arrow_cols = [col for col in df.columns if isinstance(df[col].dtype, pd.ArrowDtype)]
+    for col in arrow_cols:
+        converted = df[col].array.__arrow_array__().to_pandas()
+        converted.index = df.index
+        if converted.dtype == object:
+            converted = converted.where(converted.notna(), np.nan)
+        df[col] = converted
+    return df
@@ -1,10 +1,10 @@
 # remove_duplicates_wo_ovr.py
 
+import argparse
 import time
 
 from scripts.utils.config import get_config
-from scripts.utils.dataloaders import load_csv
-
+from scripts.utils.dataloaders import load_csv, iter_clarity_chunks
 
 # Get configuration settings
 config = get_config(script_name="remove_duplicates_without_ovr", gen_output_dir=False)
@@ -24,20 +24,83 @@ INPUT_PATH = config["paths"]["CURRENT_DF_WOUTOVR_SEC_PATH"]
 OUTPUT_DIR = config["paths"]["PROCESSED_DFS_WOUTOVR_PATH"]
 OUTPUT_PATH = OUTPUT_DIR / f"{DATE}01_df_issuer_level_without_ovr.csv"
 
-logger.info("Loading raw dataset")
-# read csv INPUT_PATH
-df = load_csv(INPUT_PATH)
 
-logger.info("Removing duplicates by permId")
-# remove duplicate by subset "issuer_name"
-df_2 = df.drop_duplicates(subset=["permid"]).copy()
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Remove duplicated permids from the security level datafeed"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Process the raw feed in chunks to keep memory bounded",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=200_000,
+        help="Rows per chunk when --stream is used",
+    )
+    args, _ = parser.parse_known_args()
+    return args
+
+
+def remove_duplicates_streaming(input_path, output_path, chunksize: int) -> tuple:
+    """
+    Drop duplicated permids chunk by chunk, keeping the first occurrence like
+    DataFrame.drop_duplicates, and append each deduplicated chunk to output_path.
+
+    Returns:
+        tuple: (rows_before, rows_after)
+    """
+    seen_permids = set()
+    seen_missing_permid = False
+    rows_before = rows_after = 0
+    header = True
+
+    for chunk in iter_clarity_chunks(input_path, chunksize=chunksize):
+        rows_before += len(chunk)
+        chunk = chunk.drop_duplicates(subset=["permid"])
+        missing = chunk["permid"].isna()
+        keep = ~missing & ~chunk["permid"].isin(seen_permids)
+        if missing.any() and not seen_missing_permid:
+            # like drop_duplicates, NaN permids count as one value: keep the first
+            keep |= missing
+            seen_missing_permid = True
+        chunk = chunk[keep]
+        seen_permids.update(chunk["permid"].dropna())
+        rows_after += len(chunk)
+        chunk.to_csv(
+            output_path, index=False, mode="w" if header else "a", header=header
+        )
+        header = False
+
+    return rows_before, rows_after
+
+
+args = parse_arguments()
+
+if args.stream:
+    logger.info("Removing duplicates by permId streaming the raw dataset")
+    rows_before, rows_after = remove_duplicates_streaming(
+        INPUT_PATH, OUTPUT_PATH, chunksize=args.chunksize
+    )
+    logger.info(f"Saved to {OUTPUT_PATH}")
+else:
+    logger.info("Loading raw dataset")
+    # read csv INPUT_PATH
+    df = load_csv(INPUT_PATH)
+
+    logger.info("Removing duplicates by permId")
+    # remove duplicate by subset "issuer_name"
+    df_2 = df.drop_duplicates(subset=["permid"]).copy()
 
-# Save to OUTPUT_PATH as csv file
-logger.info("Saving dataset at issuer level on a csv file")
-df_2.to_csv(OUTPUT_PATH, index=False)
-logger.info(f"Saved to {OUTPUT_PATH}")
+    # Save to OUTPUT_PATH as csv file
+    logger.info("Saving dataset at issuer level on a csv file")
+    df_2.to_csv(OUTPUT_PATH, index=False)
+    logger.info(f"Saved to {OUTPUT_PATH}")
+    rows_before, rows_after = df.shape[0], df_2.shape[0]
 
 end_time = time.time()
 logger.info(f"Script completed in {end_time - start_time:.2f} seconds")
 # display rows before and after
-logger.info(f"FINAL OUTPUT:\nRows before: {df.shape[0]} \nRows after: {df_2.shape[0]}")
+logger.info(f"FINAL OUTPUT:\nRows before: {rows_before} \nRows after: {rows_after}")
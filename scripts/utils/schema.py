@@ -0,0 +1,294 @@
+# schema.py
+"""
+Central registry of column dtypes shared by every dataloader.
+
+Identifiers get one canonical type, applied once at load:
+
+* permid and clarityid are nullable 64-bit integers (Int64), so joins and
+  ``isin`` lookups hash machine integers instead of Python strings.
+* aladdin_id / parent_aladdin_id are zero-padded, fixed-width Arrow strings
+  (``string[pyarrow]``), so "364", 364 and 364.0 all become "000364".
+
+The strategy outcome columns (str_001_s … scs_002_ec, art_8_basicos, cs_00x)
+and the override value columns only ever hold a handful of states. They are
+normalised once at load time (strip + upper) and stored as one shared ordered
+categorical dtype, so:
+
+* memory is one int8 code per cell instead of one Python string,
+* frames loaded from different sources have the *same* dtype and can be
+  compared directly (``!=`` / ``isin`` run on integer codes),
+* the normalisation itself only touches the few distinct categories, not
+  every row.
+"""
+
+import logging
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import CategoricalDtype
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------- #
+# Registry
+# --------------------------------------------------------------------------- #
+
+# Ordered by severity so that comparisons like ``state > "OK"`` make sense.
+STRATEGY_STATES = ["OK", "FLAG", "EXCLUDED"]
+STRATEGY_DTYPE = CategoricalDtype(STRATEGY_STATES, ordered=True)
+
+# Strategy columns as named in the Clarity feeds ...
+CLARITY_STRATEGY_COLUMNS = [
+    "str_001_s",
+    "str_002_ec",
+    "str_003_ec",
+    "str_003b_ec",
+    "str_004_asec",
+    "str_005_ec",
+    "str_006_sec",
+    "str_007_sect",
+    "art_8_basicos",
+    "cs_001_sec",
+    "cs_002_ec",
+]
+# ... and as named in BRS / Aladdin
+BRS_STRATEGY_COLUMNS = [
+    "str_001_s",
+    "str_002_ec",
+    "str_003_ec",
+    "str_003b_ec",
+    "str_004_asec",
+    "str_005_ec",
+    "str_006_sec",
+    "str_007_sect",
+    "str_sfdr8_aec",
+    "scs_001_sec",
+    "scs_002_ec",
+]
+STRATEGY_COLUMNS = list(dict.fromkeys(CLARITY_STRATEGY_COLUMNS + BRS_STRATEGY_COLUMNS))
+
+# Override database columns holding a strategy state
+OVERRIDE_STATE_COLUMNS = ["ovr_value", "df_value"]
+
+COLUMN_SCHEMA: Dict[str, CategoricalDtype] = {
+    **{col: STRATEGY_DTYPE for col in STRATEGY_COLUMNS},
+    **{col: STRATEGY_DTYPE for col in OVERRIDE_STATE_COLUMNS},
+}
+
+# Identifier columns
+INTEGER_ID_DTYPE = pd.Int64Dtype()
+ALADDIN_ID_DTYPE = pd.StringDtype("pyarrow")
+ALADDIN_ID_WIDTH = 6
+
+INTEGER_ID_COLUMNS = ["permid", "clarityid"]
+ALADDIN_ID_COLUMNS = ["aladdin_id", "parent_aladdin_id"]
+
+# Placeholders left behind by earlier str() conversions of missing values
+_MISSING_ID_TOKENS = ["", "nan", "NaN", "None", "none", "<NA>"]
+
+ID_SCHEMA: Dict[str, pd.api.extensions.ExtensionDtype] = {
+    **{col: INTEGER_ID_DTYPE for col in INTEGER_ID_COLUMNS},
+    **{col: ALADDIN_ID_DTYPE for col in ALADDIN_ID_COLUMNS},
+}
+
+
+# --------------------------------------------------------------------------- #
+# Public API
+# --------------------------------------------------------------------------- #
+
+
+def csv_read_dtypes(columns: Iterable[str] = None) -> Dict[str, str]:
+    """
+    Return a read_csv dtype mapping that parses the registered state columns
+    straight into (raw) categoricals, so the parser never materialises one
+    Python string per cell. Keys that are not in the file are ignored by pandas.
+    """
+    columns = COLUMN_SCHEMA if columns is None else columns
+    return {col: "category" for col in columns if col in COLUMN_SCHEMA}
+
+
+def state_dtype(extra_states: Iterable[str] = ()) -> CategoricalDtype:
+    """
+    Return STRATEGY_DTYPE with *extra_states* (values delivered outside
+    STRATEGY_STATES) appended, in order, after the ordered states.
+    """
+    extra_states = [state for state in extra_states if state not in STRATEGY_STATES]
+    if not extra_states:
+        return STRATEGY_DTYPE
+    return CategoricalDtype(STRATEGY_STATES + extra_states, ordered=True)
+
+
+def is_state_dtype(dtype) -> bool:
+    """True if *dtype* is STRATEGY_DTYPE, possibly with extra states appended."""
+    return (
+        isinstance(dtype, CategoricalDtype)
+        and dtype.ordered
+        and list(dtype.categories[: len(STRATEGY_STATES)]) == STRATEGY_STATES
+    )
+
+
+def normalise_state_column(series: pd.Series) -> pd.Series:
+    """
+    Return *series* as STRATEGY_DTYPE with every value stripped and upper-cased.
+
+    Blank strings become NaN. Values outside STRATEGY_STATES are kept, as
+    extra categories after the ordered states (see state_dtype), and logged
+    as a data quality warning. Only the distinct values are normalised; rows
+    are remapped through their integer codes.
+    """
+    if is_state_dtype(series.dtype):
+        return series
+
+    raw = (
+        series
+        if isinstance(series.dtype, CategoricalDtype)
+        else series.astype("category")
+    )
+    raw_categories = raw.cat.categories
+    clean_categories = pd.Index(raw_categories.astype(str)).str.strip().str.upper()
+
+    unknown = sorted(set(clean_categories) - set(STRATEGY_STATES) - {""})
+    if unknown:
+        logger.warning(
+            "Column '%s' has values outside %s, kept as extra states: %s",
+            series.name,
+            STRATEGY_STATES,
+            unknown,
+        )
+    dtype = state_dtype(unknown)
+
+    # raw code -> target code (-1 for blanks)
+    target_codes = dtype.categories.get_indexer(clean_categories)
+    codes = raw.cat.codes.to_numpy()
+    new_codes = np.where(codes >= 0, target_codes[codes], -1)
+
+    return pd.Series(
+        pd.Categorical.from_codes(new_codes, dtype=dtype),
+        index=series.index,
+        name=series.name,
+    )
+
+
+def state_codes(series: pd.Series, extra_states: List[str]) -> np.ndarray:
+    """
+    Return the int8 codes of *series* (normalised) in STRATEGY_STATES followed
+    by *extra_states*, -1 for NaN. Extra states not yet in *extra_states* are
+    appended to it (in place), so every series coded with the same list gets
+    comparable codes.
+    """
+    series = normalise_state_column(series)
+    categories = series.cat.categories
+    extra_states.extend(
+        state
+        for state in categories[len(STRATEGY_STATES) :]
+        if state not in extra_states
+    )
+    positions = pd.Index(STRATEGY_STATES + extra_states).get_indexer(categories)
+    codes = series.cat.codes.to_numpy()
+    return np.where(codes >= 0, positions[codes], -1).astype(np.int8)
+
+
+def apply_schema(df: pd.DataFrame, columns: List[str] = None) -> pd.DataFrame:
+    """
+    Normalise every registered column of *df* (or only *columns*) to its
+    registry dtype. Idempotent: columns already in the right dtype are skipped.
+    """
+    targets = [
+        col
+        for col in (df.columns if columns is None else columns)
+        if col in COLUMN_SCHEMA and col in df.columns
+    ]
+    for col in targets:
+        df[col] = normalise_state_column(df[col])
+    return df
+
+
+def _clean_id_text(series: pd.Series) -> pd.Series:
+    """Strip ids, drop Excel's trailing '.0' and turn placeholders into <NA>."""
+    text = (
+        series if isinstance(series.dtype, pd.StringDtype) else series.astype("string")
+    )
+    text = text.str.strip().str.replace(r"\.0$", "", regex=True)
+    return text.mask(text.isin(_MISSING_ID_TOKENS))
+
+
+def to_integer_id(series: pd.Series) -> pd.Series:
+    """
+    Return *series* as Int64 identifiers ("150236668", 150236668.0 and
+    " 150236668 " all become 150236668).
+
+    Values that are not integers (e.g. notes like "no tiene permid") are
+    logged as a data quality warning and become <NA>.
+    """
+    if series.dtype == INTEGER_ID_DTYPE:
+        return series
+    if pd.api.types.is_integer_dtype(series.dtype):
+        return series.astype(INTEGER_ID_DTYPE)
+
+    text = _clean_id_text(series)
+    ids = pd.to_numeric(text, errors="coerce", dtype_backend="numpy_nullable")
+    if not pd.api.types.is_integer_dtype(ids.dtype):
+        ids = ids.where(ids % 1 == 0)
+    invalid = text.notna() & ids.isna()
+    if invalid.any():
+        logger.warning(
+            "Column '%s' has %d non-integer identifiers that will be set to <NA>, "
+            "e.g. %s",
+            series.name,
+            invalid.sum(),
+            text[invalid].unique()[:5].tolist(),
+        )
+    return ids.astype(INTEGER_ID_DTYPE)
+
+
+def to_aladdin_id(series: pd.Series, width: int = ALADDIN_ID_WIDTH) -> pd.Series:
+    """
+    Return *series* as zero-padded, fixed-width Arrow strings ("364", 364 and
+    364.0 all become "000364"). Missing and blank values become <NA>.
+    """
+    if series.dtype == ALADDIN_ID_DTYPE:
+        return series
+    if pd.api.types.is_float_dtype(series.dtype):
+        series = series.astype(INTEGER_ID_DTYPE)
+    return _clean_id_text(series.astype(ALADDIN_ID_DTYPE)).str.zfill(width)
+
+
+def to_id_type(series: pd.Series) -> pd.Series:
+    """
+    Return *series* as the canonical type of the identifier column it is named
+    after (see ID_SCHEMA); series of any other column are returned unchanged.
+    """
+    if series.name in ALADDIN_ID_COLUMNS:
+        return to_aladdin_id(series)
+    if series.name in INTEGER_ID_COLUMNS:
+        return to_integer_id(series)
+    return series
+
+
+def apply_id_types(df: pd.DataFrame, integer_ids: bool = True) -> pd.DataFrame:
+    """
+    Cast every registered identifier column of *df* to its canonical type.
+
+    If *integer_ids* is False, permid / clarityid are left as delivered (used
+    when a file holding free-text notes in those columns is written back);
+    aladdin ids are always canonicalised since padding is lossless.
+    """
+    for col in df.columns.intersection(ALADDIN_ID_COLUMNS):
+        df[col] = to_aladdin_id(df[col])
+    if integer_ids:
+        for col in df.columns.intersection(INTEGER_ID_COLUMNS):
+            df[col] = to_integer_id(df[col])
+    return df
+
+
+def release_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Turn registered categorical columns back into plain object columns, for
+    stages that must write values back unchanged or assign arbitrary values.
+    """
+    for col in df.columns:
+        if col in COLUMN_SCHEMA and isinstance(df[col].dtype, CategoricalDtype):
+            df[col] = df[col].astype(object)
+    return df
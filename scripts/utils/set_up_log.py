@@ -5,6 +5,23 @@ import os
 from datetime import datetime
 
 
+def log_dir_for(log_name: str) -> str:
+    """
+    Return (and create) the log directory of *log_name* for today:
+      <repo_root>/log/<DATE>_logs/<log_name>
+    """
+    # Format today's date as YYYYMMDD.
+    DATE = datetime.now().strftime("%Y%m%d")
+
+    # Determine the repository root:
+    # Since this file is in <repo_root>/scripts/utils, go up three levels.
+    repo_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+    log_file_dir = os.path.join(repo_dir, "log", f"{DATE}_logs", log_name)
+    os.makedirs(log_file_dir, exist_ok=True)
+    return log_file_dir
+
+
 def set_up_log(log_name: str):
     """
     Sets up a logger using a JSON configuration file.
@@ -29,8 +46,7 @@ def set_up_log(log_name: str):
     repo_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 
     # Build the log directory path for the log file:
-    log_file_dir = os.path.join(repo_dir, "log", f"{DATE}_logs", log_name)
-    os.makedirs(log_file_dir, exist_ok=True)
+    log_file_dir = log_dir_for(log_name)
 
     # Build the log file path:
     log_file = os.path.join(log_file_dir, f"{log_name}_{DATE}.log")
@@ -3,9 +3,9 @@
 import os
 from pathlib import Path
 
-import pandas as pd
-
+from scripts.utils import read_engine
 from scripts.utils.config import get_config
+from scripts.utils.dataloaders import iter_clarity_chunks
 
 # Get configuration settings
 config = get_config(script_name="split_region_datafeed", gen_output_dir=False)
@@ -22,28 +22,63 @@ BASE_DIR = config["DATAFEED_DIR"]
 BACK_UP_DIR = paths["CURRENT_DF_WOUTOVR_SEC_PATH"]
 OUTPUT_DIR = BASE_DIR / "datafeeds_without_ovr" / "Feed_region" / f"{DATE}"
 
+ALLOWED_REGIONS = [
+    "N America",
+    "Europe",
+    "Asia Pacific",
+    "Latam",
+    "Emerging Markets",
+]
+
+
+def split_streaming(
+    df_path: Path, target_region: list[str], chunksize: int = 200_000
+) -> None:
+    """
+    Split the datafeed by region chunk by chunk, appending every chunk to the
+    region files so memory stays bounded regardless of the feed size.
+    """
+    logger.info(f"Streaming datafeed for {DATE} to split it by region")
+    if not os.path.exists(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR)
+
+    written = set()
+    # ids are written back as delivered
+    for chunk in iter_clarity_chunks(df_path, chunksize=chunksize, typed_ids=False):
+        for region in target_region + ["no_region"]:
+            if region == "no_region":
+                reg_df = chunk[chunk["region"].isnull()]
+            else:
+                reg_df = chunk[chunk["region"] == region]
+            OUTPUT_FILE = OUTPUT_DIR / f"Equities_{region}_{DATE}.csv"
+            header = region not in written
+            # write the header even for empty regions so every file exists
+            if reg_df.empty and not header:
+                continue
+            reg_df.to_csv(
+                OUTPUT_FILE, index=False, mode="w" if header else "a", header=header
+            )
+            written.add(region)
+
+    logger.info(f"Dataframes saved to {OUTPUT_DIR}")
+
 
 def main(
     df_path: Path,
     target_region: list[str] = ["Latam"],
+    stream: bool = False,
 ):
+    if stream:
+        split_streaming(df_path, list(target_region or ALLOWED_REGIONS))
+        return
+
     # read dataframe
     logger.info(f"Reading datafeed for {DATE}")
-    df = pd.read_csv(
-        df_path,
-        low_memory=False,
-    )
-
-    allowed_regions = [
-        "N America",
-        "Europe",
-        "Asia Pacific",
-        "Latam",
-        "Emerging Markets",
-    ]
+    df = read_engine.read_csv(df_path, low_memory=False)
+    df = read_engine.to_numpy_dtypes(df)
 
     if target_region is None:
-        target_region = allowed_regions
+        target_region = list(ALLOWED_REGIONS)
 
     # filter data by region into different dataframes
     logger.info("Filtering data by region")
@@ -0,0 +1,398 @@
+# state_table.py
+"""
+Canonical long table of every strategy state the pre-override analysis reads.
+
+_00_preovr_analysis used to keep one wide frame per compared side (old / new
+Clarity, BRS portfolios, BRS benchmarks, and an aligned copy of each) and to
+re-read them for the deltas and for the strategy-level analysis. A StateTable
+stores every non-null (issuer, strategy, source) state once, as categoricals:
+
+    states   one row per non-null state
+        issuer      row of ``issuers``
+        strategy    strategy column / override target (categorical)
+        state       STRATEGY_DTYPE (plus any extra state delivered)
+    issuers  one row per source row holding at least one state
+        source      "old", "new", "brs_ptf", "brs_bmk", "ovr" (categorical)
+        permid, aladdin_id  issuer keys (categorical)
+        keyed_by    bit j set: the row answers lookups of its KEY_COLUMNS[j]
+
+so memory grows with the number of states (6 bytes each), not with the
+number of frames or copies, and every view is a query on it:
+
+>>> state_table = StateTable.from_frames(
+...     {"old": old_df, "new": new_df, "brs_ptf": brs_ptf_df}, delta_test_cols,
+...     overrides=override_index,
+... )
+>>> state_table.transitions("old", "new", "permid", new_df.index)   # pivot
+>>> state_table.source("brs_ptf").lookup("aladdin_id", aladdin_ids)  # long
+>>> state_table.counts()                                             # groupby
+
+A key is resolved the way the frames used to be compared: the first row of a
+key in a frame (see align_keys), the last override of an (issuer, target)
+(see OverrideIndex).
+"""
+
+import logging
+from typing import Dict, Iterable, List, Mapping
+
+import numpy as np
+import pandas as pd
+
+from .override_index import OverrideIndex
+from .schema import STRATEGY_STATES, state_codes, state_dtype
+from .transitions import MISSING_CODE, Transitions, transition_codes
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------- #
+# Constants
+# --------------------------------------------------------------------------- #
+
+KEY_COLUMNS = ["permid", "aladdin_id"]
+KEYED_DTYPE = np.uint8
+ISSUER_DTYPE = np.int32
+
+
+# --------------------------------------------------------------------------- #
+# Helpers
+# --------------------------------------------------------------------------- #
+
+
+def _key_index(frame: pd.DataFrame, key_col: str):
+    """*key_col* of *frame* (its index if so named) as a pd.Index, or None."""
+    if frame.index.name == key_col:
+        return pd.Index(frame.index)
+    if key_col in frame.columns:
+        return pd.Index(frame[key_col])
+    return None
+
+
+def _frame_part(
+    frame: pd.DataFrame, strategies: List[str], extra_states: List[str]
+) -> dict:
+    """
+    Non-null (row, strategy, state) states of a wide frame, with its keys.
+    States are coded as schema.state_codes with the shared *extra_states*.
+    """
+    cols = [col for col in strategies if col in frame.columns]
+    codes = np.empty((len(frame), len(cols)), dtype=np.int8)
+    for j, col in enumerate(cols):
+        codes[:, j] = state_codes(frame[col], extra_states)
+    rows, positions = np.nonzero(codes >= 0)  # row-major: by row, then strategy
+
+    keys, keyed = {}, np.zeros(len(frame), dtype=KEYED_DTYPE)
+    for j, key_col in enumerate(KEY_COLUMNS):
+        values = _key_index(frame, key_col)
+        if values is None:
+            continue
+        keys[key_col] = values
+        # the first row of a key (NaN included) is the one align_keys pairs
+        keyed[~values.duplicated()] |= KEYED_DTYPE(1 << j)
+
+    return {
+        "keys": keys,
+        "keyed": keyed,
+        "rows": rows,
+        "strategies": cols,
+        "strategy_codes": positions,
+        "states": codes[rows, positions],
+    }
+
+
+def _override_part(override_index: OverrideIndex, extra_states: List[str]) -> dict:
+    """Non-null override values (one state per override), with their keys."""
+    overrides = override_index.overrides
+    states = state_codes(overrides[override_index.value_col], extra_states)
+    targets = override_index.target_codes
+    rows = np.flatnonzero((states >= 0) & (targets >= 0))
+
+    keys, keyed = {}, np.zeros(len(overrides), dtype=KEYED_DTYPE)
+    for j, key_col in enumerate(KEY_COLUMNS):
+        if key_col not in overrides.columns:
+            continue
+        keys[key_col] = pd.Index(overrides[key_col])
+        # the last override of an (issuer, target) wins, as OverrideIndex.pairs
+        last = (
+            ~pd.DataFrame(
+                {"key": overrides[key_col].to_numpy(dtype=object), "target": targets}
+            )
+            .duplicated(keep="last")
+            .to_numpy()
+        )
+        last &= overrides[key_col].notna().to_numpy() & (targets >= 0)
+        keyed[last] |= KEYED_DTYPE(1 << j)
+
+    return {
+        "keys": keys,
+        "keyed": keyed,
+        "rows": rows,
+        "strategies": list(override_index.targets),
+        "strategy_codes": targets[rows],
+        "states": states[rows],
+    }
+
+
+# --------------------------------------------------------------------------- #
+# Public API
+# --------------------------------------------------------------------------- #
+
+
+class StateTable:
+    """
+    Long categorical (issuer, strategy, source, state) table.
+
+    Attributes:
+        states (pd.DataFrame): issuer, strategy, state; one row per state.
+        issuers (pd.DataFrame): source, KEY_COLUMNS, keyed_by; one row per
+            source row with at least one state.
+        columns (dict[str, list[str]]): Strategies read from every source.
+    """
+
+    def __init__(
+        self,
+        states: pd.DataFrame,
+        issuers: pd.DataFrame,
+        columns: Dict[str, List[str]],
+    ):
+        self.states = states
+        self.issuers = issuers
+        self.columns = columns
+
+    def __repr__(self) -> str:
+        n_bytes = self.states.memory_usage(deep=True).sum()
+        n_bytes += self.issuers.memory_usage(deep=True).sum()
+        return (
+            f"StateTable({len(self.states)} states, {len(self.issuers)} issuer "
+            f"rows, {len(self.columns)} sources, {n_bytes / 2**20:.1f} MiB)"
+        )
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    @classmethod
+    def from_frames(
+        cls,
+        frames: Mapping[str, pd.DataFrame],
+        strategies: List[str],
+        overrides: OverrideIndex = None,
+        override_source: str = "ovr",
+    ) -> "StateTable":
+        """
+        Build the table from wide frames and, optionally, the overrides.
+
+        Parameters:
+            frames (dict[str, pd.DataFrame]): {source: frame}. Issuer keys are
+                read from the KEY_COLUMNS columns, or from the index if it is
+                named after one of them.
+            strategies (list[str]): Strategy columns to read; those missing
+                from a frame are skipped.
+            overrides (OverrideIndex, optional): Added as *override_source*.
+        """
+        # values outside STRATEGY_STATES get one shared code each
+        extra_states = []
+        parts = {
+            source: _frame_part(frame, strategies, extra_states)
+            for source, frame in frames.items()
+        }
+        if overrides is not None:
+            parts[override_source] = _override_part(overrides, extra_states)
+
+        # issuer rows: the rows of every part holding at least one state
+        kept, issuer_codes, offset = {}, [], 0
+        for source, part in parts.items():
+            has_state = np.bincount(part["rows"], minlength=len(part["keyed"])) > 0
+            kept[source] = np.flatnonzero(has_state)
+            issuer_codes.append(offset + (np.cumsum(has_state) - 1)[part["rows"]])
+            offset += len(kept[source])
+
+        issuers = {
+            "source": pd.Categorical.from_codes(
+                np.repeat(np.arange(len(parts)), [len(rows) for rows in kept.values()]),
+                list(parts),
+            )
+        }
+        for key_col in KEY_COLUMNS:
+            present = [s for s in parts if key_col in parts[s]["keys"]]
+            codes, categories = np.full(offset, -1), pd.Index([], dtype=object)
+            if present:
+                values = [parts[s]["keys"][key_col].take(kept[s]) for s in present]
+                codes, categories = pd.factorize(values[0].append(values[1:]))
+                # sources without the key column get no key (code -1)
+                pieces = iter(np.split(codes, np.cumsum([len(v) for v in values])))
+                codes = np.concatenate(
+                    [
+                        next(pieces) if s in present else np.full(len(kept[s]), -1)
+                        for s in parts
+                    ]
+                )
+            issuers[key_col] = pd.Categorical.from_codes(codes, categories)
+        issuers["keyed_by"] = np.concatenate(
+            [part["keyed"][kept[s]] for s, part in parts.items()]
+        )
+
+        names = pd.Index(
+            list(
+                dict.fromkeys(n for part in parts.values() for n in part["strategies"])
+            ),
+            dtype=object,
+        )
+        strategy_codes = np.concatenate(
+            [
+                names.get_indexer(pd.Index(part["strategies"], dtype=object))[
+                    part["strategy_codes"]
+                ]
+                for part in parts.values()
+            ]
+        )
+        states = pd.DataFrame(
+            {
+                "issuer": np.concatenate(issuer_codes).astype(ISSUER_DTYPE),
+                "strategy": pd.Categorical.from_codes(strategy_codes, names),
+                "state": pd.Categorical.from_codes(
+                    np.concatenate([part["states"] for part in parts.values()]),
+                    dtype=state_dtype(extra_states),
+                ),
+            }
+        )
+
+        table = cls(
+            states,
+            pd.DataFrame(issuers),
+            {source: part["strategies"] for source, part in parts.items()},
+        )
+        logger.info("Built %r", table)
+        return table
+
+    def _keyed(self, source: str, key_col: str) -> np.ndarray:
+        """Boolean array over ``issuers``: rows of *source* resolving *key_col*."""
+        if source not in self.columns:
+            raise ValueError(
+                f"Unknown source '{source}', expected one of {list(self.columns)}"
+            )
+        bit = KEYED_DTYPE(1 << KEY_COLUMNS.index(key_col))
+        return (self.issuers["source"] == source).to_numpy() & (
+            (self.issuers["keyed_by"].to_numpy() & bit) != 0
+        )
+
+    def source(self, source: str) -> "StateSource":
+        """View of one source, usable wherever a lookup frame is expected."""
+        if source not in self.columns:
+            raise ValueError(
+                f"Unknown source '{source}', expected one of {list(self.columns)}"
+            )
+        return StateSource(self, source)
+
+    def lookup(
+        self,
+        source: str,
+        key_col: str,
+        keys: Iterable,
+        strategies: Iterable[str] = None,
+    ) -> pd.DataFrame:
+        """
+        (_key, _strategy, value) rows of *source* for the non-null *keys* of
+        *key_col*, as the strategy-level analysis reads them.
+        """
+        issuer_keys = self.issuers[key_col]
+        found = self._keyed(source, key_col) & issuer_keys.isin(list(keys)).to_numpy()
+        selected = found[self.states["issuer"].to_numpy()]
+        if strategies is not None:
+            selected &= self.states["strategy"].isin(list(strategies)).to_numpy()
+        states = self.states[selected]
+        return pd.DataFrame(
+            {
+                "_key": issuer_keys.to_numpy(dtype=object)[states["issuer"].to_numpy()],
+                "_strategy": states["strategy"].to_numpy(dtype=object),
+                "value": states["state"].to_numpy(dtype=object),
+            }
+        )
+
+    def state_codes(
+        self, source: str, key_col: str, keys: pd.Index, cols: List[str]
+    ) -> np.ndarray:
+        """
+        (keys x cols) int8 state codes of *source* (MISSING_CODE where the key
+        has no state), as compute_transitions codes an aligned wide frame.
+        """
+        keys = pd.Index(keys)
+        if not keys.is_unique:
+            raise ValueError(f"keys of {source} must be unique")
+        issuer_keys = self.issuers[key_col]
+        # position in *keys* of every key category, then of NaN (code -1)
+        na_position = np.flatnonzero(keys.isna())
+        positions = np.append(
+            keys.get_indexer(issuer_keys.cat.categories),
+            na_position[0] if len(na_position) else -1,
+        )
+        issuer_rows = np.where(
+            self._keyed(source, key_col),
+            positions[issuer_keys.cat.codes.to_numpy()],
+            -1,
+        )
+        rows = issuer_rows[self.states["issuer"].to_numpy()]
+        columns = pd.Index(cols, dtype=object).get_indexer(
+            self.states["strategy"].cat.categories
+        )[self.states["strategy"].cat.codes.to_numpy()]
+        found = (rows >= 0) & (columns >= 0)
+
+        codes = np.full((len(keys), len(cols)), MISSING_CODE, dtype=np.int8, order="F")
+        codes[rows[found], columns[found]] = transition_codes(
+            self.states["state"].cat.codes.to_numpy()[found]
+        )
+        return codes
+
+    def transitions(
+        self, base: str, new: str, key_col: str, keys: Iterable
+    ) -> Transitions:
+        """
+        Transitions from *base* to *new* over *keys* of *key_col* (e.g. the
+        common keys of a KeyAlignment), as compute_transitions on the two
+        aligned wide frames.
+        """
+        keys = pd.Index(keys)
+        cols = [col for col in self.columns[base] if col in self.columns[new]]
+        return Transitions(
+            cols,
+            keys,
+            self.state_codes(base, key_col, keys, cols),
+            self.state_codes(new, key_col, keys, cols),
+            self.extra_states,
+        )
+
+    @property
+    def extra_states(self) -> List[str]:
+        """States outside STRATEGY_STATES, as appended to the state dtype."""
+        return list(self.states["state"].cat.categories[len(STRATEGY_STATES) :])
+
+    def counts(self) -> pd.DataFrame:
+        """Number of states per (source, strategy, state)."""
+        sources = self.issuers["source"].to_numpy()[self.states["issuer"].to_numpy()]
+        return (
+            self.states.assign(
+                source=pd.Categorical(
+                    sources, categories=self.issuers["source"].cat.categories
+                )
+            )
+            .groupby(["source", "strategy", "state"], observed=True)
+            .size()
+            .rename("n")
+            .reset_index()
+        )
+
+
+class StateSource:
+    """One source of a StateTable, in place of a wide lookup frame."""
+
+    def __init__(self, table: StateTable, source: str):
+        self.table = table
+        self.source = source
+
+    def __repr__(self) -> str:
+        return f"StateSource({self.source})"
+
+    def lookup(
+        self, key_col: str, keys: Iterable, strategies: Iterable[str] = None
+    ) -> pd.DataFrame:
+        """See StateTable.lookup."""
+        return self.table.lookup(self.source, key_col, keys, strategies)
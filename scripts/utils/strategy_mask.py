@@ -0,0 +1,166 @@
+# strategy_mask.py
+"""
+Integer bitmask encoding of per-issuer strategy lists.
+
+exclusion_list, inclusion_list, flagged_list and zombie_list hold, for every
+issuer, the subset of a fixed universe of strategy columns (delta_test_cols).
+Carried as Python lists they force every filter, intersection and emptiness
+check through a row-wise apply. A StrategyBitmask encodes each subset as one
+uint16 (bit j set <=> universe column j is in the list), so those checks are
+numpy bitwise operations over the whole column:
+
+>>> STRATEGY_MASK = StrategyBitmask(delta_test_cols)
+>>> masks = STRATEGY_MASK.encode([["str_001_s"], [], ["str_002_ec", "scs_002_ec"]])
+>>> masks != 0                              # non-empty lists
+>>> masks & STRATEGY_MASK.bit("str_002_ec")  # membership
+>>> STRATEGY_MASK.decode(masks)             # back to lists, for the writers
+
+Masks are rendered back to lists of column names only when a frame is
+written out (see StrategyBitmask.render).
+"""
+
+import logging
+from itertools import chain
+from typing import Any, Iterable, List
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_integer_dtype
+
+from .transitions import transition_lists
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------- #
+# Constants
+# --------------------------------------------------------------------------- #
+
+MASK_DTYPE = np.uint16
+MAX_STRATEGIES = np.iinfo(MASK_DTYPE).bits
+
+
+# --------------------------------------------------------------------------- #
+# Helpers
+# --------------------------------------------------------------------------- #
+
+
+def _items(value: Any) -> Iterable:
+    """Return *value* if it is a list-like of strategies, else an empty tuple."""
+    if isinstance(value, (list, tuple, set, np.ndarray)):
+        return value
+    return ()
+
+
+def is_mask(series: pd.Series) -> bool:
+    """True if *series* holds bitmasks (integer dtype) rather than lists."""
+    return is_integer_dtype(series.dtype)
+
+
+# --------------------------------------------------------------------------- #
+# Public API
+# --------------------------------------------------------------------------- #
+
+
+class StrategyBitmask:
+    """
+    Encoder / decoder between strategy lists and uint16 bitmasks.
+
+    Attributes:
+        cols (list[str]): The strategy universe; bit j stands for cols[j].
+    """
+
+    def __init__(self, cols: List[str]):
+        if len(cols) > MAX_STRATEGIES:
+            raise ValueError(
+                f"{len(cols)} strategies do not fit a {MAX_STRATEGIES}-bit mask"
+            )
+        self.cols = list(cols)
+        self._bits = {col: 1 << j for j, col in enumerate(self.cols)}
+        self._weights = np.array(list(self._bits.values()), dtype=MASK_DTYPE)
+        self._index = pd.Index(self.cols)
+
+    def __repr__(self) -> str:
+        return f"StrategyBitmask({len(self.cols)} strategies)"
+
+    def bit(self, col: str) -> int:
+        """Return the bit of strategy *col*."""
+        try:
+            return self._bits[col]
+        except KeyError:
+            raise ValueError(
+                f"Unknown strategy '{col}', expected one of {self.cols}"
+            ) from None
+
+    def bits(self, names: Iterable) -> np.ndarray:
+        """Bit of every strategy name (0 for names outside the universe)."""
+        codes = self._index.get_indexer(pd.Index(list(names), dtype=object))
+        return np.where(codes >= 0, self._weights[codes], 0).astype(MASK_DTYPE)
+
+    def from_matrix(self, cols: List[str], matrix: np.ndarray) -> np.ndarray:
+        """Pack a boolean (rows x *cols*) matrix into one mask per row."""
+        weights = np.array([self.bit(col) for col in cols], dtype=MASK_DTYPE)
+        masks = np.bitwise_or.reduce(matrix * weights, axis=1)
+        return masks.astype(MASK_DTYPE, copy=False)
+
+    def to_matrix(self, masks: Iterable[int]) -> np.ndarray:
+        """Unpack masks into a boolean (rows x cols) matrix."""
+        masks = np.asarray(masks, dtype=MASK_DTYPE)
+        return (masks[:, None] & self._weights) != 0
+
+    def encode(self, values: Iterable) -> np.ndarray:
+        """
+        Encode list-likes of strategy names into masks.
+
+        Items outside the universe (e.g. portfolio ids) are ignored, and
+        (portfolio_id, strategy) pairs count as their strategy. Values that
+        are not list-likes (NaN, None) encode as 0. The lists are flattened
+        once into (row, item) arrays and OR-reduced per row.
+        """
+        values = values.tolist() if isinstance(values, pd.Series) else list(values)
+        if not set(map(type, values)) <= {list}:
+            values = [_items(value) for value in values]
+        rows = np.repeat(np.arange(len(values)), list(map(len, values)))
+        flat = list(chain.from_iterable(values))
+        item_types = set(map(type, flat))
+        if item_types & {list, tuple}:
+            # (id, strategy) pairs or nested lists: flatten one more level
+            if not item_types <= {list, tuple}:
+                flat = [
+                    item if isinstance(item, (list, tuple)) else (item,)
+                    for item in flat
+                ]
+            rows = np.repeat(rows, list(map(len, flat)))
+            flat = list(chain.from_iterable(flat))
+
+        masks = np.zeros(len(values), dtype=MASK_DTYPE)
+        if not flat:
+            return masks
+        bits = self.bits(flat)
+        # rows is sorted: OR-reduce each run of items of the same row
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        masks[rows[starts]] = np.bitwise_or.reduceat(bits, starts)
+        return masks
+
+    def decode(self, masks: Iterable[int]) -> List[List[str]]:
+        """Decode masks into lists of strategy names, in universe order."""
+        return transition_lists(self.cols, self.to_matrix(masks))
+
+    def contains(self, series: pd.Series, col: str) -> np.ndarray:
+        """Boolean array: the mask of each row has strategy *col*."""
+        return (series.to_numpy(dtype=MASK_DTYPE) & self.bit(col)) != 0
+
+    def render(self, df: pd.DataFrame, columns: Iterable[str]) -> pd.DataFrame:
+        """
+        Return *df* with the mask columns among *columns* decoded to lists.
+
+        Columns that are missing or already hold lists are left untouched, so
+        a frame can be rendered unconditionally right before it is written.
+        """
+        columns = [col for col in columns if col in df.columns and is_mask(df[col])]
+        if not columns:
+            return df
+        df = df.copy()
+        for col in columns:
+            df[col] = pd.Series(self.decode(df[col]), index=df.index, dtype=object)
+        return df
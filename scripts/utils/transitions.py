@@ -0,0 +1,195 @@
+# transitions.py
+"""
+Single-pass from-state / to-state comparison of two strategy snapshots.
+
+_00_preovr_analysis compares the same (old, new) pairs several times: once
+for new exclusions, once for new inclusions and once for new flags. Each view
+used to copy the frames, recompare every column and re-normalise both sides
+as text. compute_transitions compares a pair once and keeps two compact
+(rows x columns) int8 code matrices:
+
+    code  0   1     2         3        4, 5, ...
+    state OK  FLAG  EXCLUDED  missing  extra states (outside STRATEGY_STATES)
+
+Every view is then a vectorised slice of the codes:
+
+>>> transitions = compute_transitions(old_df, new_df, delta_test_cols)
+>>> transitions.into(["EXCLUDED"])          # new exclusions
+>>> transitions.into(["OK", "FLAG"])        # new inclusions
+>>> transitions.between(["OK"], ["FLAG"])   # any other from -> to view
+>>> transitions.changed                     # cell differs between old and new
+"""
+
+import logging
+from typing import Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from .schema import STRATEGY_STATES, state_codes
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------- #
+# Constants
+# --------------------------------------------------------------------------- #
+
+STATE_CODES = {state: code for code, state in enumerate(STRATEGY_STATES)}
+MISSING_CODE = len(STRATEGY_STATES)
+
+
+# --------------------------------------------------------------------------- #
+# Helpers
+# --------------------------------------------------------------------------- #
+
+
+def transition_codes(codes: np.ndarray) -> np.ndarray:
+    """
+    Map schema.state_codes (-1 for NaN, extra states after the ordered ones)
+    to transition codes: MISSING_CODE for NaN, extra states after it.
+    """
+    codes = codes.astype(np.int8)
+    return np.where(
+        codes < 0,
+        np.int8(MISSING_CODE),
+        np.where(codes >= MISSING_CODE, codes + 1, codes),
+    ).astype(np.int8)
+
+
+def _codes_for(states: Iterable[str]) -> List[int]:
+    normalised = [str(state).strip().upper() for state in states]
+    unknown = [state for state in normalised if state not in STATE_CODES]
+    if unknown:
+        raise ValueError(
+            f"Unknown states {unknown}, expected some of {STRATEGY_STATES}"
+        )
+    return [STATE_CODES[state] for state in normalised]
+
+
+def transition_lists(cols: List[str], matrix: np.ndarray) -> List[List[str]]:
+    """Return, for every row of the boolean *matrix*, the list of its columns."""
+    rows, positions = np.nonzero(matrix)  # row-major: columns keep their order
+    names = np.asarray(cols, dtype=object)[positions].tolist()
+    ends = np.cumsum(matrix.sum(axis=1)).tolist()
+    starts = [0] + ends[:-1]
+    return [names[start:end] for start, end in zip(starts, ends)]
+
+
+# --------------------------------------------------------------------------- #
+# Public API
+# --------------------------------------------------------------------------- #
+
+
+class Transitions:
+    """
+    From-state / to-state codes of every (row, column) of a compared pair.
+
+    Attributes:
+        cols (list[str]): Compared columns (present in both frames).
+        index (pd.Index): Row labels (shared by both frames).
+        old_codes, new_codes (np.ndarray): (rows x cols) int8 state codes.
+        extra_states (list[str]): States of the codes after MISSING_CODE.
+    """
+
+    def __init__(
+        self,
+        cols: List[str],
+        index: pd.Index,
+        old_codes: np.ndarray,
+        new_codes: np.ndarray,
+        extra_states: List[str] = (),
+    ):
+        self.cols = list(cols)
+        self.index = index
+        self.old_codes = old_codes
+        self.new_codes = new_codes
+        self.extra_states = list(extra_states)
+
+    def __repr__(self) -> str:
+        return f"Transitions({len(self.index)} rows x {len(self.cols)} columns)"
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def changed(self) -> np.ndarray:
+        """Boolean matrix: the state differs between old and new."""
+        return self.old_codes != self.new_codes
+
+    def between(
+        self, from_states: Iterable[str], to_states: Iterable[str]
+    ) -> np.ndarray:
+        """Boolean matrix: old state in *from_states* and new state in *to_states*."""
+        return np.isin(self.old_codes, _codes_for(from_states)) & np.isin(
+            self.new_codes, _codes_for(to_states)
+        )
+
+    def into(self, states: Iterable[str]) -> np.ndarray:
+        """Boolean matrix: the new state is in *states* and the old one is not."""
+        codes = _codes_for(states)
+        return np.isin(self.new_codes, codes) & ~np.isin(self.old_codes, codes)
+
+    def lists(self, matrix: np.ndarray) -> pd.Series:
+        """Return, per row, the list of columns flagged in the boolean *matrix*."""
+        return pd.Series(
+            transition_lists(self.cols, matrix), index=self.index, dtype=object
+        )
+
+    def counts(self) -> pd.DataFrame:
+        """Return the number of cells per (column, old state, new state)."""
+        labels = np.array(STRATEGY_STATES + ["NA"] + self.extra_states, dtype=object)
+        n_codes = len(labels)
+        frames = []
+        for j, col in enumerate(self.cols):
+            pairs = (
+                self.old_codes[:, j].astype(np.intp) * n_codes + self.new_codes[:, j]
+            )
+            n = np.bincount(pairs, minlength=n_codes * n_codes)
+            nonzero = np.flatnonzero(n)
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "column": col,
+                        "old": labels[nonzero // n_codes],
+                        "new": labels[nonzero % n_codes],
+                        "n": n[nonzero],
+                    }
+                )
+            )
+        if not frames:
+            return pd.DataFrame(columns=["column", "old", "new", "n"])
+        return pd.concat(frames, ignore_index=True)
+
+
+def compute_transitions(
+    old: pd.DataFrame, new: pd.DataFrame, cols: List[str]
+) -> Transitions:
+    """
+    Compare the strategy columns of two row-aligned frames once.
+
+    Parameters:
+        old (pd.DataFrame): Baseline frame (e.g. last month, or BRS).
+        new (pd.DataFrame): Frame compared against it. Both must share the
+            same index in the same order, as returned by prepare_dataframes.
+        cols (list[str]): Columns to compare; those missing from either frame
+            are skipped.
+
+    Returns:
+        Transitions: The int8 from-state / to-state code matrices. Values
+        outside STRATEGY_STATES keep their own codes (see extra_states), so a
+        change to or from them is a change.
+    """
+    if not old.index.equals(new.index):
+        raise ValueError(
+            "old and new must share the same index (see prepare_dataframes)"
+        )
+    cols = [col for col in cols if col in old.columns and col in new.columns]
+    shape = (len(new), len(cols))
+    old_codes = np.empty(shape, dtype=np.int8, order="F")
+    new_codes = np.empty(shape, dtype=np.int8, order="F")
+    extra_states = []
+    for j, col in enumerate(cols):
+        old_codes[:, j] = transition_codes(state_codes(old[col], extra_states))
+        new_codes[:, j] = transition_codes(state_codes(new[col], extra_states))
+    return Transitions(cols, new.index, old_codes, new_codes, extra_states)
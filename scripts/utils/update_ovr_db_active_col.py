@@ -17,12 +17,11 @@ from scripts.utils.config import get_config
 from scripts.utils.dataloaders import (
     load_clarity_data,
     load_overrides,
-    load_crossreference,
-)
-from scripts.utils.clarity_data_quality_control_functions import (
-    log_df_head_compact,
-    pad_identifiers,
 )
+from scripts.utils.clarity_data_quality_control_functions import log_df_head_compact
+from scripts.utils.override_index import OverrideIndex
+from scripts.utils.schema import to_aladdin_id
+from scripts.utils.xref_index import load_crossreference_index
 
 # config script
 config = get_config("update-ovr-db-active-col", interactive=False, gen_output_dir=False)
@@ -69,31 +68,26 @@ target_cols_overrides = [
 def update_df_value_column(
     overrides: pd.DataFrame,
     df_clarity_filtered: pd.DataFrame,
+    override_index: OverrideIndex,
 ) -> pd.DataFrame:
     """
     Replace overrides['df_value'] with the value that is currently in
     the (deduplicated) Clarity feed, matched on aladdin_id + ovr_target.
+    override_index must be built from *overrides* (same rows, same order).
     """
 
-    # ── 1.  Melt feed, keep only non-null values ────────────────────────────────
-    clarity_long = df_clarity_filtered.melt(
-        id_vars="aladdin_id", var_name="ovr_target", value_name="clarity_value"
-    ).dropna(subset=["clarity_value"])
-
-    # ── 2.  Detect duplicates BEFORE the merge  ────────────────────────────────
-    dup_mask = clarity_long.duplicated(["aladdin_id", "ovr_target"], keep=False)
+    # ── 1.  Detect duplicated issuers in the feed BEFORE the lookup ──────────
+    dup_mask = df_clarity_filtered["aladdin_id"].notna() & df_clarity_filtered[
+        "aladdin_id"
+    ].duplicated(keep=False)
     if dup_mask.any():
         raise ValueError(
-            "[DQ] duplicate aladdin_id / ovr_target pairs in clarity feed:\n"
-            f"{clarity_long.loc[dup_mask].head()}"
+            "[DQ] duplicate aladdin_id rows in clarity feed:\n"
+            f"{df_clarity_filtered.loc[dup_mask].head()}"
         )
 
-    # ── 3.  Merge and update, but preserve the original index ─────────────────
-    clarity_map = clarity_long.set_index(["aladdin_id", "ovr_target"])["clarity_value"]
-
-    # vectorised lookup without changing the row order or index
-    overrides_idx = list(zip(overrides["aladdin_id"], overrides["ovr_target"]))
-    new_vals = clarity_map.reindex(overrides_idx).values
+    # ── 2.  Feed value of every override, aligned to the overrides ───────────
+    new_vals = override_index.feed_values(df_clarity_filtered, key_col="aladdin_id")
 
     overrides["df_value"] = np.where(
         pd.notna(new_vals), new_vals, overrides["df_value"]
@@ -102,28 +96,9 @@ def update_df_value_column(
     return overrides
 
 
-def update_override_active(
-    overrides: pd.DataFrame,
-    df_clarity_filtered: pd.DataFrame,
-) -> pd.DataFrame:
-
-    clarity_melted = df_clarity_filtered.melt(
-        id_vars="aladdin_id", var_name="ovr_target", value_name="clarity_value"
-    ).dropna(subset=["clarity_value"])
-
-    duplicates = clarity_melted.duplicated(["aladdin_id", "ovr_target"])
-    if duplicates.any():
-        dup_keys = clarity_melted.loc[duplicates, ["aladdin_id", "ovr_target"]]
-        raise ValueError(
-            f"[DQ] {len(dup_keys)} duplicate keys in clarity feed:\n"
-            f"{dup_keys.head().to_string(index=False)}"
-        )
-
-    overrides_merged = overrides.merge(
-        clarity_melted, on=["aladdin_id", "ovr_target"], how="left"
-    )
-
-    condition = overrides_merged["ovr_value"] == overrides_merged["df_value"]
+def update_override_active(overrides: pd.DataFrame) -> pd.DataFrame:
+    """Deactivate the overrides whose value is already the feed's (df_value)."""
+    condition = overrides["ovr_value"] == overrides["df_value"]
 
     try:
         overrides.loc[condition.values, "ovr_active"] = False
@@ -134,26 +109,6 @@ def update_override_active(
     return overrides
 
 
-def find_conflicting_columns(
-    df: pd.DataFrame,
-    id_col: str = "aladdin_id",
-    conflict_col_a: str = "ovr_target",
-    conflict_col_b: str = "ovr_value",
-) -> pd.DataFrame:
-    grouping_cols = [id_col, conflict_col_a]
-    target_cols = grouping_cols + [conflict_col_b]
-
-    # Step 1: Count unique conflict_col_b values per group
-    grouped_df = df.groupby(grouping_cols)[conflict_col_b].nunique()
-
-    # Step 2: Filter to groups with more than one unique conflict_col_b
-    conflicting_keys = grouped_df[grouped_df > 1].index
-
-    # Step 3: Use a mask to filter original DataFrame
-    mask = df.set_index(grouping_cols).index.isin(conflicting_keys)
-    return df[mask].sort_values(by=grouping_cols)[target_cols].copy()
-
-
 def main():
 
     # load brs issuer data in ptf and bkm
@@ -170,25 +125,25 @@ def main():
     )
 
     brs_issuer_data.rename(columns={"issuer_id": "aladdin_id"}, inplace=True)
-    brs_issuer_data["aladdin_id"] = brs_issuer_data["aladdin_id"].apply(
-        lambda x: str(x) if pd.notna(x) else x
-    )
-    brs_issuer_data["aladdin_id"] = pad_identifiers(brs_issuer_data["aladdin_id"])
+    brs_issuer_data["aladdin_id"] = to_aladdin_id(brs_issuer_data["aladdin_id"])
     brs_issuer_data.drop_duplicates(subset=["aladdin_id"], inplace=True)
 
     # load clarity data
+    # loaders emit canonical ids: permid is Int64, aladdin_id zero-padded
     df_clarity = load_clarity_data(df_path, target_cols=clarity_test_col)
-    df_clarity.loc[:, "permid"] = df_clarity.permid.astype(
-        str
-    )  # ensure permid is str type
 
     # log_df_head_compact(df_clarity, df_name="df_clarity")
     overrides = load_overrides(
-        overrides_path, target_cols=target_cols_overrides, drop_active=False
+        overrides_path,
+        target_cols=target_cols_overrides,
+        drop_active=False,
+        normalise_states=False,
+        typed_ids=False,
     )
-    overrides["aladdin_id"] = pad_identifiers(overrides["aladdin_id"])
     # log_df_head_compact(overrides, df_name="overrides")
-    troubles_overrides = find_conflicting_columns(overrides)
+    # one index over the overrides: conflicts are detected once, at build time
+    override_index = OverrideIndex.from_frame(overrides)
+    troubles_overrides = override_index.conflicts
     # log_df_head_compact(troubles_overrides, df_name="troubles_overrides")
 
     logger.info(
@@ -197,29 +152,12 @@ def main():
 
     logger.info(f"There are {len(troubles_overrides)} conflicting rows in overrides\n")
 
-    crossreference = load_crossreference(crossreference_path)
-    # log_df_head_compact(crossreference, df_name="crossreference_raw")
-    logger.info("Removing duplicates and NaN values from crossreference")
-    crossreference = crossreference.dropna(subset=["permid"]).drop_duplicates(
-        subset=["permid"]
-    )
-    # log_df_head_compact(crossreference, df_name="crossreference_cleaned")
-    # set permid in crossreference as str
-    crossreference["permid"] = crossreference["permid"].apply(
-        lambda x: str(x) if pd.notna(x) else x
-    )
+    # persisted permid <-> aladdin_id index, first match per permid
+    crossreference = load_crossreference_index(crossreference_path)
 
     # add aladdin_id to df_clarity from crossreference
-    df_clarity = df_clarity.merge(
-        crossreference[["permid", "aladdin_id"]], on="permid", how="left"
-    )
+    df_clarity = crossreference.add_aladdin_id(df_clarity)
     log_df_head_compact(df_clarity, df_name="df_clarity_with_aladdin_id")
-    # set permid in df_clarity & overrides as str
-    logger.info("Setting permid in df_clarity & overrides as str - to avoid issues")
-    df_clarity["aladdin_id"] = df_clarity["aladdin_id"].apply(
-        lambda x: str(x) if pd.notna(x) else x
-    )
-    overrides["aladdin_id"] = overrides["aladdin_id"].astype(str)
 
     empty_aladdin_rows = df_clarity["aladdin_id"].isna().sum()
     duplicated_aladdin_rows = df_clarity["aladdin_id"].duplicated().sum()
@@ -254,11 +192,11 @@ def main():
 
     # update active column df_value of overrides with data from df_clarity
     logger.info("Updating overrides df_value column")
-    overrides = update_df_value_column(overrides, df_clarity_filtered)
+    overrides = update_df_value_column(overrides, df_clarity_filtered, override_index)
 
     # update active status of overrides
     logger.info("updating overrides active status")
-    overrides = update_override_active(overrides, df_clarity_filtered)
+    overrides = update_override_active(overrides)
     log_df_head_compact(overrides, df_name="overrides_updated")
 
     # RETURN DF OF OVERRIDES THAT HAS BEEN DEACTIVATED
@@ -0,0 +1,352 @@
+# xref_index.py
+"""
+Persistent, memory-mapped permid <-> aladdin_id index of the crossreference.
+
+Every stage used to re-parse Aladdin_Clarity_Issuers_{DATE}01.csv, run
+drop_duplicates / dropna on it and merge it in to translate identifiers.
+The index is built once per delivery and stored as plain NumPy arrays next to
+the Parquet cache (``<repo_root>/cache/xref/<stem>_<fingerprint>/``):
+
+    permid_keys      int64   sorted unique permids
+    permid_offsets   int64   permid_keys[i] maps to permid_values[off[i]:off[i+1]]
+    permid_values    <U      aladdin_ids, in file order within each permid
+    aladdin_keys     <U      sorted unique aladdin_ids
+    aladdin_offsets  int64
+    aladdin_values   int64   permids, in file order within each aladdin_id
+
+Later stages memory-map the arrays instead of parsing the CSV, and every
+lookup is a vectorised np.searchsorted over the sorted keys.
+
+Example
+-------
+>>> xref = load_crossreference_index(CROSSREFERENCE_PATH)
+>>> clarity_df = xref.add_aladdin_id(clarity_df)          # replaces the merge
+>>> pairs = xref.aladdin_id_to_permids(portfolio["aladdin_id"])  # many-to-many
+"""
+
+import logging
+import shutil
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .dataloaders import load_crossreference
+from .load_metrics import instrumented_loader, record_io
+from .parquet_cache import CACHE_DIR, file_fingerprint
+from .schema import ALADDIN_ID_DTYPE, INTEGER_ID_DTYPE, to_integer_id
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------- #
+# Constants
+# --------------------------------------------------------------------------- #
+
+INDEX_DIR = CACHE_DIR.parent / "xref"
+_ARRAY_NAMES = (
+    "permid_keys",
+    "permid_offsets",
+    "permid_values",
+    "aladdin_keys",
+    "aladdin_offsets",
+    "aladdin_values",
+)
+# Query sentinels for missing ids (never present in the keys)
+_MISSING_PERMID = -1
+_MISSING_ALADDIN_ID = ""
+
+
+# --------------------------------------------------------------------------- #
+# Helpers
+# --------------------------------------------------------------------------- #
+
+
+def _group_by_key(keys: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """Return (sorted unique keys, offsets, values grouped by key in input order)."""
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    unique_keys, starts = np.unique(sorted_keys, return_index=True)
+    offsets = np.append(starts, len(sorted_keys)).astype(np.int64)
+    return unique_keys, offsets, values[order]
+
+
+def _locate(keys: np.ndarray, offsets: np.ndarray, queries: np.ndarray):
+    """Return (found mask, start offset, match count) of every query."""
+    if len(keys) == 0:
+        zeros = np.zeros(len(queries), dtype=np.int64)
+        return np.zeros(len(queries), dtype=bool), zeros, zeros
+    idx = np.minimum(np.searchsorted(keys, queries), len(keys) - 1)
+    found = keys[idx] == queries
+    starts = offsets[idx]
+    counts = np.where(found, offsets[idx + 1] - starts, 0)
+    return found, starts, counts
+
+
+def _permid_queries(permids) -> np.ndarray:
+    # permids delivered as text ("150236668", "150236668.0") are queried typed
+    return to_integer_id(pd.Series(permids)).to_numpy(
+        dtype=np.int64, na_value=_MISSING_PERMID
+    )
+
+
+def _aladdin_queries(aladdin_ids) -> np.ndarray:
+    ids = pd.Series(aladdin_ids).astype(ALADDIN_ID_DTYPE)
+    return np.asarray(
+        ids.to_numpy(dtype=object, na_value=_MISSING_ALADDIN_ID), dtype="U"
+    )
+
+
+# --------------------------------------------------------------------------- #
+# Public API
+# --------------------------------------------------------------------------- #
+
+
+class CrossreferenceIndex:
+    """
+    Bidirectional permid <-> aladdin_id index over sorted key arrays.
+
+    Build it with from_frame (or, normally, load_crossreference_index) and
+    use it instead of merging the crossreference DataFrame in.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self._arrays = arrays
+        self.permid_keys = arrays["permid_keys"]
+        self.permid_offsets = arrays["permid_offsets"]
+        self.permid_values = arrays["permid_values"]
+        self.aladdin_keys = arrays["aladdin_keys"]
+        self.aladdin_offsets = arrays["aladdin_offsets"]
+        self.aladdin_values = arrays["aladdin_values"]
+
+    def __repr__(self) -> str:
+        return (
+            f"CrossreferenceIndex({len(self.permid_keys)} permids, "
+            f"{len(self.aladdin_keys)} aladdin_ids, {len(self)} pairs)"
+        )
+
+    def __len__(self) -> int:
+        return len(self.permid_values)
+
+    @classmethod
+    def from_frame(cls, crossreference: pd.DataFrame) -> "CrossreferenceIndex":
+        """Build the index from a crossreference with permid / aladdin_id columns."""
+        pairs = (
+            crossreference[["permid", "aladdin_id"]]
+            .dropna()
+            .drop_duplicates()  # keeps the first occurrence, i.e. file order
+        )
+        permids = _permid_queries(pairs["permid"])
+        aladdin_ids = _aladdin_queries(pairs["aladdin_id"])
+
+        permid_keys, permid_offsets, permid_values = _group_by_key(permids, aladdin_ids)
+        aladdin_keys, aladdin_offsets, aladdin_values = _group_by_key(
+            aladdin_ids, permids
+        )
+        return cls(
+            {
+                "permid_keys": permid_keys,
+                "permid_offsets": permid_offsets,
+                "permid_values": permid_values,
+                "aladdin_keys": aladdin_keys,
+                "aladdin_offsets": aladdin_offsets,
+                "aladdin_values": aladdin_values,
+            }
+        )
+
+    def save(self, index_dir: Path) -> Path:
+        """Write the arrays to *index_dir* (atomically, via a temporary directory)."""
+        index_dir = Path(index_dir)
+        tmp_dir = index_dir.with_name(index_dir.name + ".tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+        for name in _ARRAY_NAMES:
+            np.save(tmp_dir / f"{name}.npy", self._arrays[name])
+        shutil.rmtree(index_dir, ignore_errors=True)
+        tmp_dir.rename(index_dir)
+        return index_dir
+
+    @classmethod
+    def load(cls, index_dir: Path, mmap: bool = True) -> "CrossreferenceIndex":
+        """Open a saved index, memory-mapping its arrays unless *mmap* is False."""
+        mmap_mode = "r" if mmap else None
+        return cls(
+            {
+                name: np.load(Path(index_dir) / f"{name}.npy", mmap_mode=mmap_mode)
+                for name in _ARRAY_NAMES
+            }
+        )
+
+    # ---- many-to-many lookups ------------------------------------------- #
+
+    def permid_to_aladdin_ids(self, permids) -> pd.DataFrame:
+        """
+        Return every (permid, aladdin_id) pair for *permids*.
+
+        Returns:
+            pd.DataFrame: columns position (index of the query in *permids*),
+            permid and aladdin_id; queries without a match are absent.
+        """
+        queries = _permid_queries(permids)
+        positions, values = self._expand(
+            self.permid_keys, self.permid_offsets, self.permid_values, queries
+        )
+        return pd.DataFrame(
+            {
+                "position": positions,
+                "permid": pd.array(queries[positions], dtype=INTEGER_ID_DTYPE),
+                "aladdin_id": pd.array(values, dtype=ALADDIN_ID_DTYPE),
+            }
+        )
+
+    def aladdin_id_to_permids(self, aladdin_ids) -> pd.DataFrame:
+        """
+        Return every (aladdin_id, permid) pair for *aladdin_ids*.
+
+        Returns:
+            pd.DataFrame: columns position (index of the query in *aladdin_ids*),
+            aladdin_id and permid; queries without a match are absent.
+        """
+        queries = _aladdin_queries(aladdin_ids)
+        positions, values = self._expand(
+            self.aladdin_keys, self.aladdin_offsets, self.aladdin_values, queries
+        )
+        return pd.DataFrame(
+            {
+                "position": positions,
+                "aladdin_id": pd.array(queries[positions], dtype=ALADDIN_ID_DTYPE),
+                "permid": pd.array(values, dtype=INTEGER_ID_DTYPE),
+            }
+        )
+
+    @staticmethod
+    def _expand(keys, offsets, values, queries) -> Tuple[np.ndarray, np.ndarray]:
+        found, starts, counts = _locate(keys, offsets, queries)
+        positions = np.repeat(np.arange(len(queries)), counts)
+        # offset of each output row within its query's group
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return positions, values[np.repeat(starts, counts) + within]
+
+    # ---- one-to-one lookups (first match in file order) ----------------- #
+
+    def first_aladdin_id(self, permids) -> pd.Series:
+        """Return the first aladdin_id of every permid (<NA> if unknown), aligned."""
+        index = permids.index if isinstance(permids, pd.Series) else None
+        queries = _permid_queries(permids)
+        found, starts, _ = _locate(self.permid_keys, self.permid_offsets, queries)
+        result = np.full(len(queries), None, dtype=object)
+        result[found] = self.permid_values[starts[found]]
+        return pd.Series(result, index=index, dtype=ALADDIN_ID_DTYPE, name="aladdin_id")
+
+    def first_permid(self, aladdin_ids) -> pd.Series:
+        """Return the first permid of every aladdin_id (<NA> if unknown), aligned."""
+        index = aladdin_ids.index if isinstance(aladdin_ids, pd.Series) else None
+        queries = _aladdin_queries(aladdin_ids)
+        found, starts, _ = _locate(self.aladdin_keys, self.aladdin_offsets, queries)
+        result = pd.array(
+            np.zeros(len(queries), dtype=np.int64), dtype=INTEGER_ID_DTYPE
+        )
+        result[found] = self.aladdin_values[starts[found]]
+        result[~found] = pd.NA
+        return pd.Series(result, index=index, name="permid")
+
+    def add_aladdin_id(self, df: pd.DataFrame, on: str = "permid") -> pd.DataFrame:
+        """
+        Return *df* with an aladdin_id column looked up from its *on* column.
+
+        Same result as merging the crossreference deduplicated on permid, without
+        building or hashing the right-hand frame.
+        """
+        df = df.copy()
+        df["aladdin_id"] = self.first_aladdin_id(df[on]).array
+        return df
+
+    def add_permid(
+        self, df: pd.DataFrame, on: str = "aladdin_id", all_matches: bool = False
+    ) -> pd.DataFrame:
+        """
+        Return *df* with a permid column looked up from its *on* column.
+
+        With *all_matches*, rows whose aladdin_id maps to several permids are
+        repeated once per permid (a left merge on the crossreference); the
+        result then has a fresh RangeIndex.
+        """
+        if all_matches:
+            pairs = self.aladdin_id_to_permids(df[on])
+            return (
+                df.reset_index(drop=True)
+                .join(pairs.set_index("position")["permid"])
+                .reset_index(drop=True)
+            )
+        df = df.copy()
+        df["permid"] = self.first_permid(df[on]).array
+        return df
+
+    def to_frame(self) -> pd.DataFrame:
+        """Return the unique (permid, aladdin_id) pairs as a DataFrame."""
+        counts = np.diff(self.permid_offsets)
+        return pd.DataFrame(
+            {
+                "permid": pd.array(
+                    np.repeat(self.permid_keys, counts), dtype=INTEGER_ID_DTYPE
+                ),
+                "aladdin_id": pd.array(self.permid_values, dtype=ALADDIN_ID_DTYPE),
+            }
+        )
+
+
+def index_path_for(
+    file_path: Path, index_dir: Path = None, hash_content: bool = False
+) -> Path:
+    """Return the directory that holds the index of the crossreference *file_path*."""
+    key = file_fingerprint(file_path, hash_content=hash_content)[:16]
+    return Path(index_dir or INDEX_DIR) / f"{Path(file_path).stem}_{key}"
+
+
+@instrumented_loader()
+def load_crossreference_index(
+    file_path: Path, index_dir: Path = None, hash_content: bool = False
+) -> CrossreferenceIndex:
+    """
+    Return the memory-mapped index of the crossreference at *file_path*,
+    building and persisting it on the first call for this delivery.
+
+    Parameters:
+        file_path (Path): Crossreference CSV (Aladdin_Clarity_Issuers_{DATE}01.csv).
+        index_dir (Path, optional): Directory holding the indexes. Defaults to
+            <repo_root>/cache/xref.
+        hash_content (bool): Fingerprint the CSV content as well.
+
+    Returns:
+        CrossreferenceIndex: The index.
+    """
+    entry = index_path_for(file_path, index_dir=index_dir, hash_content=hash_content)
+
+    if entry.is_dir():
+        try:
+            xref = CrossreferenceIndex.load(entry)
+            # memory-mapped: pages are read lazily, count the arrays once
+            record_io(
+                bytes_read=sum(p.stat().st_size for p in entry.glob("*.npy")),
+                cache="hit",
+            )
+            logger.info("Loaded crossreference index %s: %r", entry, xref)
+            return xref
+        except Exception:
+            logger.warning("Corrupted crossreference index %s, rebuilding it.", entry)
+
+    record_io(cache="miss")
+    # encoding problems are repaired (and reported) in the same read as the parse
+    crossreference = load_crossreference(file_path, validate_encoding="repair")
+    xref = CrossreferenceIndex.from_frame(crossreference)
+    try:
+        xref.save(entry)
+        xref = CrossreferenceIndex.load(entry)
+        logger.info("Built crossreference index %s: %r", entry, xref)
+    except Exception:
+        # The persisted index is an optimisation: never fail the load because of it.
+        logger.warning(
+            "Could not persist crossreference index %s", entry, exc_info=True
+        )
+    return xref
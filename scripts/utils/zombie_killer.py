@@ -1,5 +1,6 @@
 import sys
 import warnings
+from itertools import chain
 from pathlib import Path
 
 import pandas as pd
@@ -12,7 +13,13 @@ if str(parent_dir) not in sys.path:
 
 # Import the centralized configuration
 from utils.config import get_config
-from utils.dataloaders import load_aladdin_data, load_clarity_data, load_crossreference
+from utils.dataloaders import (
+    load_aladdin_data,
+    load_clarity_data,
+    WorkbookSession,
+)
+from utils.strategy_mask import StrategyBitmask
+from utils.xref_index import load_crossreference_index
 
 # Get the common configuration for the zombie-killer script.
 config = get_config(script_name="zombie-killer")
@@ -65,6 +72,22 @@ merging_cols = [
 
 columns_to_read = ["permid", "issuer_name"] + test_col
 
+# BRS columns (cleaned names) parsed from the export, see column_sorter
+brs_columns = {
+    "portfolio_carteras": [
+        "issuer_name",
+        "security_description",
+        "portfolio_full_name",
+        "portfolio_id",
+        *merging_cols,
+        "str_004_asec_sust._bonds",
+    ],
+    "portfolio_benchmarks": merging_cols,
+}
+
+# zombie_list is carried as a bitmask over the strategy columns
+zombie_mask = StrategyBitmask([col for col in merging_cols if col != "aladdin_id"])
+
 rename_dict = {
     "cs_001_sec": "scs_001_sec",
     "cs_002_ec": "scs_002_ec",
@@ -74,22 +97,21 @@ rename_dict = {
 
 # Define functions
 def mark_zombies(df, merging_cols):
-    def get_zombie_columns(row):
-        # List to hold the base names where _brs has a value but _df is NaN.
-        zombie_cols = []
-        for col in merging_cols:
-            col_brs = f"{col}_brs"
-            col_df = f"{col}_df"
-            # Check that both columns exist in the row.
-            if col_brs in row and col_df in row:
-                # If _brs is not NaN and _df is NaN, add the column name.
-                if pd.notna(row[col_brs]) and pd.isna(row[col_df]):
-                    zombie_cols.append(col)
-        return zombie_cols
-
-    # Create the zombie_list and zombie_flag columns.
-    df["zombie_list"] = df.apply(get_zombie_columns, axis=1)
-    df["zombie_flag"] = df["zombie_list"].apply(lambda lst: len(lst) > 0)
+    # Base names where both _brs and _df columns exist.
+    cols = [
+        col
+        for col in merging_cols
+        if f"{col}_brs" in df.columns and f"{col}_df" in df.columns
+    ]
+    # _brs has a value but _df is NaN, for every row and column at once.
+    zombies = (
+        df[[f"{col}_brs" for col in cols]].notna().to_numpy()
+        & df[[f"{col}_df" for col in cols]].isna().to_numpy()
+    )
+
+    # Create the zombie_list (as a zombie_mask bitmask) and zombie_flag columns.
+    df["zombie_list"] = zombie_mask.from_matrix(cols, zombies)
+    df["zombie_flag"] = df["zombie_list"] != 0
     return df
 
 
@@ -137,29 +159,11 @@ def group_by_security_description(df):
       - 'portfolio_list': list of all unique portfolio_full_names per security.
       - 'portfolio_id_list': list of all unique portfolio_ids per security.
       - Keep 'issuer_name' (first occurrence) and 'aladdin_id' (first occurrence).
-      - Combine all 'zombie_list' entries into one list named 'strategy_list'.
+      - Combine all 'zombie_list' entries into one list named 'strategy_list',
+        in first-seen order.
     """
-
-    def flatten_lists(series):
-        """
-        Given a pandas Series where each element is a list, flatten them into a single list
-        and return unique values while preserving their order.
-        """
-        flattened = []
-        for item in series:
-            # Check if the item is a list; if not, treat it as a single element.
-            if isinstance(item, list):
-                flattened.extend(item)
-            else:
-                flattened.append(item)
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_items = []
-        for i in flattened:
-            if i not in seen:
-                seen.add(i)
-                unique_items.append(i)
-        return unique_items
+    # decode the bitmasks once; each row lists its strategies in column order
+    df = zombie_mask.render(df, ["zombie_list"])
 
     agg_dict = {
         "issuer_name": "first",
@@ -167,8 +171,8 @@ def group_by_security_description(df):
         # Collect unique portfolio names and ids
         "portfolio_full_name": lambda x: list(x.unique()),
         "portfolio_id": lambda x: list(x.unique()),
-        # For zombie_list, use the custom flatten function
-        "zombie_list": lambda x: flatten_lists(x),
+        # For zombie_list, the unique strategies in first-seen order
+        "zombie_list": lambda x: list(dict.fromkeys(chain.from_iterable(x))),
     }
 
     # Group the DataFrame
@@ -181,7 +185,6 @@ def group_by_security_description(df):
         },
         inplace=True,
     )
-
     # Reorder columns
     final_columns = [
         "issuer_name",
@@ -201,20 +204,33 @@ def main(clarity_df=None, brs_carteras=None, brs_benchmarks=None, crosreference=
         clarity_df = load_clarity_data(clarity_df_path, columns_to_read)
         clarity_df.rename(columns=rename_dict, inplace=True)
 
+    # parse the BRS workbook once even when both sheets are needed
+    brs_book = WorkbookSession(
+        BMK_PORTF_STR_PATH,
+        ["portfolio_carteras", "portfolio_benchmarks"],
+        skiprows=3,
+        columns=brs_columns,
+    )
     if brs_carteras is None:
-        brs_carteras = load_aladdin_data(BMK_PORTF_STR_PATH, "portfolio_carteras")
+        brs_carteras = load_aladdin_data(
+            brs_book, "portfolio_carteras", columns=brs_columns["portfolio_carteras"]
+        )
 
     if brs_benchmarks is None:
-        brs_benchmarks = load_aladdin_data(BMK_PORTF_STR_PATH, "portfolio_benchmarks")
-
+        brs_benchmarks = load_aladdin_data(
+            brs_book,
+            "portfolio_benchmarks",
+            columns=brs_columns["portfolio_benchmarks"],
+        )
+    brs_book.close()
+
+    # crossreference index (see utils.xref_index)
     if crosreference is None:
-        crosreference = load_crossreference(CROSSREFERENCE_PATH)
+        crosreference = load_crossreference_index(CROSSREFERENCE_PATH)
 
     # 01 PROCESS DATA
     # add aladdin_id from crossreference to clarity_df
-    clarity_df = clarity_df.merge(
-        crosreference[["aladdin_id", "permid"]], on="permid", how="left"
-    )
+    clarity_df = crosreference.add_aladdin_id(clarity_df)
 
     # remove rows with no aladdin_id
     brs_carf = brs_carteras[~(brs_carteras.aladdin_id.isna())].copy()
@@ -0,0 +1,121 @@
+"""
+clean_portfolio_and_exclusion_lists filters long affectation tables; it must
+clean the lists as the former row-wise clean_portfolio_and_exclusion_list.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.utils.clarity_data_quality_control_functions import (
+    STRATEGY_MASK,
+    clean_portfolio_and_exclusion_lists,
+    delta_test_cols,
+)
+
+AFFECTED, EXCLUSION = "affected_portfolio_str", "exclusion_list"
+
+
+def clean_portfolio_and_exclusion_list(
+    row, affected_col_name=AFFECTED, exclusion_list_name=EXCLUSION
+):
+    """The former row-wise cleaning, applied with df.apply(..., axis=1)."""
+
+    def pair_elements(input_list):
+        if not isinstance(input_list, list):
+            raise TypeError("Expected a list as input.")
+        if all(isinstance(item, tuple) for item in input_list):
+            return input_list
+        if len(input_list) % 2 != 0:
+            raise ValueError("The list must have an even number of elements.")
+        return [
+            (input_list[i], input_list[i + 1]) for i in range(0, len(input_list), 2)
+        ]
+
+    paired = pair_elements(row[affected_col_name])
+    exclusion_list = row[exclusion_list_name]
+    cleaned_paired = [tup for tup in paired if tup[1] in exclusion_list]
+    row[affected_col_name] = cleaned_paired
+    affected_strategies = {strategy for _, strategy in cleaned_paired}
+    row[exclusion_list_name] = [
+        strategy for strategy in exclusion_list if strategy in affected_strategies
+    ]
+    return row
+
+
+def _flatten(pairs):
+    return [item for pair in pairs for item in pair]
+
+
+@pytest.fixture(scope="module")
+def delta():
+    """Exclusion lists and affected (portfolio_id, strategy) pairs per issuer."""
+    rng = np.random.default_rng(3)
+    rows = 500
+    exclusions = [
+        list(rng.choice(delta_test_cols, rng.integers(0, 4), replace=False))
+        for _ in range(rows)
+    ]
+    affected = [
+        [
+            (f"P{rng.integers(0, 50):03d}", str(strategy))
+            for strategy in rng.choice(delta_test_cols, rng.integers(0, 6))
+        ]
+        for _ in range(rows)
+    ]
+    index = pd.RangeIndex(100, 100 + rows)  # not positional
+    return pd.DataFrame({EXCLUSION: exclusions, AFFECTED: affected}, index=index)
+
+
+def _legacy(df):
+    return df.apply(clean_portfolio_and_exclusion_list, axis=1)
+
+
+def _assert_same_lists(result, expected):
+    assert result.index.equals(expected.index)
+    assert result[EXCLUSION].tolist() == expected[EXCLUSION].tolist()
+    assert result[AFFECTED].map(lambda pairs: [tuple(p) for p in pairs]).tolist() == (
+        expected[AFFECTED].tolist()
+    )
+
+
+def test_pair_lists(delta):
+    _assert_same_lists(clean_portfolio_and_exclusion_lists(delta), _legacy(delta))
+
+
+def test_flattened_lists(delta):
+    flat = delta.assign(**{AFFECTED: delta[AFFECTED].map(_flatten)})
+    _assert_same_lists(clean_portfolio_and_exclusion_lists(flat), _legacy(flat))
+
+
+def test_mixed_lists(delta):
+    # every other row flattened
+    mixed = delta.copy()
+    mixed[AFFECTED] = [
+        _flatten(pairs) if i % 2 else pairs for i, pairs in enumerate(delta[AFFECTED])
+    ]
+    _assert_same_lists(clean_portfolio_and_exclusion_lists(mixed), _legacy(mixed))
+
+
+def test_mask_exclusion_list(delta):
+    masks = delta.assign(**{EXCLUSION: STRATEGY_MASK.encode(delta[EXCLUSION])})
+    result = clean_portfolio_and_exclusion_lists(masks)
+    expected = _legacy(delta)
+    assert (
+        result[EXCLUSION].tolist() == STRATEGY_MASK.encode(expected[EXCLUSION]).tolist()
+    )
+    assert result[AFFECTED].map(lambda pairs: [tuple(p) for p in pairs]).tolist() == (
+        expected[AFFECTED].tolist()
+    )
+
+
+@pytest.mark.parametrize(
+    "affected, error",
+    [([np.nan], TypeError), ([["P001", "str_001_s", "P002"]], ValueError)],
+)
+def test_errors_as_before(affected, error):
+    df = pd.DataFrame({EXCLUSION: [["str_001_s"]], AFFECTED: affected})
+    with pytest.raises(error):
+        _legacy(df)
+    with pytest.raises(error):
+        clean_portfolio_and_exclusion_lists(df)
@@ -0,0 +1,63 @@
+"""align_keys pairs duplicated keys through their first row; NaN is a key."""
+
+import numpy as np
+import pandas as pd
+
+from scripts.utils.alignment import align_keys
+
+
+def _frame(permids, prefix):
+    return pd.DataFrame(
+        {"permid": permids, "row": [f"{prefix}{i}" for i in range(len(permids))]}
+    )
+
+
+def test_duplicates_are_paired_through_their_first_row():
+    base = _frame([1, 2, 2, 3], "b")
+    new = _frame([2, 3, 2, 4, 4], "n")
+    alignment = align_keys(base, new)
+
+    old_common, new_common = alignment.common()
+    assert old_common.index.tolist() == new_common.index.tolist() == [2, 3]
+    assert old_common["row"].tolist() == ["b1", "b3"]
+    assert new_common["row"].tolist() == ["n0", "n1"]
+    assert alignment.new_rows()["row"].tolist() == ["n3", "n4"]
+    assert alignment.missing_rows()["row"].tolist() == ["b0"]
+
+    assert alignment.duplicates.to_dict("records") == [
+        {"side": "base", "key": 2, "n_rows": 2},
+        {"side": "new", "key": 2, "n_rows": 2},
+        {"side": "new", "key": 4, "n_rows": 2},
+    ]
+    assert alignment.has_duplicates("base") and alignment.has_duplicates("new")
+    assert alignment.duplicated_rows("base")["row"].tolist() == ["b1", "b2"]
+    assert alignment.duplicated_rows("new")["row"].tolist() == ["n0", "n2", "n3", "n4"]
+
+
+def test_nan_keys_align_like_any_other_key():
+    base = _frame([1.0, np.nan, 2.0, np.nan], "b")
+    new = _frame([np.nan, 2.0, 5.0], "n")
+    alignment = align_keys(base, new)
+
+    old_common, new_common = alignment.common()
+    assert old_common["row"].tolist() == ["b1", "b2"]
+    assert new_common["row"].tolist() == ["n0", "n1"]
+    assert old_common.index.equals(new_common.index)
+    assert alignment.new_rows()["row"].tolist() == ["n2"]
+    assert alignment.missing_rows()["row"].tolist() == ["b0"]
+    duplicated = alignment.duplicates
+    assert duplicated["side"].tolist() == ["base"]
+    assert duplicated["key"].isna().all() and duplicated["n_rows"].tolist() == [2]
+
+
+def test_nullable_integer_keys():
+    base = _frame(pd.array([1, None, 2], dtype="Int64"), "b")
+    new = _frame(pd.array([2, None, 3], dtype="Int64"), "n")
+    alignment = align_keys(base, new)
+
+    old_common, new_common = alignment.common()
+    assert old_common["row"].tolist() == ["b1", "b2"]
+    assert new_common["row"].tolist() == ["n1", "n0"]
+    assert alignment.new_rows()["row"].tolist() == ["n2"]
+    assert alignment.missing_rows()["row"].tolist() == ["b0"]
+    assert not alignment.has_duplicates()
@@ -0,0 +1,103 @@
+"""
+filter_rows_with_common_elements compares STRATEGY_MASK bitmasks; it must
+keep the same rows as the former row-wise set intersection.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.utils.clarity_data_quality_control_functions import (
+    STRATEGY_MASK,
+    add_portfolio_benchmark_info_to_df,
+    delta_test_cols,
+    filter_rows_with_common_elements,
+)
+from scripts.utils.membership_index import MembershipIndex
+
+COL1, COL2 = "exclusion_list", "affected_portfolio_str"
+
+
+def make_delta(rows: int, portfolios: int, seed: int = 0):
+    """Return (delta with exclusion_list, MembershipIndex) for *rows* issuers."""
+    rng = np.random.default_rng(seed)
+    aladdin_ids = np.array([f"A{i:09d}" for i in range(rows)], dtype=object)
+    portfolio_dict = {
+        f"P{p:05d}": {
+            "aladdin_id": list(rng.choice(aladdin_ids, rng.integers(1, 400))),
+            "strategy_name": rng.choice(delta_test_cols),
+        }
+        for p in range(portfolios)
+    }
+    exclusions = rng.random((rows, len(delta_test_cols))) < 0.1
+    delta = pd.DataFrame({"aladdin_id": aladdin_ids})
+    delta["exclusion_list"] = STRATEGY_MASK.decode(
+        STRATEGY_MASK.from_matrix(delta_test_cols, exclusions)
+    )
+    return delta, MembershipIndex.from_dict(portfolio_dict)
+
+
+def _flatten(items):
+    """(id, strategy) pairs and plain items as one flat list."""
+    if not isinstance(items, list):
+        return []
+    flat = []
+    for item in items:
+        flat.extend(item if isinstance(item, (list, tuple)) else [item])
+    return flat
+
+
+def legacy_common_elements(df: pd.DataFrame, col1: str, col2: str) -> pd.DataFrame:
+    """The former row-wise set intersection (over flattened id/strategy lists)."""
+    flat = df[col2].map(_flatten)
+    keep = [bool(set(a) & set(b)) for a, b in zip(df[col1], flat)]
+    return df[keep].copy()
+
+
+@pytest.fixture(scope="module")
+def pairs():
+    delta, index = make_delta(5_000, 300)
+    return add_portfolio_benchmark_info_to_df(index, delta)
+
+
+def test_pairs(pairs):
+    expected = legacy_common_elements(pairs, COL1, COL2)
+    assert 0 < len(expected) < len(pairs)
+    result = filter_rows_with_common_elements(pairs, COL1, COL2)
+    assert result.index.equals(expected.index)
+
+
+def test_flattened_lists(pairs):
+    flat = pairs.assign(**{COL2: pairs[COL2].map(_flatten)})
+    expected = legacy_common_elements(flat, COL1, COL2)
+    result = filter_rows_with_common_elements(flat, COL1, COL2)
+    assert result.index.equals(expected.index)
+
+
+def test_mixed_lists(pairs):
+    # pairs, flattened lists, pairs followed by flattened items and NaN
+    def mix(position, items):
+        if position % 7 == 0:
+            return np.nan
+        if position % 2:
+            return _flatten(items)
+        return items[:1] + _flatten(items[1:])
+
+    mixed = pairs.assign(
+        **{COL2: [mix(i, items) for i, items in enumerate(pairs[COL2])]}
+    )
+    expected = legacy_common_elements(mixed, COL1, COL2)
+    result = filter_rows_with_common_elements(mixed, COL1, COL2)
+    assert result.index.equals(expected.index)
+
+
+def test_bitmasks(pairs):
+    delta, index = make_delta(5_000, 300)
+    masks = add_portfolio_benchmark_info_to_df(
+        index,
+        delta.assign(exclusion_list=STRATEGY_MASK.encode(delta["exclusion_list"])),
+        as_mask=True,
+    )
+    expected = legacy_common_elements(pairs, COL1, COL2)
+    result = filter_rows_with_common_elements(masks, COL1, COL2)
+    assert result.index.equals(expected.index)
@@ -0,0 +1,30 @@
+"""write_workbook refuses sheets past Excel's limits, as DataFrame.to_excel did."""
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pytest
+
+from scripts.utils.excel_writer import MAX_COLS, MAX_ROWS, write_workbook
+
+
+@pytest.mark.parametrize(
+    "df",
+    [
+        pd.DataFrame({"a": np.zeros(MAX_ROWS, dtype=np.int8)}),  # + header row
+        pd.DataFrame(np.zeros((1, MAX_COLS + 1), dtype=np.int8)),
+    ],
+    ids=["rows", "columns"],
+)
+def test_oversized_sheet_raises(tmp_path, df):
+    output_file = tmp_path / "book.xlsx"
+    with pytest.raises(ValueError, match="This sheet is too large"):
+        write_workbook({"ok": pd.DataFrame({"a": [1]}), "big": df}, output_file)
+    assert not output_file.exists()
+
+
+def test_sheet_at_the_limit_is_written(tmp_path):
+    df = pd.DataFrame(np.zeros((1, MAX_COLS), dtype=np.int8))
+    output_file = write_workbook({"wide": df}, tmp_path / "book.xlsx")
+    sheet = openpyxl.load_workbook(output_file, read_only=True)["wide"]
+    assert (sheet.max_row, sheet.max_column) == (2, MAX_COLS)
@@ -0,0 +1,108 @@
+"""
+The Clarity deltas reach process_data_by_strategy with the permids that
+finalize_delta leaves them; they must resolve against the Int64 lookup keys.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.utils.clarity_data_quality_control_functions import (
+    finalize_delta,
+    process_data_by_strategy,
+)
+from scripts.utils.override_index import OverrideIndex
+from scripts.utils.schema import INTEGER_ID_DTYPE, STRATEGY_DTYPE
+from scripts.utils.state_table import StateTable
+
+STRATEGIES = ["str_001_s", "str_002_ec"]
+
+
+def _states(values):
+    return pd.Series(values, dtype=STRATEGY_DTYPE)
+
+
+@pytest.fixture
+def sources():
+    permids = pd.array([1, 2, 3], dtype=INTEGER_ID_DTYPE)
+    old = pd.DataFrame(
+        {
+            "permid": permids,
+            "str_001_s": _states(["OK", "OK", "FLAG"]),
+            "str_002_ec": _states(["OK", "FLAG", None]),
+        }
+    )
+    new = pd.DataFrame(
+        {
+            "permid": permids,
+            "aladdin_id": pd.array(["000001", "000002", "000003"], dtype="string"),
+            "str_001_s": _states(["EXCLUDED", "EXCLUDED", "FLAG"]),
+            "str_002_ec": _states(["EXCLUDED", "FLAG", "EXCLUDED"]),
+        }
+    )
+    brs = new.drop(columns="permid").assign(str_001_s=_states(["OK", "FLAG", None]))
+    overrides = pd.DataFrame(
+        {
+            "permid": pd.array([1, 3], dtype=INTEGER_ID_DTYPE),
+            "ovr_target": ["str_001_s", "str_002_ec"],
+            "ovr_value": _states(["FLAG", "OK"]),
+        }
+    )
+    return old, new, brs, OverrideIndex.from_frame(overrides)
+
+
+def _delta(new: pd.DataFrame) -> pd.DataFrame:
+    """A Clarity delta as generate_delta builds it: indexed by permid."""
+    delta = new.set_index("permid").assign(
+        issuer_name=["a", "b", "c"],
+        exclusion_list=[["str_001_s", "str_002_ec"], ["str_001_s"], ["str_002_ec"]],
+        affected_portfolio_str=[[("P1", "str_001_s")]] * 3,
+    )
+    return finalize_delta(delta, test_col=STRATEGIES, target_index="permid")
+
+
+def _run(delta, old, new, brs, overrides):
+    return process_data_by_strategy(
+        delta,
+        STRATEGIES,
+        "exclusion_list",
+        df1_lookup_source=old,
+        df2_lookup_source=new,
+        brs_lookup_source=brs,
+        overrides_df=overrides,
+        logger=logging.getLogger(__name__),
+    )
+
+
+def test_finalize_delta_keeps_integer_permids(sources):
+    delta = _delta(sources[1])
+    assert delta["permid"].dtype == INTEGER_ID_DTYPE
+
+
+@pytest.mark.parametrize("as_state_table", [False, True])
+def test_str_and_int64_permids_resolve_alike(sources, as_state_table):
+    old, new, brs, override_index = sources
+    lookups = (old, new, brs, override_index)
+    if as_state_table:
+        table = StateTable.from_frames(
+            {"old": old, "new": new, "brs_ptf": brs},
+            STRATEGIES,
+            overrides=override_index,
+        )
+        lookups = tuple(map(table.source, ["old", "new", "brs_ptf", "ovr"]))
+
+    delta = _delta(new)
+    str_delta = delta.assign(permid=delta["permid"].astype(str))
+    expected = _run(delta, *lookups)
+    result = _run(str_delta, *lookups)
+
+    first = expected["str_001_s"].set_index("aladdin_id")
+    assert first.loc["000001", "str_001_s_new"] == "EXCLUDED"
+    assert first.loc["000001", "str_001_s_old"] == "OK"
+    assert first.loc["000001", "str_001_s_ovr"] == "FLAG"
+    for strategy in STRATEGIES:
+        pd.testing.assert_frame_equal(result[strategy], expected[strategy])
+        assert expected[strategy].filter(like="_new").notna().all().all()
+        assert not np.any(expected[strategy]["permid"].isna())
@@ -0,0 +1,89 @@
+"""
+generate_delta builds its ``<analysis>_list`` column from one transition
+matrix; it must list the same columns as the former row-wise get_delta_list.
+"""
+
+from typing import List
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.utils.clarity_data_quality_control_functions import (
+    delta_test_cols,
+    generate_delta,
+    render_strategy_lists,
+)
+from scripts.utils.schema import STRATEGY_STATES, apply_schema
+
+
+def make_feeds(rows: int, change_rate: float = 0.05, seed: int = 0):
+    """Return (old, new) issuer frames indexed by permid, *change_rate* of cells changed."""
+    rng = np.random.default_rng(seed)
+    states = np.array(STRATEGY_STATES + [None], dtype=object)
+    index = pd.Index(np.arange(4_000_000_000, 4_000_000_000 + rows), name="permid")
+    old = pd.DataFrame(
+        {
+            col: rng.choice(states, rows, p=[0.6, 0.2, 0.15, 0.05])
+            for col in delta_test_cols
+        },
+        index=index,
+    )
+    new = old.copy()
+    for col in delta_test_cols:
+        changed = rng.random(rows) < change_rate
+        new.loc[changed, col] = rng.choice(states, changed.sum())
+    old.insert(0, "issuer_name", [f"Issuer {i}" for i in range(rows)])
+    new.insert(0, "issuer_name", old["issuer_name"])
+    return apply_schema(old), apply_schema(new)
+
+
+def legacy_delta_lists(
+    df1: pd.DataFrame, df2: pd.DataFrame, test_col: List[str], condition_list: List[str]
+) -> pd.Series:
+    """The former row-wise get_delta_list of generate_delta."""
+    normalized_conditions = [cond.strip().upper() for cond in condition_list]
+
+    def get_delta_list(row: pd.Series) -> List[str]:
+        return [
+            col
+            for col in test_col
+            if col in df1.columns
+            and col in df2.columns
+            and str(df2.loc[row.name, col]).strip().upper() in normalized_conditions
+            and str(df1.loc[row.name, col]).strip().upper() not in normalized_conditions
+        ]
+
+    return df2.apply(lambda row: get_delta_list(row), axis=1)
+
+
+@pytest.fixture(scope="module")
+def feeds():
+    return make_feeds(2_000)
+
+
+@pytest.mark.parametrize(
+    "analysis, conditions",
+    [("exclusion", ["EXCLUDED"]), ("inclusion", ["OK", "FLAG"]), ("flag", ["FLAG"])],
+)
+@pytest.mark.parametrize("as_mask", [False, True])
+def test_lists_match_the_row_wise_version(feeds, analysis, conditions, as_mask):
+    old, new = feeds
+    expected = legacy_delta_lists(old, new, delta_test_cols, conditions)
+    expected = expected[expected.str.len() > 0]
+
+    delta = generate_delta(
+        old,
+        new,
+        condition_list=conditions,
+        delta_analysis_str=analysis,
+        filter_col=f"new_{analysis}",
+        as_mask=as_mask,
+    )
+    list_col = f"{analysis}_list"
+    if as_mask:
+        delta = render_strategy_lists(delta, [list_col])
+
+    assert not expected.empty
+    assert delta["permid"].tolist() == expected.index.tolist()
+    assert delta[list_col].tolist() == expected.tolist()
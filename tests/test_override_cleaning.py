@@ -0,0 +1,124 @@
+"""
+clean_inclusion_list and clean_exclusion_list_with_ovr used to run
+``df.apply(..., axis=1)`` with a lookup into the per-row ovr_list dict. The
+vectorised versions must keep the same lists and rows on a million-row delta,
+with the overrides taken from ovr_list or from an OverrideIndex, and with the
+lists given as lists or as STRATEGY_MASK bitmasks.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.utils.clarity_data_quality_control_functions import (
+    STRATEGY_MASK,
+    clean_exclusion_list_with_ovr,
+    clean_inclusion_list,
+    delta_test_cols,
+)
+from scripts.utils.override_index import OverrideIndex
+from scripts.utils.schema import STRATEGY_STATES
+
+ROWS = 1_000_000
+
+
+def make_delta(rows: int, override_rate: float = 0.05, seed: int = 0):
+    """Return (delta with inclusion / exclusion lists and ovr_list, OverrideIndex)."""
+    rng = np.random.default_rng(seed)
+    aladdin_ids = np.array([f"A{i:09d}" for i in range(rows)], dtype=object)
+    delta = pd.DataFrame({"aladdin_id": aladdin_ids})
+    for col in ["inclusion_list", "exclusion_list"]:
+        delta[col] = STRATEGY_MASK.decode(
+            STRATEGY_MASK.from_matrix(
+                delta_test_cols, rng.random((rows, len(delta_test_cols))) < 0.15
+            )
+        )
+
+    n_overrides = int(rows * override_rate * 2)
+    overrides = pd.DataFrame(
+        {
+            "aladdin_id": rng.choice(aladdin_ids, n_overrides),
+            "ovr_target": rng.choice(delta_test_cols, n_overrides),
+            "ovr_value": rng.choice(STRATEGY_STATES, n_overrides),
+        }
+    )
+    override_index = OverrideIndex.from_frame(overrides)
+    delta["ovr_list"] = delta["aladdin_id"].map(override_index.to_dict())
+    return delta, override_index
+
+
+def legacy_clean_inclusion_list(df: pd.DataFrame) -> pd.DataFrame:
+    """The former row-wise clean_inclusion_list."""
+
+    def process_row(row):
+        inc_list = row.get("inclusion_list", [])
+        ovr_list = row.get("ovr_list", {})
+        if isinstance(inc_list, np.ndarray):
+            inc_list = inc_list.tolist()
+        if not isinstance(inc_list, list):
+            return []
+        if not isinstance(ovr_list, dict):
+            ovr_list = {}
+        return [
+            item
+            for item in inc_list
+            if item not in ovr_list or ovr_list[item] != "EXCLUDED"
+        ]
+
+    df.loc[:, "inclusion_list"] = df.apply(process_row, axis=1)
+    return df[df["inclusion_list"].apply(lambda x: isinstance(x, list) and len(x) > 0)]
+
+
+def legacy_clean_exclusion_list_with_ovr(df: pd.DataFrame) -> pd.DataFrame:
+    """The former row-wise clean_exclusion_list_with_ovr."""
+
+    def filter_exclusions(row):
+        ovr_dict = row["ovr_list"] if isinstance(row["ovr_list"], dict) else {}
+        return [
+            code
+            for code in row["exclusion_list"]
+            if ovr_dict.get(code) not in {"OK", "FLAG"}
+        ]
+
+    df["exclusion_list"] = df.apply(filter_exclusions, axis=1)
+    return df
+
+
+@pytest.fixture(scope="module")
+def cases():
+    delta, override_index = make_delta(ROWS)
+    expected = (
+        legacy_clean_inclusion_list(delta.copy()),
+        legacy_clean_exclusion_list_with_ovr(delta.copy()),
+    )
+    return delta, override_index, expected
+
+
+@pytest.mark.parametrize(
+    "as_mask, use_index",
+    [(False, False), (False, True), (True, True)],
+    ids=["lists-ovr_list", "lists-OverrideIndex", "bitmasks-OverrideIndex"],
+)
+def test_matches_row_wise_cleaning(cases, as_mask, use_index):
+    delta, override_index, (expected_in, expected_ex) = cases
+    kwargs = {"override_index": override_index} if use_index else {}
+    frame = delta
+    if as_mask:
+        frame = delta.assign(
+            inclusion_list=STRATEGY_MASK.encode(delta["inclusion_list"]),
+            exclusion_list=STRATEGY_MASK.encode(delta["exclusion_list"]),
+        )
+
+    result_in = clean_inclusion_list(frame.copy(), **kwargs)
+    result_ex = clean_exclusion_list_with_ovr(frame.copy(), **kwargs)
+    if as_mask:
+        result_in = STRATEGY_MASK.render(result_in, ["inclusion_list"])
+        result_ex = STRATEGY_MASK.render(result_ex, ["exclusion_list"])
+
+    assert result_in.index.equals(expected_in.index)
+    assert (
+        result_in["inclusion_list"].tolist() == expected_in["inclusion_list"].tolist()
+    )
+    assert (
+        result_ex["exclusion_list"].tolist() == expected_ex["exclusion_list"].tolist()
+    )
@@ -0,0 +1,88 @@
+"""OverrideIndex: the last override of a cell wins, keys match in canonical type."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.utils.override_index import OverrideIndex
+from scripts.utils.schema import INTEGER_ID_DTYPE
+
+
+@pytest.fixture
+def overrides():
+    # read as load_overrides does: every id as text
+    return pd.DataFrame(
+        {
+            "aladdin_id": [None, None, None, "000007"],
+            "permid": ["42", " 42", "43.0", "99"],
+            "ovr_target": ["str_001_s", "str_001_s", "str_002_ec", "str_001_s"],
+            "ovr_value": ["OK", "EXCLUDED", "FLAG", "FLAG"],
+        }
+    )
+
+
+def _feed(permids):
+    return pd.DataFrame(
+        {
+            "aladdin_id": pd.array(["000001", "000002", "000007"], dtype="string"),
+            "permid": permids,
+            "str_001_s": ["FLAG", "OK", "OK"],
+        }
+    )
+
+
+def test_last_override_wins(overrides):
+    index = OverrideIndex.from_frame(overrides)
+    feed = _feed(pd.array([42, 43, 99], dtype=INTEGER_ID_DTYPE))
+
+    assert index.values(feed, "str_001_s").tolist() == ["EXCLUDED", np.nan, "FLAG"]
+    # " 42" and "42" are one issuer: the conflict is reported
+    assert index.conflicts["ovr_value"].tolist() == ["OK", "EXCLUDED"]
+
+    applied = index.apply(feed.copy())
+    assert applied["str_001_s"].tolist() == ["EXCLUDED", "OK", "FLAG"]
+    assert applied["str_002_ec"].tolist()[:2] == [np.nan, "FLAG"]
+
+
+def test_last_override_wins_in_to_dict(overrides):
+    overrides.loc[1, "permid"] = "42"
+    assert OverrideIndex.from_frame(overrides).to_dict("permid")["42"] == {
+        "str_001_s": "EXCLUDED"
+    }
+
+
+def test_aladdin_id_takes_priority_over_permid(overrides):
+    index = OverrideIndex.from_frame(overrides)
+    # the 000007 override is matched on aladdin_id, whatever the permid
+    feed = _feed(pd.array([42, 43, 100], dtype=INTEGER_ID_DTYPE))
+    assert index.levels(feed).tolist() == ["permid", "permid", "permid", "aladdin_id"]
+    assert index.values(feed, "str_001_s").tolist()[2] == "FLAG"
+
+
+@pytest.mark.parametrize(
+    "permids",
+    [
+        pd.array([42, 43, 99], dtype=INTEGER_ID_DTYPE),
+        pd.Series(["42", "43", "99"], dtype=object),
+        pd.Series(["42", "43", "99"], dtype="string"),
+    ],
+    ids=["Int64", "object", "string"],
+)
+def test_text_and_integer_permids_match(overrides, permids):
+    index = OverrideIndex.from_frame(overrides)
+    matched = index.match(_feed(permids))
+    assert sorted(zip(matched["row"], matched["target"], matched["value"])) == [
+        (0, "str_001_s", "EXCLUDED"),
+        (1, "str_002_ec", "FLAG"),
+        (2, "str_001_s", "FLAG"),
+    ]
+
+
+def test_integer_override_keys_match_text_feed(overrides):
+    typed = overrides.assign(permid=pd.array([42, 42, 43, 99], dtype=INTEGER_ID_DTYPE))
+    feed = _feed(pd.Series(["42", "43", "99"], dtype=object))
+    assert OverrideIndex.from_frame(typed).values(feed, "str_001_s").tolist() == [
+        "EXCLUDED",
+        np.nan,
+        "FLAG",
+    ]
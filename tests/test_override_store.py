@@ -0,0 +1,78 @@
+"""Override snapshots live in the cache and survive concurrent writers."""
+
+import pandas as pd
+
+from scripts.utils import override_store
+from scripts.utils.override_store import SNAPSHOT_ROOT, OverrideStore
+
+
+def _workbook(path, values):
+    pd.DataFrame(
+        {
+            "aladdin_id": ["A1"] * len(values),
+            "permid": ["1"] * len(values),
+            "ovr_target": [f"str_00{i}_s" for i in range(len(values))],
+            "ovr_value": values,
+            "ovr_active": [True] * len(values),
+        }
+    ).to_excel(path, index=False)
+    return path
+
+
+def test_default_snapshot_dir_is_in_the_cache(tmp_path):
+    store = OverrideStore(tmp_path / "overrides_db.xlsx")
+    assert store.snapshot_dir.parent == SNAPSHOT_ROOT
+    assert store.snapshot_dir.name.startswith("overrides_db_")
+    other = OverrideStore(tmp_path / "other" / "overrides_db.xlsx")
+    assert other.snapshot_dir != store.snapshot_dir
+
+
+def _parse_after(monkeypatch, other_writer):
+    """Make the next workbook parse run *other_writer* first (once)."""
+    parse = override_store._parse_workbook
+    pending = [other_writer]
+
+    def parse_after_other_writer(path):
+        if pending:
+            pending.pop()()
+        return parse(path)
+
+    monkeypatch.setattr(override_store, "_parse_workbook", parse_after_other_writer)
+
+
+def test_versions_written_meanwhile_are_kept(tmp_path, monkeypatch):
+    workbook = _workbook(tmp_path / "overrides_db.xlsx", ["OK"])
+    store = OverrideStore(workbook, snapshot_dir=tmp_path / "snapshots")
+    assert store.refresh()["version"] == 1
+
+    # while this store parses the workbook, another writer records a version
+    concurrent = _workbook(tmp_path / "concurrent.xlsx", ["FLAG", "OK"])
+    other = OverrideStore(concurrent, snapshot_dir=store.snapshot_dir)
+    _parse_after(monkeypatch, other.refresh)
+    _workbook(workbook, ["EXCLUDED"])
+    entry = store.refresh()
+
+    assert [v["version"] for v in store.versions()] == [1, 2, 3]
+    assert entry == store.versions()[-1]
+    assert store.load()["ovr_value"].tolist() == ["EXCLUDED"]
+    assert store.load(version=2)["ovr_value"].tolist() == ["FLAG", "OK"]
+    files = {v["file"] for v in store.versions()} | {"manifest.json"}
+    assert {p.name for p in store.snapshot_dir.iterdir()} == files
+
+
+def test_same_content_written_meanwhile_is_reused(tmp_path, monkeypatch):
+    workbook = _workbook(tmp_path / "overrides_db.xlsx", ["OK"])
+    store = OverrideStore(workbook, snapshot_dir=tmp_path / "snapshots")
+    store.refresh()
+
+    # the prefetcher snapshots the new content while this store parses it
+    prefetcher = OverrideStore(workbook, snapshot_dir=store.snapshot_dir)
+    _parse_after(monkeypatch, prefetcher.refresh)
+    _workbook(workbook, ["FLAG"])
+    entry = store.refresh()
+
+    assert [v["version"] for v in store.versions()] == [1, 2]
+    assert entry == store.versions()[-1]
+    assert store.load()["ovr_value"].tolist() == ["FLAG"]
+    files = {v["file"] for v in store.versions()} | {"manifest.json"}
+    assert {p.name for p in store.snapshot_dir.iterdir()} == files
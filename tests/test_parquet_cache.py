@@ -0,0 +1,55 @@
+"""Cache entries are keyed on the parser as well as on the source CSV."""
+
+import pandas as pd
+
+from scripts.utils import parquet_cache
+from scripts.utils.parquet_cache import (
+    cache_path_for,
+    read_through_cache,
+    temp_path_for,
+)
+
+
+def _csv(tmp_path):
+    csv = tmp_path / "feed.csv"
+    pd.DataFrame({"permid": [1, 2], "str_001_s": ["OK", "FLAG"]}).to_csv(
+        csv, index=False
+    )
+    return csv
+
+
+def test_schema_version_bump_misses(tmp_path, monkeypatch):
+    csv = _csv(tmp_path)
+    calls = []
+
+    def parse(path):
+        calls.append(path)
+        return pd.read_csv(path)
+
+    read_through_cache(csv, parse, cache_dir=tmp_path)
+    read_through_cache(csv, parse, cache_dir=tmp_path)
+    assert len(calls) == 1
+
+    old_entry = cache_path_for(csv, cache_dir=tmp_path)
+    monkeypatch.setattr(
+        parquet_cache, "CACHE_SCHEMA_VERSION", parquet_cache.CACHE_SCHEMA_VERSION + 1
+    )
+    assert cache_path_for(csv, cache_dir=tmp_path) != old_entry
+    read_through_cache(csv, parse, cache_dir=tmp_path)
+    assert len(calls) == 2
+
+
+def test_corrupt_entry_is_rebuilt(tmp_path):
+    csv = _csv(tmp_path)
+    read_through_cache(csv, pd.read_csv, cache_dir=tmp_path)
+    entry = cache_path_for(csv, cache_dir=tmp_path)
+    entry.write_bytes(entry.read_bytes()[:20])
+    df = read_through_cache(csv, pd.read_csv, columns=["permid"], cache_dir=tmp_path)
+    assert df["permid"].tolist() == [1, 2]
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_temp_paths_are_unique(tmp_path):
+    entry = tmp_path / "feed.parquet"
+    assert temp_path_for(entry) != temp_path_for(entry)
+    assert temp_path_for(entry).parent == tmp_path
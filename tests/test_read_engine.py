@@ -0,0 +1,53 @@
+"""The "c" and "pyarrow" read engines load a Clarity feed into the same frame."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.utils import read_engine
+from scripts.utils.dataloaders import load_clarity_data
+from scripts.utils.schema import CLARITY_STRATEGY_COLUMNS, STRATEGY_STATES
+
+ROWS = 20_000
+
+
+@pytest.fixture(scope="module")
+def feed(tmp_path_factory):
+    """A Clarity-like issuer feed, with blanks, missing ids and Excel-style ids."""
+    rng = np.random.default_rng(0)
+    states = np.array(STRATEGY_STATES + ["", " ok", "N/A"], dtype=object)
+    permids = rng.integers(4_000_000_000, 5_100_000_000, ROWS).astype(object)
+    permids[rng.random(ROWS) < 0.02] = ""
+    permids[:3] = ["150236668.0", " 42 ", "no tiene permid"]
+    data = {
+        "permId": permids,
+        "ClarityID": rng.integers(1, 2_000_000, ROWS),
+        "ISIN": [f"XS{i:010d}" for i in rng.integers(0, 10**10, ROWS)],
+        "Issuer Name": [f"Issuer {i}" for i in rng.integers(0, ROWS, ROWS)],
+        "region": rng.choice(["Europe", "Latam", None], ROWS),
+    }
+    for col in CLARITY_STRATEGY_COLUMNS:
+        data[col] = rng.choice(states, ROWS)
+    for i in range(5):
+        values = rng.normal(50, 20, ROWS).round(4)
+        values[rng.random(ROWS) < 0.1] = np.nan
+        data[f"metric_{i:02d}"] = values
+    path = tmp_path_factory.mktemp("feed") / "feed.csv"
+    pd.DataFrame(data).to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture
+def engine():
+    previous = read_engine.get_read_engine()
+    yield read_engine.set_read_engine
+    read_engine.set_read_engine(previous)
+
+
+@pytest.mark.parametrize("typed_ids", [True, False])
+def test_engines_load_the_same_frame(feed, engine, typed_ids):
+    frames = {}
+    for name in read_engine.READ_ENGINES:
+        engine(name)
+        frames[name] = load_clarity_data(feed, use_cache=False, typed_ids=typed_ids)
+    pd.testing.assert_frame_equal(frames["c"], frames["pyarrow"])
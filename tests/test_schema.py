@@ -0,0 +1,75 @@
+"""States outside STRATEGY_STATES are kept, not turned into NaN."""
+
+import numpy as np
+import pandas as pd
+
+from scripts.utils.clarity_data_quality_control_functions import generate_delta
+from scripts.utils.schema import (
+    STRATEGY_DTYPE,
+    is_state_dtype,
+    normalise_state_column,
+    state_codes,
+)
+from scripts.utils.state_table import StateTable
+from scripts.utils.transitions import compute_transitions
+
+COLS = ["str_001_s", "str_002_ec"]
+
+
+def test_unknown_states_become_extra_categories():
+    states = normalise_state_column(
+        pd.Series([" ok", "Flag ", "N/A", "", None, "pending"], name="str_001_s")
+    )
+    assert is_state_dtype(states.dtype)
+    assert list(states.cat.categories) == ["OK", "FLAG", "EXCLUDED", "N/A", "PENDING"]
+    assert states.tolist()[:4] == ["OK", "FLAG", "N/A", np.nan]
+    assert states.tolist()[5] == "PENDING"
+    assert normalise_state_column(states) is states
+
+
+def test_known_states_keep_the_shared_dtype():
+    states = normalise_state_column(pd.Series(["OK", "EXCLUDED", None]))
+    assert states.dtype == STRATEGY_DTYPE
+
+
+def test_state_codes_share_extra_states():
+    extra = []
+    first = state_codes(pd.Series(["N/A", "OK"]), extra)
+    second = state_codes(pd.Series(["PENDING", "N/A", None]), extra)
+    assert extra == ["N/A", "PENDING"]
+    assert first.tolist() == [3, 0]
+    assert second.tolist() == [4, 3, -1]
+
+
+def _frames():
+    index = pd.Index([1, 2, 3, 4], name="permid")
+    old = pd.DataFrame(
+        {"str_001_s": ["OK", "N/A", "OK", "N/A"], "str_002_ec": ["OK"] * 4},
+        index=index,
+    )
+    new = pd.DataFrame(
+        {"str_001_s": ["N/A", "EXCLUDED", "OK", "N/A"], "str_002_ec": ["OK"] * 4},
+        index=index,
+    )
+    return old, new
+
+
+def test_changes_to_and_from_unknown_states_are_kept():
+    old, new = _frames()
+    transitions = compute_transitions(old, new, COLS)
+    assert transitions.changed[:, 0].tolist() == [True, True, False, False]
+    assert transitions.into(["EXCLUDED"])[:, 0].tolist() == [False, True, False, False]
+
+    delta = generate_delta(old, new, COLS, get_inc_excl=False)
+    assert delta["permid"].tolist() == [1, 2]
+    assert delta["str_001_s"].tolist() == ["N/A", "EXCLUDED"]
+
+
+def test_state_table_codes_extra_states_like_the_frames():
+    old, new = _frames()
+    table = StateTable.from_frames({"old": old, "new": new}, COLS)
+    expected = compute_transitions(old, new, COLS)
+    result = table.transitions("old", "new", "permid", new.index)
+    assert result.extra_states == expected.extra_states == ["N/A"]
+    np.testing.assert_array_equal(result.old_codes, expected.old_codes)
+    np.testing.assert_array_equal(result.new_codes, expected.new_codes)
@@ -0,0 +1,80 @@
+"""
+Under the spawn start method (Windows) every worker process of a pool
+re-imports the stage module as __mp_main__: that import must not configure
+the run (log file, output dir), and the pooled loads must still work.
+"""
+
+import runpy
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+import scripts.utils.config
+
+REPO_DIR = Path(__file__).resolve().parents[1]
+
+
+@pytest.mark.skipif(
+    sys.version_info < (3, 12), reason="the stage uses Python 3.12 f-strings"
+)
+def test_worker_import_does_not_configure_the_run(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("get_config ran on import")
+
+    monkeypatch.setattr(scripts.utils.config, "get_config", fail)
+    namespace = runpy.run_module("scripts._00_preovr_analysis", run_name="__mp_main__")
+    assert callable(namespace["main"])
+
+
+def test_process_pools_run_under_spawn(tmp_path):
+    script = tmp_path / "stage.py"
+    script.write_text(
+        textwrap.dedent(
+            """
+        import multiprocessing
+
+        import pandas as pd
+
+        from scripts.utils.excel_writer import write_workbooks_parallel, write_workbook
+        from scripts.utils.parallel_loader import load_in_parallel
+
+
+        def main(out_dir):
+            loaded = load_in_parallel(
+                [
+                    {"name": "a", "loader": sorted, "args": ([3, 1, 2],),
+                     "executor": "process"},
+                    {"name": "b", "loader": len, "args": ("abc",),
+                     "executor": "process"},
+                ]
+            )
+            assert loaded == {"a": [1, 2, 3], "b": 3}, loaded
+            df = pd.DataFrame({"x": [1, 2]})
+            jobs = [
+                (write_workbook, ({"s": df}, f"{out_dir}/{name}.xlsx"), {})
+                for name in ("one", "two")
+            ]
+            print(len(write_workbooks_parallel(jobs, max_workers=2)))
+
+
+        if __name__ == "__main__":
+            import sys
+
+            multiprocessing.set_start_method("spawn")
+            main(sys.argv[1])
+    """
+        )
+    )
+    result = subprocess.run(
+        [sys.executable, str(script), str(tmp_path)],
+        cwd=REPO_DIR,
+        env={"PYTHONPATH": str(REPO_DIR), "PATH": ""},
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "2"
@@ -0,0 +1,94 @@
+"""A StateTable answers the queries the wide frames used to answer."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.utils.alignment import align_keys
+from scripts.utils.clarity_data_quality_control_functions import _melt_lookup
+from scripts.utils.schema import STRATEGY_STATES, apply_schema
+from scripts.utils.state_table import StateTable
+from scripts.utils.transitions import compute_transitions
+
+STRATEGIES = ["str_001_s", "str_002_ec", "str_003_ec", "str_004_asec"]
+
+
+def _feed(rng, permids, missing_strategy=None):
+    """Wide issuer frame: blanks, an extra state and the given permids."""
+    states = np.array(STRATEGY_STATES + ["N/A", None], dtype=object)
+    rows = len(permids)
+    df = pd.DataFrame(
+        {
+            "permid": pd.array(permids, dtype="Int64"),
+            "aladdin_id": pd.array(
+                [f"{p:06d}" if p is not None and p % 5 else None for p in permids],
+                dtype="string",
+            ),
+            **{
+                col: rng.choice(states, rows, p=[0.5, 0.2, 0.15, 0.05, 0.1])
+                for col in STRATEGIES
+                if col != missing_strategy
+            },
+        }
+    )
+    return apply_schema(df)
+
+
+@pytest.fixture(scope="module")
+def feeds():
+    rng = np.random.default_rng(7)
+    old_ids = list(range(1, 400)) + [10, 20, None, 30]  # duplicates, NaN key
+    new_ids = list(range(50, 450)) + [20, None, 60, 60]
+    new_ids = list(rng.permutation(np.array(new_ids, dtype=object)))
+    old = _feed(rng, old_ids)
+    new = _feed(rng, new_ids, missing_strategy="str_004_asec")
+    return old, new
+
+
+def test_transitions_match_compute_transitions(feeds):
+    old, new = feeds
+    old_common, new_common = align_keys(old, new).common()
+    expected = compute_transitions(old_common, new_common, STRATEGIES)
+
+    table = StateTable.from_frames({"old": old, "new": new}, STRATEGIES)
+    result = table.transitions("old", "new", "permid", new_common.index)
+
+    assert result.cols == expected.cols == STRATEGIES[:3]
+    assert result.index.equals(expected.index)
+    assert result.extra_states == expected.extra_states == ["N/A"]
+    np.testing.assert_array_equal(result.old_codes, expected.old_codes)
+    np.testing.assert_array_equal(result.new_codes, expected.new_codes)
+    pd.testing.assert_frame_equal(result.counts(), expected.counts())
+
+
+def test_transitions_of_indexed_frames(feeds):
+    old, new = (frame.set_index("permid") for frame in feeds)
+    old_common, new_common = align_keys(old, new).common()
+    expected = compute_transitions(old_common, new_common, STRATEGIES)
+    table = StateTable.from_frames({"old": old, "new": new}, STRATEGIES)
+    result = table.transitions("old", "new", "permid", new_common.index)
+    np.testing.assert_array_equal(result.old_codes, expected.old_codes)
+    np.testing.assert_array_equal(result.new_codes, expected.new_codes)
+
+
+def _rows(lookup):
+    """Non-null (_key, _strategy, value) rows of a lookup, sorted."""
+    lookup = lookup[lookup["value"].notna()]
+    return sorted(zip(lookup["_key"], lookup["_strategy"], lookup["value"]))
+
+
+@pytest.mark.parametrize("key_col", ["permid", "aladdin_id"])
+def test_lookup_matches_melt_lookup(feeds, key_col):
+    old, new = feeds
+    table = StateTable.from_frames({"brs": old, "new": new}, STRATEGIES)
+    keys = list(new[key_col].dropna().unique()) + [10, "000010"]
+    strategies = ["str_001_s", "str_004_asec", "str_999"]
+
+    expected = _melt_lookup(old, key_col, keys, strategies)
+    result = _melt_lookup(table.source("brs"), key_col, keys, strategies)
+    assert _rows(result) == _rows(expected)
+    assert len(_rows(expected)) > 0
+
+    expected = _melt_lookup(new.set_index(key_col), key_col, keys, strategies)
+    result = table.lookup("new", key_col, keys, strategies)
+    assert _rows(result) == _rows(expected)
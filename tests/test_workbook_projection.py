@@ -0,0 +1,57 @@
+"""Projected BRS sheets require their keys and strategies, not their descriptors."""
+
+import pandas as pd
+import pytest
+
+from scripts.utils.dataloaders import (
+    WorkbookSession,
+    load_aladdin_data,
+    load_workbook_sheets,
+)
+
+SHEET = "portfolio_carteras"
+COLUMNS = ["aladdin_id", "issuer_name", "portfolio_id", "str_001_s"]
+OPTIONAL = ["issuer_name"]
+
+
+@pytest.fixture
+def export(tmp_path):
+    """A BRS-like export (3 title rows) without the issuer_name descriptor."""
+    path = tmp_path / "brs.xlsx"
+    rows = [["title"], [], [], ["Aladdin ID", "Portfolio ID", "STR 001 S", "Other"]]
+    rows += [["A1", "P1", "OK", "x"], ["A2", "P1", "EXCLUDED", "y"]]
+    pd.DataFrame(rows).to_excel(path, sheet_name=SHEET, header=False, index=False)
+    return path
+
+
+def test_optional_descriptors_are_read_if_present(export):
+    frames = load_workbook_sheets(
+        export,
+        [SHEET],
+        skiprows=3,
+        columns={SHEET: COLUMNS},
+        optional_columns={SHEET: OPTIONAL},
+    )
+    book = WorkbookSession.from_frames(export, frames, skiprows=3)
+    df = load_aladdin_data(book, SHEET, columns=COLUMNS, optional_columns=OPTIONAL)
+    assert list(df.columns) == ["aladdin_id", "portfolio_id", "str_001_s"]
+    assert df["str_001_s"].tolist() == ["OK", "EXCLUDED"]
+
+    df = load_aladdin_data(export, SHEET, columns=COLUMNS, optional_columns=OPTIONAL)
+    assert list(df.columns) == ["aladdin_id", "portfolio_id", "str_001_s"]
+
+
+def test_missing_strategy_still_raises(export):
+    columns = COLUMNS + ["str_002_ec"]
+    with pytest.raises(ValueError, match="str_002_ec"):
+        WorkbookSession(
+            export,
+            [SHEET],
+            skiprows=3,
+            columns={SHEET: columns},
+            optional_columns={SHEET: OPTIONAL},
+        ).sheet(SHEET)
+    with pytest.raises(ValueError, match="str_002_ec"):
+        load_aladdin_data(export, SHEET, columns=columns, optional_columns=OPTIONAL)
+    with pytest.raises(ValueError, match="issuer_name"):
+        load_aladdin_data(export, SHEET, columns=COLUMNS)